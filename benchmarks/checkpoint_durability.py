@@ -0,0 +1,136 @@
+"""Postgres writes and turn latency per checkpoint durability mode.
+
+Runs the same interviews through the graph once per ``CHECKPOINT_DURABILITY``
+mode (see :mod:`core.durability`) on top of the Postgres checkpointer, with
+the fake LLM backend, and reports per turn the checkpointer round trips
+(checkpoint puts and task write puts), the rows left in the checkpoint
+tables and the latency p50/p95. Needs ``POSTGRES_DB_URL``; run from the
+repository root::
+
+    python -m benchmarks.checkpoint_durability --interviews 20 --concurrency 5
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import uuid
+
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("LLM_REQUESTS_PER_MINUTE", "0")
+os.environ.setdefault("LLM_TOKENS_PER_MINUTE", "0")
+os.environ.setdefault("LLM_CACHE_PATH", "")
+
+from langgraph.types import Command  # noqa: E402
+from prometheus_client import REGISTRY  # noqa: E402
+
+from core.agent import get_interview_agent  # noqa: E402
+from core.durability import MODES, flush_checkpoints  # noqa: E402
+from core.utils import get_checkpointer, get_connection_pool  # noqa: E402
+from service.streaming import agent_events  # noqa: E402
+
+ROWS_SQL = """
+SELECT
+    (SELECT count(*) FROM checkpoints WHERE thread_id = ANY(%(threads)s)),
+    (SELECT count(*) FROM checkpoint_writes WHERE thread_id = ANY(%(threads)s))
+"""
+
+
+def operations() -> dict[str, float]:
+    return {
+        operation: REGISTRY.get_sample_value(
+            "interview_checkpoint_duration_seconds_count", {"operation": operation}
+        )
+        or 0.0
+        for operation in ("put", "put_writes")
+    }
+
+
+async def run_turn(agent, kwargs: dict, latencies: list[float]) -> bool:
+    """Run one turn; returns whether the AI asked another question."""
+    started = time.perf_counter()
+    asked = False
+    async for event in agent_events(agent, kwargs):
+        if event["type"] == "message" and event["content"]["type"] == "ai":
+            asked = True
+    latencies.append(time.perf_counter() - started)
+    return asked
+
+
+async def run_interview(agent, thread_id: str, max_turns: int, latencies: list):
+    config = {"configurable": {"thread_id": thread_id}}
+    asked = await run_turn(
+        agent,
+        {
+            "input": {
+                "job_description": "Backend engineer working on Python services.",
+                "resume": f"Candidate {thread_id}: five years of Python and SQL.",
+            },
+            "config": config,
+        },
+        latencies,
+    )
+    for turn in range(max_turns):
+        if not asked:
+            return
+        asked = await run_turn(
+            agent,
+            {"input": Command(resume=f"Answer {turn}."), "config": config},
+            latencies,
+        )
+
+
+def percentiles(values: list[float]) -> str:
+    if len(values) < 2:
+        return "n/a"
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return " ".join(f"p{p}={cuts[p - 1] * 1000:.1f}ms" for p in (50, 95))
+
+
+async def main(args: argparse.Namespace) -> None:
+    pool = await get_connection_pool()
+    try:
+        for mode in args.modes:
+            agent = get_interview_agent(await get_checkpointer(pool), mode)
+            threads = [str(uuid.uuid4()) for _ in range(args.interviews)]
+            latencies: list[float] = []
+            semaphore = asyncio.Semaphore(args.concurrency)
+
+            async def bounded(thread_id: str) -> None:
+                async with semaphore:
+                    await run_interview(agent, thread_id, args.max_turns, latencies)
+
+            before = operations()
+            await asyncio.gather(*(bounded(thread_id) for thread_id in threads))
+            await flush_checkpoints(agent.checkpointer)
+            after = operations()
+
+            async with pool.connection() as conn:
+                cursor = await conn.execute(ROWS_SQL, {"threads": threads})
+                checkpoint_rows, write_rows = await cursor.fetchone()
+            turns = len(latencies)
+            print(f"{mode}:")
+            print(f"  turns:              {turns}")
+            print(
+                "  puts per turn:      "
+                f"{(after['put'] - before['put']) / turns:.2f} checkpoints, "
+                f"{(after['put_writes'] - before['put_writes']) / turns:.2f} writes"
+            )
+            print(
+                f"  rows per turn:      {checkpoint_rows / turns:.2f} checkpoints, "
+                f"{write_rows / turns:.2f} writes"
+            )
+            print(f"  turn latency:       {percentiles(latencies)}")
+    finally:
+        await pool.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--interviews", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--max-turns", type=int, default=20)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    asyncio.run(main(parser.parse_args()))
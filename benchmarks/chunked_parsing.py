@@ -0,0 +1,121 @@
+"""Single-shot versus chunked parsing of long resumes and job descriptions.
+
+Parses a generated multi-page CV and job description with
+``PARSE_CHUNK_THRESHOLD_CHARS=0`` (one LLM call per document) and with
+chunking on (see :mod:`core.parsing`), and reports the chunk count, the
+wall-clock time and the size of the merged result. Uses the fake LLM
+backend; ``LLM_FAKE_PREFILL_MS_PER_1K_TOKENS`` sets how much a long prompt
+costs. Run from the repository root::
+
+    python -m benchmarks.chunked_parsing --chars 60000 --runs 5
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("LLM_REQUESTS_PER_MINUTE", "0")
+os.environ.setdefault("LLM_TOKENS_PER_MINUTE", "0")
+os.environ.setdefault("LLM_CACHE_PATH", "")
+# Every run has to reach the model.
+os.environ.setdefault("LLM_RESUME_BREAKER_CACHE", "false")
+os.environ.setdefault("LLM_JOB_DESCRIPTION_PARSER_CACHE", "false")
+os.environ.setdefault("LLM_FAKE_TTFT_SIGMA", "0")
+os.environ.setdefault("LLM_FAKE_PREFILL_MS_PER_1K_TOKENS", "150")
+
+from core.parsing import (  # noqa: E402
+    break_resume,
+    parse_job_description,
+    split_sections,
+)
+
+WORDS = (
+    "designed built scaled migrated python services postgres kafka latency "
+    "pipelines kubernetes reduced costs mentored engineers owned on-call"
+).split()
+
+
+def sentence(seed: int, words: int = 24) -> str:
+    return " ".join(WORDS[(seed * 7 + i) % len(WORDS)] for i in range(words)) + "."
+
+
+def make_resume(chars: int) -> str:
+    sections = {
+        "EXPERIENCE": lambda i: f"Engineer {i}, Company {i}\n{sentence(i)}",
+        "PROJECTS": lambda i: f"Project {i}\n{sentence(i + 100)}",
+        "PUBLICATIONS": lambda i: f"Paper {i}. {sentence(i + 200, 16)}",
+    }
+    parts, i = [], 0
+    while sum(map(len, parts)) < chars:
+        for heading, entry in sections.items():
+            parts.append(heading)
+            parts += [entry(i + j) for j in range(8)]
+        i += 8
+    parts += ["SKILLS", "Python, SQL, Kafka, Kubernetes, Postgres, Go"]
+    return "\n\n".join(parts)
+
+
+def make_job_description(chars: int) -> str:
+    parts = []
+    while sum(map(len, parts)) < chars:
+        parts += ["Responsibilities", sentence(len(parts), 60)]
+        parts += ["Requirements", sentence(len(parts) + 3, 60)]
+    return "\n\n".join(parts)
+
+
+async def run(mode: str, args: argparse.Namespace, resume: str, jd: str) -> None:
+    os.environ["PARSE_CHUNK_THRESHOLD_CHARS"] = (
+        "0" if mode == "single" else str(args.threshold)
+    )
+    os.environ["PARSE_CHUNK_CHARS"] = str(args.chunk_chars)
+    chunks = 1 if mode == "single" else None
+    for name, document, parse in (
+        ("resume", resume, break_resume),
+        ("job description", jd, parse_job_description),
+    ):
+        timings = []
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            result = await parse(document)
+            timings.append(time.perf_counter() - started)
+        count = chunks or len(split_sections(document, args.chunk_chars))
+        if name == "resume":
+            size = (
+                f"{len(result.experiences)} experiences, "
+                f"{len(result.projects)} projects, {len(result.skills)} skills"
+            )
+        else:
+            size = f"{len(result.job_description)} characters"
+        print(f"{mode} {name} ({len(document)} characters):")
+        print(f"  chunks:             {count}")
+        print(
+            f"  wall clock:         mean={statistics.mean(timings) * 1000:.0f}ms "
+            f"max={max(timings) * 1000:.0f}ms"
+        )
+        print(f"  merged result:      {size}")
+
+
+async def main(args: argparse.Namespace) -> None:
+    resume = make_resume(args.chars)
+    jd = make_job_description(args.chars // 2)
+    for mode in args.modes:
+        await run(mode, args, resume, jd)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chars", type=int, default=60000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--threshold", type=int, default=16000)
+    parser.add_argument("--chunk-chars", type=int, default=8000)
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        choices=["single", "chunked"],
+        default=["single", "chunked"],
+    )
+    asyncio.run(main(parser.parse_args()))
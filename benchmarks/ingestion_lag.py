@@ -0,0 +1,144 @@
+"""Event-loop lag while resumes and job description pages are ingested.
+
+Ingests the same generated PDF resumes and job description pages (served by
+a local HTTP server with an artificial delay) two ways and reports the wall
+time and the lag of a probe task that wakes up every ``--interval-ms``:
+
+* ``inline``: PyMuPDF and a blocking HTTP fetch on the event loop, as
+  ``parser_node`` used to do;
+* ``ingestor``: :class:`core.ingestion.Ingestor`, with the fetch cache off.
+
+The lag is what every other live interview of the worker waits on top of
+its own work. Run from the repository root::
+
+    python -m benchmarks.ingestion_lag --documents 20 --pages 30
+"""
+
+import argparse
+import asyncio
+import http.server
+import statistics
+import threading
+import time
+
+import fitz
+import httpx
+
+from core.ingestion import Ingestor, _html_text, _pdf_pages
+
+WORDS = "python sql distributed systems api design caching queues testing ".split()
+
+
+def make_pdf(pages: int) -> bytes:
+    pdf = fitz.open()
+    for page_number in range(pages):
+        page = pdf.new_page()
+        text = " ".join(WORDS[(page_number + i) % len(WORDS)] for i in range(600))
+        page.insert_textbox(page.rect + (36, 36, -36, -36), text, fontsize=8)
+    return pdf.tobytes()
+
+
+def serve_job_description(delay: float, size: int) -> http.server.HTTPServer:
+    paragraph = "<p>" + " ".join(WORDS * 4) + "</p>"
+    body = (
+        "<html><body><h1>Backend engineer</h1>"
+        + paragraph * (size // len(paragraph) + 1)
+        + "</body></html>"
+    ).encode()
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def probe(interval: float, lags: list[float], stop: asyncio.Event) -> None:
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - started - interval)
+        if stop.is_set():
+            return
+
+
+async def ingest_inline(pdf: bytes, url: str) -> None:
+    _pdf_pages(pdf, 0, 1 << 30)
+    _html_text(httpx.get(url).text)
+
+
+def percentiles(values: list[float]) -> str:
+    summary = f"max={max(values) * 1000:.1f}ms ({len(values)} samples)"
+    if len(values) < 2:
+        return summary
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return (
+        " ".join(f"p{p}={cuts[p - 1] * 1000:.1f}ms" for p in (50, 99)) + f" {summary}"
+    )
+
+
+async def run(mode: str, args: argparse.Namespace, pdf: bytes, url: str) -> None:
+    ingestor = Ingestor(workers=args.workers, fetch_cache_size=0)
+    if mode == "ingestor":
+        # Start the worker processes and the HTTP client outside of the
+        # measurement.
+        await asyncio.gather(ingestor.pdf_text(pdf), ingestor.fetch_text(url))
+
+        async def ingest(pdf: bytes, url: str) -> None:
+            await asyncio.gather(ingestor.pdf_text(pdf), ingestor.fetch_text(url))
+
+    else:
+        ingest = ingest_inline
+
+    lags: list[float] = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(args.interval_ms / 1000, lags, stop))
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    await asyncio.gather(*(ingest(pdf, url) for _ in range(args.documents)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe_task
+    await ingestor.close()
+
+    print(f"{mode}:")
+    print(f"  documents:          {args.documents} in {elapsed:.2f}s")
+    print(f"  event-loop lag:     {percentiles(lags)}")
+
+
+async def main(args: argparse.Namespace) -> None:
+    pdf = make_pdf(args.pages)
+    server = serve_job_description(args.fetch_delay_ms / 1000, args.page_bytes)
+    url = f"http://127.0.0.1:{server.server_port}/job"
+    try:
+        for mode in args.modes:
+            await run(mode, args, pdf, url)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=30)
+    parser.add_argument("--page-bytes", type=int, default=200_000)
+    parser.add_argument("--fetch-delay-ms", type=float, default=200)
+    parser.add_argument("--interval-ms", type=float, default=5)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        choices=["inline", "ingestor"],
+        default=["inline", "ingestor"],
+    )
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,177 @@
+"""End-to-end load test driving concurrent interviews through the HTTP API.
+
+Every interview calls ``/start`` and then answers over ``/stream`` until the
+interviewer ends it. Reports per-turn latency and time to first token
+(TTFT) as p50/p95/p99, throughput and, when the service runs in this process, the
+memory held per interview.
+
+By default the service is started in-process with the fake LLM backend, the
+in-memory checkpointer and no LLM rate limits, so only the service's own
+overhead is measured. Set ``CHECKPOINTER=postgres`` (and
+``POSTGRES_DB_URL``) to include checkpointing, the ``LLM_FAKE_*`` variables
+to change the simulated latency, or pass ``--url`` to load an already
+running server. Run from the repository root::
+
+    python -m benchmarks.load_test --interviews 200 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import time
+
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("CHECKPOINTER", "memory")
+os.environ.setdefault("LLM_REQUESTS_PER_MINUTE", "0")
+os.environ.setdefault("LLM_TOKENS_PER_MINUTE", "0")
+os.environ.setdefault("LLM_CACHE_PATH", "")
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+
+
+class Results:
+    def __init__(self):
+        self.turn_latencies: list[float] = []
+        self.first_event_latencies: list[float] = []
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+
+async def run_turn(
+    client: httpx.AsyncClient, path: str, payload: dict, results: Results
+) -> tuple[str | None, bool]:
+    """Run one turn; returns the thread id and whether the AI asked again."""
+    while True:
+        started = time.perf_counter()
+        first_event = None
+        asked = False
+        async with client.stream("POST", path, json=payload) as response:
+            if response.status_code in (429, 503):
+                results.rejected += 1
+                await asyncio.sleep(float(response.headers.get("Retry-After", 1)))
+                continue
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data: ") or line == "data: [DONE]":
+                    continue
+                event = json.loads(line[len("data: ") :])
+                if event["type"] == "error":
+                    raise RuntimeError(event["content"])
+                if event["type"] == "token" or (
+                    event["type"] == "message" and event["content"]["type"] == "ai"
+                ):
+                    asked = True
+                    if first_event is None:
+                        first_event = time.perf_counter() - started
+        results.turn_latencies.append(time.perf_counter() - started)
+        if first_event is not None:
+            results.first_event_latencies.append(first_event)
+        return response.headers.get("X-Thread-ID"), asked
+
+
+async def run_interview(
+    client: httpx.AsyncClient, index: int, max_turns: int, results: Results
+) -> None:
+    try:
+        thread_id, asked = await run_turn(
+            client,
+            "/start",
+            {
+                "job_description": "Backend engineer working on Python services.",
+                "resume": f"Candidate {index}: five years of Python, SQL and AWS.",
+            },
+            results,
+        )
+        for turn in range(max_turns):
+            if not asked:
+                break
+            _, asked = await run_turn(
+                client,
+                "/stream",
+                {"thread_id": thread_id, "message": f"Answer {turn} of {index}."},
+                results,
+            )
+        results.completed += 1
+    except Exception as e:
+        results.failed += 1
+        print(f"Interview {index} failed: {e!r}")
+
+
+def percentiles(values: list[float]) -> str:
+    if len(values) < 2:
+        return "n/a"
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return " ".join(f"p{p}={cuts[p - 1] * 1000:.1f}ms" for p in (50, 95, 99))
+
+
+def rss_bytes() -> int:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+async def start_server() -> tuple[uvicorn.Server, asyncio.Task, str]:
+    from service.service import app
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    config = uvicorn.Config(app, log_level="warning")
+    server = uvicorn.Server(config)
+    task = asyncio.create_task(server.serve(sockets=[sock]))
+    while not server.started:
+        if task.done():
+            raise RuntimeError("The service failed to start")
+        await asyncio.sleep(0.05)
+    host, port = sock.getsockname()
+    return server, task, f"http://{host}:{port}"
+
+
+async def main(args: argparse.Namespace) -> None:
+    server = None
+    url = args.url
+    if url is None:
+        server, server_task, url = await start_server()
+    rss_before = rss_bytes()
+
+    results = Results()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    limits = httpx.Limits(max_connections=args.concurrency)
+
+    async def bounded(client: httpx.AsyncClient, index: int) -> None:
+        async with semaphore:
+            await run_interview(client, index, args.max_turns, results)
+
+    started = time.perf_counter()
+    async with httpx.AsyncClient(base_url=url, timeout=None, limits=limits) as client:
+        await asyncio.gather(*(bounded(client, i) for i in range(args.interviews)))
+    elapsed = time.perf_counter() - started
+
+    print(f"interviews:        {results.completed} completed, {results.failed} failed")
+    print(f"rejected requests: {results.rejected}")
+    print(f"turns:             {len(results.turn_latencies)} in {elapsed:.2f}s")
+    print(
+        f"throughput:        {len(results.turn_latencies) / elapsed:.1f} turns/s, "
+        f"{results.completed / elapsed:.2f} interviews/s"
+    )
+    print(f"turn latency:      {percentiles(results.turn_latencies)}")
+    print(f"first token:       {percentiles(results.first_event_latencies)}")
+    if server is not None:
+        # With the in-memory checkpointer this includes every checkpoint.
+        per_session = (rss_bytes() - rss_before) / max(args.interviews, 1)
+        print(f"memory:            {per_session / 1024:.1f} KiB RSS per interview")
+        server.should_exit = True
+        await server_task
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--interviews", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--max-turns", type=int, default=20)
+    parser.add_argument("--url", help="load a running server instead")
+    asyncio.run(main(parser.parse_args()))
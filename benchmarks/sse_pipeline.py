@@ -0,0 +1,133 @@
+"""Micro-benchmark of the SSE pipeline in ``service.service.message_generator``.
+
+Compares the current ``stream_mode=["messages", "updates"]`` pipeline with the
+previous ``astream_events(version="v2")`` implementation on a small graph
+driven by a fake streaming chat model, so only the service overhead is
+measured. Run from the repository root::
+
+    python -m benchmarks.sse_pipeline --turns 200 --tokens 300
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from langchain_core.language_models import BaseChatModel  # noqa: E402
+from langchain_core.messages import (  # noqa: E402
+    AIMessage,
+    AIMessageChunk,
+    HumanMessage,
+)
+from langchain_core.outputs import (  # noqa: E402
+    ChatGeneration,
+    ChatGenerationChunk,
+    ChatResult,
+)
+from langgraph.graph import START, MessagesState, StateGraph  # noqa: E402
+from langgraph.types import Command  # noqa: E402
+
+from service.service import message_generator  # noqa: E402
+from service.utils import (  # noqa: E402
+    convert_message_content_to_string,
+    remove_tool_calls,
+)
+
+
+async def legacy_message_generator(agent, kwargs):
+    """The astream_events based generator this pipeline replaced."""
+    async for event in agent.astream_events(**kwargs, version="v2"):
+        if not event:
+            continue
+        new_messages = []
+        if event["event"] == "on_chain_end" and any(
+            t.startswith("graph:step:") for t in event.get("tags", [])
+        ):
+            if isinstance(event["data"]["output"], Command):
+                new_messages = event["data"]["output"].update.get("messages", [])
+            elif "messages" in event["data"]["output"]:
+                new_messages = event["data"]["output"]["messages"]
+        for message in new_messages:
+            yield f"data: {json.dumps({'type': 'message', 'content': message.model_dump()})}\n\n"
+        if event["event"] == "on_chat_model_stream":
+            content = remove_tool_calls(event["data"]["chunk"].content)
+            if content:
+                yield f"data: {json.dumps({'type': 'token', 'content': convert_message_content_to_string(content)})}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+class StreamingFakeChatModel(BaseChatModel):
+    """Streams ``tokens`` words natively on the event loop, with no latency."""
+
+    tokens: int
+
+    @property
+    def _llm_type(self) -> str:
+        return "streaming-fake"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        text = "".join(f"word{i} " for i in range(self.tokens))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(text))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        for i in range(self.tokens):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=f"word{i} "))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+def build_agent(tokens: int):
+    llm = StreamingFakeChatModel(tokens=tokens)
+
+    async def respond(state: MessagesState):
+        return {"messages": [await llm.ainvoke(state["messages"])]}
+
+    workflow = StateGraph(MessagesState)
+    workflow.add_node("respond", respond)
+    workflow.add_edge(START, "respond")
+    return workflow.compile()
+
+
+async def measure(name, generator, agent, turns: int) -> dict:
+    frames = 0
+    size = 0
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    for _ in range(turns):
+        kwargs = {"input": {"messages": [HumanMessage(content="hi")]}}
+        async for frame in generator(agent, kwargs):
+            frames += 1
+            size += len(frame)
+    wall = time.perf_counter() - wall
+    cpu = time.process_time() - cpu
+    return {
+        "pipeline": name,
+        "frames_per_turn": round(frames / turns, 1),
+        "bytes_per_turn": round(size / turns),
+        "frames_per_sec": round(frames / wall),
+        "cpu_ms_per_turn": round(cpu / turns * 1000, 2),
+        "wall_ms_per_turn": round(wall / turns * 1000, 2),
+    }
+
+
+async def main(turns: int, tokens: int) -> None:
+    agent = build_agent(tokens)
+    for name, generator in (
+        ("astream_events", legacy_message_generator),
+        ("messages+updates", message_generator),
+    ):
+        # Warm up imports and caches before measuring.
+        await measure(name, generator, agent, 2)
+        print(await measure(name, generator, agent, turns))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--tokens", type=int, default=300)
+    args = parser.parse_args()
+    asyncio.run(main(args.turns, args.tokens))
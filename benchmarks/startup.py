@@ -0,0 +1,104 @@
+"""Cold start profile of the service.
+
+Reports where ``import service`` spends its time (``python -X importtime``,
+self time summed per top-level package and the slowest modules), then starts
+``uvicorn service:app`` in a fresh process a few times and measures how long
+it takes until ``/health`` (liveness) and ``/ready`` (warm-up finished)
+answer. Uses the in-memory checkpointer unless ``CHECKPOINTER`` is set. Run
+from the repository root::
+
+    python -m benchmarks.startup --runs 3
+"""
+
+import argparse
+import collections
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+
+def import_profile() -> tuple[float, list[tuple[str, int]], list[tuple[str, int]]]:
+    """Total import time and the self time per package and per module, in µs."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import service"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    packages: collections.Counter[str] = collections.Counter()
+    modules: list[tuple[str, int]] = []
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:") :].split("|")
+        name = name.strip()
+        packages[name.split(".")[0]] += int(own)
+        modules.append((name, int(own)))
+        if name == "service":
+            total = int(cumulative)
+    modules.sort(key=lambda module: module[1], reverse=True)
+    return total / 1e6, packages.most_common(), modules
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_ready(timeout: float) -> tuple[float, float]:
+    """Seconds from process start until ``/health`` and ``/ready`` answer 200."""
+    port = free_port()
+    env = {"CHECKPOINTER": "memory", **os.environ}
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "service:app", "--port", str(port)],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    live = None
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+            while time.perf_counter() - started < timeout:
+                try:
+                    if live is None and client.get("/health").status_code == 200:
+                        live = time.perf_counter() - started
+                    if client.get("/ready").status_code == 200:
+                        return live, time.perf_counter() - started
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.01)
+        raise RuntimeError("The service did not become ready")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(args: argparse.Namespace) -> None:
+    total, packages, modules = import_profile()
+    print(f"import service:       {total * 1000:.0f}ms")
+    print("  by package (self):")
+    for package, own in packages[: args.top]:
+        print(f"    {package:<30}{own / 1000:>8.1f}ms")
+    print("  slowest modules (self):")
+    for module, own in modules[: args.top]:
+        print(f"    {module:<50}{own / 1000:>8.1f}ms")
+
+    live, ready = zip(*(time_to_ready(args.timeout) for _ in range(args.runs)))
+    print(f"process start to /health: median {statistics.median(live) * 1000:.0f}ms")
+    print(f"process start to /ready:  median {statistics.median(ready) * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=60)
+    main(parser.parse_args())
@@ -0,0 +1,6 @@
+"""Command line tools, run as ``python -m cli.<tool>`` from the repository root."""
+
+from dotenv import load_dotenv
+
+# Load .env before any tool imports core, which reads its settings at import.
+load_dotenv(override=True)
@@ -0,0 +1,76 @@
+"""Compact and prune the checkpoint tables.
+
+Usage, from the repository root::
+
+    python -m cli.checkpoints run --ttl-days 30
+    python -m cli.checkpoints run --dry-run
+    python -m cli.checkpoints stats
+
+``run`` compacts completed interviews to their final checkpoint, deletes
+unfinished interviews idle for more than ``--ttl-days`` (0 keeps them),
+deletes unreferenced documents and persisted SSE replay frames of those
+threads or older than ``--replay-ttl-hours``, then prints the rows and bytes
+reclaimed.
+With ``--dry-run`` every batch runs in a transaction that is rolled back, so
+the report counts all the rows a real run would delete, except documents that
+only the pruned threads referenced (their references are restored before
+documents are collected).
+"""
+
+import argparse
+import asyncio
+
+from core.config import env_int
+from core.maintenance import run_maintenance, table_sizes
+from core.utils import get_connection_pool
+
+
+async def _main(args: argparse.Namespace) -> None:
+    pool = await get_connection_pool()
+    try:
+        if args.command == "stats":
+            for table, size in (await table_sizes(pool)).items():
+                print(f"{table}\t{size}")
+            return
+
+        report = await run_maintenance(
+            pool,
+            int(args.ttl_days * 24 * 3600),
+            args.batch_size,
+            args.dry_run,
+            int(args.replay_ttl_hours * 3600),
+        )
+        if report is None:
+            print("Another maintenance run is in progress")
+            return
+        print(f"Compacted threads: {report.compacted_threads}")
+        print(f"Pruned threads: {report.pruned_threads}")
+        for table, rows in report.deleted_rows.items():
+            print(f"{table}\t{rows} rows\t{report.reclaimed_bytes[table]} bytes")
+        print(f"Reclaimed {report.total_reclaimed_bytes} bytes")
+    finally:
+        await pool.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Maintain the checkpoint tables.")
+    parser.add_argument("command", choices=["run", "stats"])
+    parser.add_argument(
+        "--ttl-days",
+        type=float,
+        default=env_int("CHECKPOINT_TTL_SECONDS", 30 * 24 * 3600) / (24 * 3600),
+        help="Delete unfinished interviews idle for longer than this; 0 keeps them.",
+    )
+    parser.add_argument(
+        "--replay-ttl-hours",
+        type=float,
+        default=env_int("SSE_REPLAY_TTL_SECONDS", 24 * 3600) / 3600,
+        help="Delete persisted SSE frames older than this; 0 keeps them.",
+    )
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--dry-run", action="store_true")
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Export interview results from the checkpoint tables.
+
+Usage, from the repository root::
+
+    python -m cli.export --status completed --since 2025-01-01 > results.jsonl
+    python -m cli.export --format parquet --output results.parquet
+    python -m cli.export --fields skills,coding_scores --until 2025-06-01
+
+Rows hold the thread id, checkpoint id, last update time, status and the
+requested fields. Parquet output needs ``pyarrow`` installed.
+"""
+
+import argparse
+import asyncio
+import sys
+from contextlib import aclosing
+from datetime import datetime
+
+from core.export import (
+    COMPLETED,
+    DEFAULT_FIELDS,
+    IN_PROGRESS,
+    export_rows,
+    jsonl_line,
+    validate_fields,
+    write_parquet,
+)
+from core.utils import get_connection_pool
+
+
+async def _main(args: argparse.Namespace) -> None:
+    pool = await get_connection_pool()
+    try:
+        rows = export_rows(pool, args.fields, args.since, args.until, args.status)
+        async with aclosing(rows):
+            written = await write_rows(rows, args)
+        print(f"Exported {written} threads", file=sys.stderr)
+    finally:
+        await pool.close()
+
+
+async def write_rows(rows, args: argparse.Namespace) -> int:
+    if args.format == "parquet":
+        return await write_parquet(rows, args.fields, args.output, args.chunk_size)
+    written = 0
+    output = open(args.output, "w") if args.output != "-" else sys.stdout
+    try:
+        async for row in rows:
+            output.write(jsonl_line(row))
+            written += 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export interview results.")
+    parser.add_argument(
+        "--fields",
+        default=",".join(DEFAULT_FIELDS),
+        help="Comma separated state fields, or message_count.",
+    )
+    parser.add_argument("--since", type=datetime.fromisoformat)
+    parser.add_argument("--until", type=datetime.fromisoformat)
+    parser.add_argument("--status", choices=[COMPLETED, IN_PROGRESS])
+    parser.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+    parser.add_argument(
+        "--output", default="-", help="File to write; '-' is stdout for jsonl."
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=1000, help="Rows per Parquet row group."
+    )
+    args = parser.parse_args()
+    try:
+        args.fields = validate_fields(f for f in args.fields.split(",") if f)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.format == "parquet" and args.output == "-":
+        parser.error("--format parquet needs --output")
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
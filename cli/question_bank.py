@@ -0,0 +1,85 @@
+"""Warm, grow and inspect the coding question bank.
+
+Usage, from the repository root::
+
+    python -m cli.question_bank warm --skills python sql react --per-skill 6
+    python -m cli.question_bank grow --skills-file skills.txt --per-skill 4
+    python -m cli.question_bank stats
+
+``warm`` tops every skill up to ``--per-skill`` questions, ``grow`` adds
+``--per-skill`` new questions to every skill.
+"""
+
+import argparse
+import asyncio
+
+from core.question_bank import normalize_skill, question_bank
+from core.runnables import generate_new_coding_question
+from core.utils import get_connection_pool
+
+
+async def _fill(skill: str, target: int, semaphore: asyncio.Semaphore) -> int:
+    added = 0
+    # A question may come back twice; stop after a few empty rounds.
+    attempts = 0
+    while added < target and attempts < target * 2:
+        attempts += 1
+        # The bank's questions are excluded in the prompt, so every attempt
+        # asks for something new.
+        existing = await question_bank.questions(skill)
+        async with semaphore:
+            result = await generate_new_coding_question.ainvoke(
+                {"skills": skill, "existing_questions": "\n".join(existing)}
+            )
+        added += await question_bank.add(result.questions, [skill])
+    return added
+
+
+async def _main(args: argparse.Namespace) -> None:
+    pool = await get_connection_pool()
+    try:
+        await question_bank.attach(pool)
+        skills = list(args.skills or [])
+        if args.skills_file:
+            with open(args.skills_file) as f:
+                skills += [line.strip() for line in f if line.strip()]
+
+        if args.command == "stats":
+            for skill, count in (await question_bank.counts(skills or None)).items():
+                print(f"{skill}\t{count}")
+            return
+
+        existing = await question_bank.counts(skills)
+        semaphore = asyncio.Semaphore(args.concurrency)
+        targets = {}
+        for skill in dict.fromkeys(normalize_skill(skill) for skill in skills):
+            have = existing.get(skill, 0)
+            if args.command == "warm":
+                targets[skill] = max(args.per_skill - have, 0)
+            else:
+                targets[skill] = args.per_skill
+        added = await asyncio.gather(
+            *(_fill(skill, n, semaphore) for skill, n in targets.items() if n)
+        )
+        print(f"Added {sum(added)} questions for {len(added)} skills")
+    finally:
+        await pool.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage the coding question bank.")
+    parser.add_argument("command", choices=["warm", "grow", "stats"])
+    parser.add_argument("--skills", nargs="*", help="Skills to warm or grow.")
+    parser.add_argument("--skills-file", help="File with one skill per line.")
+    parser.add_argument(
+        "--per-skill",
+        type=int,
+        default=6,
+        help="warm: minimum questions per skill; grow: questions to add per skill.",
+    )
+    parser.add_argument("--concurrency", type=int, default=4)
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
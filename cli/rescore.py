@@ -0,0 +1,59 @@
+"""Re-score finished interviews with the current scoring prompts and models.
+
+Usage, from the repository root::
+
+    python -m cli.rescore run --run-id prompts-v2 --concurrency 8
+    python -m cli.rescore stats --run-id prompts-v2
+
+``run`` scores every completed interview not yet scored under ``--run-id``
+and writes the results to ``interview_rescores``; run it again with the same
+id to continue after an interruption. ``stats`` summarizes a run against the
+original scores.
+"""
+
+import argparse
+import asyncio
+import logging
+
+from core.documents import document_store
+from core.rescoring import rescore, rescore_stats
+from core.utils import get_checkpointer, get_connection_pool
+
+
+async def _main(args: argparse.Namespace) -> None:
+    pool = await get_connection_pool()
+    try:
+        if args.command == "stats":
+            for key, value in (await rescore_stats(pool, args.run_id)).items():
+                print(f"{key}\t{value}")
+            return
+
+        await document_store.attach(pool)
+        report = await rescore(
+            pool,
+            await get_checkpointer(pool),
+            args.run_id,
+            concurrency=args.concurrency,
+            limit=args.limit,
+        )
+        print(f"Scored: {report.scored}")
+        print(f"Failed: {report.failed}")
+        print(f"Throughput: {report.per_minute:.1f} interviews per minute")
+    finally:
+        await pool.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Re-score finished interviews.")
+    parser.add_argument("command", choices=["run", "stats"])
+    parser.add_argument(
+        "--run-id", required=True, help="Name of the run; reuse it to resume."
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--limit", type=int, help="Stop after this many interviews.")
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
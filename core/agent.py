@@ -1,109 +1,239 @@
-from typing import List
+import asyncio
+import logging
+import time
+from typing import Dict, List
 
-from fastapi import UploadFile
 from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.constants import TAG_NOSTREAM
 from langgraph.graph import END, START, MessagesState, StateGraph
 from langgraph.graph.state import CompiledStateGraph
 from langgraph.types import interrupt
 
 from core.runnables import (
+    MODEL_ROUTES,
     coding_question_assessment,
     experience_interviewer,
     generate_coding_question,
-    job_description_parser,
-    resume_breaker,
 )
-from core.utils import get_checkpointer, parse_link, parse_pdf
-from schemas.llm_responses import Experience, ExperienceInterviewScore, Project
+from core.config import env_bool, env_str
+from core.context import build_experience_context
+from core.documents import document_store
+from core.durability import with_durability
+from core.ingestion import ingestor
+from core.metrics import instrument_checkpointer, observe_node
+from core.parse_cache import parse_cache
+from core.parsing import break_resume, parse_job_description
+from core.question_bank import (
+    normalize_skill,
+    question_bank,
+    question_hash,
+    question_skills,
+)
+from schemas.llm_responses import (
+    Experience,
+    ExperienceInterviewScore,
+    JobDescription,
+    Project,
+    Resume,
+)
 
 
 class Interview(MessagesState):
     job_description: str
-    resume: str | UploadFile  # TODO: fix this error
+    resume: str
     experiences: List[Experience]
     projects: List[Project]
     skills: List[str]
     coding_interview_running: bool
     coding_questions: List[str]
     current_question_index: int
+    coding_answers: List[str]
     coding_scores: List[int]
     coding_interview_score: int
     experience_interview_score: int
-
-
+    experience_start_index: int
+    experience_summary: str
+    experience_summarized_until: int
+    stage_timings: Dict[str, float]
+    model_routes: Dict[str, dict]
+
+
+logger = logging.getLogger(__name__)
+
+
+async def _timed(stage: str, timings: Dict[str, float], awaitable):
+    start = time.perf_counter()
+    result = await awaitable
+    timings[stage] = round(time.perf_counter() - start, 3)
+    return result
+
+
+# Matches the number of questions generate_coding_question_prompt asks for.
+CODING_QUESTION_COUNT = 2
+
+
+async def select_coding_questions(skills: List[str]) -> List[str]:
+    """Take questions from the question bank, generating only what it lacks.
+
+    The LLM is asked only about the skills the bank's questions leave
+    uncovered, and its questions are added to the bank for later interviews.
+    Generated questions come after the bank's; their tokens are only
+    streamed when one of them is the first question the candidate sees.
+    """
+    questions, uncovered = await question_bank.select(skills, CODING_QUESTION_COUNT)
+    if len(questions) < CODING_QUESTION_COUNT:
+        llm_skills = [s for s in skills if normalize_skill(s) in uncovered] or skills
+        generated = await generate_coding_question.ainvoke(
+            {"skills": ", ".join(llm_skills)},
+            config={"tags": [TAG_NOSTREAM]} if questions else None,
+        )
+        for question in generated.questions:
+            # Questions that name none of the skills are not added to the bank.
+            if about := question_skills(question, llm_skills):
+                await question_bank.add([question], about)
+        seen = {question_hash(question) for question in questions}
+        for question in generated.questions:
+            if len(questions) == CODING_QUESTION_COUNT:
+                break
+            if question_hash(question) not in seen:
+                seen.add(question_hash(question))
+                questions.append(question)
+    return questions
+
+
+@observe_node
 async def parser_node(state: Interview):
     # TODO: give llm the entire ability to parse the resume and break it down
     # in whatever parts he feels suitable and then make decisions accordingly
-    resume = state["resume"]
+    # PDF uploads are converted to text before the graph runs.
+    resume_content = await document_store.resolve(state["resume"])
 
-    if isinstance(resume, UploadFile):
-        resume_content = await parse_pdf(resume)
-    else:
-        resume_content = resume
-
-    job_description = state["job_description"]
+    job_description = await document_store.resolve(state["job_description"])
     if job_description.startswith("https://"):
-        job_description = parse_link(job_description)
-
-    parsed_resume = await resume_breaker.ainvoke({"resume": resume_content})
-    parsed_job_description = await job_description_parser.ainvoke(
-        {"job_description": job_description}
+        job_description = await ingestor.fetch_text(job_description)
+
+    # Opt-in: start generating coding questions as soon as the skills are
+    # known instead of waiting for the job description parse to finish.
+    speculative = env_bool("SPECULATIVE_CODING_QUESTIONS")
+    timings: Dict[str, float] = {}
+    start = time.perf_counter()
+
+    async def parse_resume():
+        parsed_resume = await _timed(
+            "resume_breaker",
+            timings,
+            parse_cache.aget_or_parse(
+                "resume",
+                resume_content,
+                Resume,
+                lambda: break_resume(resume_content),
+            ),
+        )
+        coding_questions = None
+        if speculative:
+            coding_questions = await _timed(
+                "generate_coding_question",
+                timings,
+                select_coding_questions(parsed_resume.skills),
+            )
+        return parsed_resume, coding_questions
+
+    (parsed_resume, coding_questions), parsed_job_description = await asyncio.gather(
+        parse_resume(),
+        _timed(
+            "job_description_parser",
+            timings,
+            parse_cache.aget_or_parse(
+                "job_description",
+                job_description,
+                JobDescription,
+                lambda: parse_job_description(job_description),
+            ),
+        ),
     )
-    return {
+    timings["parser_node"] = round(time.perf_counter() - start, 3)
+    logger.info("parser_node stage timings (speculative=%s): %s", speculative, timings)
+
+    update = {
         "experiences": parsed_resume.experiences,
         "projects": parsed_resume.projects,
         "skills": parsed_resume.skills,
         "job_description": parsed_job_description.job_description,
         "coding_interview_running": False,
+        "stage_timings": timings,
+        "model_routes": MODEL_ROUTES,
     }
+    if coding_questions is not None:
+        update["coding_questions"] = coding_questions
+    return update
 
 
+@observe_node
 async def coding_interviewer_node(state: Interview):
     if not state["coding_interview_running"]:
-        skills = ", ".join(skill for skill in state["skills"])
-        coding_questions = await generate_coding_question.ainvoke({"skills": skills})
+        questions = state.get("coding_questions")
+        timings = dict(state.get("stage_timings") or {})
+        generation_time = 0.0
+        if not questions:
+            questions = await _timed(
+                "generate_coding_question",
+                timings,
+                select_coding_questions(state["skills"]),
+            )
+            generation_time = timings["generate_coding_question"]
+        # Time from the start of parsing until the first question is available.
+        timings["critical_path"] = round(
+            timings.get("parser_node", 0.0) + generation_time, 3
+        )
+        logger.info("First coding question ready, stage timings: %s", timings)
         return {
-            "messages": [AIMessage(content=coding_questions.questions[0])],
-            "coding_questions": coding_questions.questions,
+            "messages": [AIMessage(content=questions[0])],
+            "coding_questions": questions,
+            "stage_timings": timings,
             "current_question_index": 0,
+            "coding_answers": [],
             "coding_scores": [],
             "coding_interview_running": True,
         }
 
-    question = state["coding_questions"][state["current_question_index"]]
-    last_message = state["messages"][-1].content
-
-    score = await coding_question_assessment.ainvoke(
-        {"question": question, "response": last_message}
-    )
-
+    # Answers are only collected here so the next question goes out right
+    # away; all of them are scored together once the last one is in.
+    coding_answers = state.get("coding_answers", []) + [state["messages"][-1].content]
     next_index = state["current_question_index"] + 1
 
     if next_index < len(state["coding_questions"]):
         return {
             "messages": [AIMessage(content=state["coding_questions"][next_index])],
-            "coding_scores": state["coding_scores"] + [score.score],
+            "coding_answers": coding_answers,
             "current_question_index": next_index,
         }
-    else:
-        total_score = sum(state["coding_scores"])
-        return {
-            "coding_interview_score": total_score // len(state["coding_questions"]),
-        }
+
+    scores = await asyncio.gather(
+        *(
+            coding_question_assessment.ainvoke(
+                {"question": question, "response": answer}
+            )
+            for question, answer in zip(state["coding_questions"], coding_answers)
+        )
+    )
+    coding_scores = [score.score for score in scores]
+    return {
+        "coding_answers": coding_answers,
+        "coding_scores": coding_scores,
+        "coding_interview_score": sum(coding_scores) // len(coding_scores),
+        "coding_interview_running": False,
+        "experience_start_index": len(state["messages"]),
+    }
 
 
+@observe_node
 async def experience_interviewer_node(state: Interview):
-    response = await experience_interviewer.ainvoke(
-        {
-            "job_description": state["job_description"],
-            "experience": state["experiences"],
-            "projects": state["projects"],
-            "chat_history": state["messages"],
-        }
-    )
+    inputs, context_update = await build_experience_context(state)
+    response = await experience_interviewer.ainvoke(inputs)
     if isinstance(response.response, ExperienceInterviewScore):
-        return {"experience_interview_score": response.response.score}
-    return {"messages": [AIMessage(content=response.response)]}
+        return {"experience_interview_score": response.response.score, **context_update}
+    return {"messages": [AIMessage(content=response.response)], **context_update}
 
 
 def candidate_node(state: Interview):
@@ -138,7 +268,7 @@ def should_go_to_coding(state: Interview):
         return "experience_interviewer_node"
 
 
-async def get_interview_agent() -> CompiledStateGraph:
+def build_interview_graph() -> StateGraph:
     workflow = StateGraph(Interview)
 
     workflow.add_node("parser_node", parser_node)
@@ -163,6 +293,19 @@ async def get_interview_agent() -> CompiledStateGraph:
         ["coding_interviewer_node", "experience_interviewer_node"],
     )
 
-    checkpointer = await get_checkpointer()
+    return workflow
 
-    return workflow.compile(checkpointer=checkpointer)
+
+def get_interview_agent(
+    checkpointer: BaseCheckpointSaver, durability: str | None = None
+) -> CompiledStateGraph:
+    """Compile the interview graph. Meant to be called once per process.
+
+    ``durability`` (default ``CHECKPOINT_DURABILITY``, else ``sync``) is one of
+    the modes of :mod:`core.durability`.
+    """
+    checkpointer = with_durability(
+        instrument_checkpointer(checkpointer),
+        durability or env_str("CHECKPOINT_DURABILITY", "sync"),
+    )
+    return build_interview_graph().compile(checkpointer=checkpointer)
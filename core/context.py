@@ -0,0 +1,74 @@
+import logging
+from typing import Any
+
+from langchain_core.messages import BaseMessage
+from langchain_core.messages.utils import count_tokens_approximately, trim_messages
+
+from core.config import env_int
+from core.documents import document_store
+from core.prompts import expereince_interviewer_prompt
+from core.runnables import conversation_summarizer
+
+logger = logging.getLogger(__name__)
+
+
+async def build_experience_context(state: dict) -> tuple[dict[str, Any], dict]:
+    """Build the bounded prompt inputs for the experience interviewer.
+
+    Only the experience section of ``state["messages"]`` is considered. The
+    last ``EXPERIENCE_CONTEXT_MAX_EXCHANGES`` exchanges are sent verbatim;
+    older turns are folded into a rolling summary a few exchanges at a time,
+    and the verbatim window is trimmed to fit
+    ``EXPERIENCE_CONTEXT_TOKEN_BUDGET``.
+
+    Returns the prompt inputs and the state update for the summary fields.
+    """
+    max_exchanges = env_int("EXPERIENCE_CONTEXT_MAX_EXCHANGES", 4)
+    summary_batch = env_int("EXPERIENCE_CONTEXT_SUMMARY_BATCH", 2)
+    token_budget = env_int("EXPERIENCE_CONTEXT_TOKEN_BUDGET", 6000)
+
+    messages: list[BaseMessage] = state["messages"]
+    start = state.get("experience_start_index", 0)
+    summarized_until = max(state.get("experience_summarized_until", start), start)
+    summary = state.get("experience_summary", "")
+
+    window_start = len(messages) - 2 * max_exchanges
+    if window_start - summarized_until >= 2 * summary_batch:
+        result = await conversation_summarizer.ainvoke(
+            {
+                "summary": summary,
+                "messages": messages[summarized_until:window_start],
+            }
+        )
+        summary = result.summary
+        summarized_until = window_start
+
+    inputs = {
+        "job_description": await document_store.resolve(state["job_description"]),
+        "experience": state["experiences"],
+        "projects": state["projects"],
+        "conversation_summary": summary,
+        "chat_history": [],
+    }
+    fixed_tokens = count_tokens_approximately(
+        expereince_interviewer_prompt.invoke(inputs).to_messages()
+    )
+    chat_history = trim_messages(
+        messages[summarized_until:],
+        max_tokens=max(token_budget - fixed_tokens, 0),
+        token_counter=count_tokens_approximately,
+        strategy="last",
+    )
+    inputs["chat_history"] = chat_history
+
+    logger.info(
+        "Experience interviewer prompt: ~%d tokens (%d fixed, %d/%d messages)",
+        fixed_tokens + count_tokens_approximately(chat_history),
+        fixed_tokens,
+        len(chat_history),
+        len(messages),
+    )
+    return inputs, {
+        "experience_summary": summary,
+        "experience_summarized_until": summarized_until,
+    }
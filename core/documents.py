@@ -0,0 +1,120 @@
+"""Content-addressed store for the large documents an interview starts from.
+
+Resumes and job descriptions are stored once per distinct content in
+Postgres and the graph input carries a short ``doc:sha256:<hex>`` reference
+instead of the text, so the text is not copied into the checkpoint blobs and
+writes of every thread. ``parser_node`` resolves the reference.
+
+References are recorded per thread, so documents no longer referenced by
+any thread can be removed by checkpoint maintenance.
+"""
+
+import hashlib
+import logging
+from collections import OrderedDict
+
+import psycopg
+from psycopg_pool import AsyncConnectionPool
+
+from core.config import env_int
+
+logger = logging.getLogger(__name__)
+
+REF_PREFIX = "doc:sha256:"
+
+SETUP_SQL = """
+CREATE TABLE IF NOT EXISTS interview_documents (
+    hash TEXT PRIMARY KEY,
+    content TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE TABLE IF NOT EXISTS interview_document_refs (
+    thread_id TEXT NOT NULL,
+    hash TEXT NOT NULL REFERENCES interview_documents (hash) ON DELETE CASCADE,
+    PRIMARY KEY (thread_id, hash)
+);
+CREATE INDEX IF NOT EXISTS interview_document_refs_hash_idx
+    ON interview_document_refs (hash);
+"""
+
+INSERT_SQL = """
+INSERT INTO interview_documents (hash, content) VALUES (%s, %s)
+ON CONFLICT (hash) DO NOTHING
+"""
+
+INSERT_REF_SQL = """
+INSERT INTO interview_document_refs (thread_id, hash) VALUES (%s, %s)
+ON CONFLICT DO NOTHING
+"""
+
+SELECT_SQL = "SELECT content FROM interview_documents WHERE hash = %s"
+
+
+class DocumentStore:
+    """Store documents by content hash and resolve references to them.
+
+    Until :meth:`attach` is called, and for documents shorter than
+    ``min_size`` characters, :meth:`put` returns the text itself, which
+    :meth:`resolve` passes through unchanged.
+    """
+
+    def __init__(self, min_size: int = 1024, max_cached: int = 256):
+        self.min_size = min_size
+        self.max_cached = max_cached
+        self.pool: AsyncConnectionPool | None = None
+        self._cache: OrderedDict[str, str] = OrderedDict()
+
+    async def attach(self, pool: AsyncConnectionPool) -> None:
+        async with pool.connection() as conn:
+            await conn.execute(SETUP_SQL, prepare=False)
+        self.pool = pool
+
+    async def put(self, text: str, thread_id: str) -> str:
+        """Store ``text`` for ``thread_id`` and return its reference."""
+        if self.pool is None or len(text) < self.min_size:
+            return text
+        digest = hashlib.sha256(text.encode()).hexdigest()
+        try:
+            async with self.pool.connection() as conn:
+                async with conn.transaction():
+                    await conn.execute(INSERT_SQL, (digest, text))
+                    await conn.execute(INSERT_REF_SQL, (thread_id, digest))
+        except psycopg.Error:
+            logger.warning("Failed to store document, keeping it inline", exc_info=True)
+            return text
+        self._remember(digest, text)
+        return REF_PREFIX + digest
+
+    async def put_many(self, thread_id: str, **texts: str) -> dict[str, str]:
+        """:meth:`put` every keyword argument, returning the references."""
+        return {key: await self.put(text, thread_id) for key, text in texts.items()}
+
+    async def resolve(self, value: str) -> str:
+        """The text of a reference; any other value is returned as is."""
+        if not isinstance(value, str) or not value.startswith(REF_PREFIX):
+            return value
+        digest = value[len(REF_PREFIX) :]
+        if digest in self._cache:
+            self._cache.move_to_end(digest)
+            return self._cache[digest]
+        if self.pool is None:
+            raise LookupError(f"Document store is not attached: {value}")
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute(SELECT_SQL, (digest,))
+            row = await cursor.fetchone()
+        if row is None:
+            raise LookupError(f"Unknown document: {value}")
+        self._remember(digest, row[0])
+        return row[0]
+
+    def _remember(self, digest: str, text: str) -> None:
+        self._cache[digest] = text
+        self._cache.move_to_end(digest)
+        while len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+
+
+document_store = DocumentStore(
+    min_size=env_int("DOCUMENT_STORE_MIN_SIZE", 1024),
+    max_cached=env_int("DOCUMENT_STORE_MAX_CACHED", 256),
+)
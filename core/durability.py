@@ -0,0 +1,253 @@
+"""When checkpoints of an agent run reach the checkpointer.
+
+A candidate turn runs ``candidate_node``, an interviewer node and stops at
+the next ``interrupt``, and every super-step writes a checkpoint and the
+writes of its tasks. ``CHECKPOINT_DURABILITY`` selects how much of that is
+persisted and when:
+
+``sync``
+    Every checkpoint and write is persisted before the run finishes (the
+    checkpointer is used as is). After a crash the thread continues from the
+    last super-step that completed.
+``async``
+    The same checkpoints and writes, but persisted in the background, in
+    order per thread, so a turn's response does not wait for them. A crash
+    can lose the steps of the last turn whose writes were still in flight:
+    the client may have seen a question the thread does not remember, and
+    the thread continues from an earlier step.
+``exit``
+    Only the state at the end of a run (the interrupt waiting for the next
+    answer, or the end of the interview) is persisted, as one checkpoint
+    plus the writes pending on it. A crash during a turn loses the whole
+    turn, so the answer has to be sent again, and the thread's history has
+    one checkpoint per turn instead of one per super-step.
+
+In the last two modes reads of a thread through the same checkpointer wait
+for the writes already queued for it, so a process always sees its own
+persisted writes; other processes see them once they are written. Reads do
+not persist what an ``exit`` run still holds back: until the run ends they
+see the state it started from. :mod:`service.streaming` calls
+:func:`end_run` after every run, and the service calls
+:func:`flush_checkpoints` at shutdown.
+"""
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator, Awaitable, Callable, Sequence
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+
+logger = logging.getLogger(__name__)
+
+SYNC = "sync"
+ASYNC = "async"
+EXIT = "exit"
+MODES = (SYNC, ASYNC, EXIT)
+
+
+class _RunBuffer:
+    """The newest checkpoint of a run and the writes pending on it."""
+
+    def __init__(self, config: RunnableConfig):
+        # Config of the first buffered put, whose parent is the last
+        # persisted checkpoint.
+        self.config = config
+        self.checkpoint: Checkpoint | None = None
+        self.metadata: CheckpointMetadata | None = None
+        self.channels: set[str] = set()
+        self.writes: list[tuple[RunnableConfig, Sequence, str, str]] = []
+
+
+class DeferredCheckpointer(BaseCheckpointSaver):
+    """Wrap a checkpointer to persist in the background (``async``) or only
+    at the end of each run (``exit``)."""
+
+    def __init__(self, saver: BaseCheckpointSaver, mode: str):
+        if mode not in (ASYNC, EXIT):
+            raise ValueError(f"Unsupported checkpoint durability: {mode}")
+        super().__init__(serde=saver.serde)
+        self.saver = saver
+        self.mode = mode
+        self._buffers: dict[tuple[str, str], _RunBuffer] = {}
+        self._pending: dict[str, asyncio.Task] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.saver, name)
+
+    @property
+    def config_specs(self):
+        return self.saver.config_specs
+
+    def get_next_version(self, current, channel):
+        return self.saver.get_next_version(current, channel)
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        await self.await_queued(config["configurable"]["thread_id"])
+        return await self.saver.aget_tuple(config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        await self.await_queued(config["configurable"]["thread_id"] if config else None)
+        async for item in self.saver.alist(
+            config, filter=filter, before=before, limit=limit
+        ):
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        if self.mode == ASYNC:
+            self._enqueue(
+                thread_id,
+                lambda: self.saver.aput(config, checkpoint, metadata, new_versions),
+            )
+        else:
+            buffer = self._buffers.setdefault(
+                (thread_id, checkpoint_ns), _RunBuffer(config)
+            )
+            buffer.checkpoint = checkpoint
+            buffer.metadata = metadata
+            buffer.channels.update(new_versions)
+            # Writes of the previous step are part of this checkpoint now.
+            buffer.writes.clear()
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        if self.mode == ASYNC:
+            self._enqueue(
+                thread_id,
+                lambda: self.saver.aput_writes(config, writes, task_id, task_path),
+            )
+            return
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        buffer = self._buffers.setdefault(
+            (thread_id, checkpoint_ns), _RunBuffer(config)
+        )
+        buffer.writes.append((config, writes, task_id, task_path))
+
+    async def aflush(self, thread_id: str | None = None) -> None:
+        """Persist the buffered state of ``thread_id`` (or of every thread)
+        and wait for its pending writes."""
+        for key in list(self._buffers):
+            if thread_id is None or key[0] == thread_id:
+                buffer = self._buffers.pop(key)
+                self._enqueue(key[0], lambda buffer=buffer: self._put_buffer(buffer))
+        await self.await_queued(thread_id)
+
+    async def await_queued(self, thread_id: str | None = None) -> None:
+        """Wait for the writes queued for ``thread_id`` (or every thread),
+        leaving the state buffered by running ``exit`` runs alone."""
+        if thread_id is None:
+            tasks = list(self._pending.values())
+        else:
+            tasks = [self._pending[thread_id]] if thread_id in self._pending else []
+        if tasks:
+            await asyncio.wait(tasks)
+
+    async def _put_buffer(self, buffer: _RunBuffer) -> None:
+        config = buffer.config
+        if buffer.checkpoint is not None:
+            # Channels updated by any buffered step, at their final version.
+            versions = buffer.checkpoint["channel_versions"]
+            config = await self.saver.aput(
+                buffer.config,
+                buffer.checkpoint,
+                buffer.metadata,
+                {channel: versions[channel] for channel in buffer.channels},
+            )
+        for write_config, writes, task_id, task_path in buffer.writes:
+            await self.saver.aput_writes(
+                {**write_config, "configurable": {**config["configurable"]}},
+                writes,
+                task_id,
+                task_path,
+            )
+
+    def _enqueue(self, thread_id: str, write: Callable[[], Awaitable]) -> None:
+        """Run ``write`` after the writes already queued for the thread."""
+        task = asyncio.create_task(
+            self._write_after(self._pending.get(thread_id), write)
+        )
+        self._pending[thread_id] = task
+
+        def done(task: asyncio.Task) -> None:
+            if self._pending.get(thread_id) is task:
+                del self._pending[thread_id]
+
+        task.add_done_callback(done)
+
+    async def _write_after(
+        self, previous: asyncio.Task | None, write: Callable[[], Awaitable]
+    ) -> None:
+        if previous is not None:
+            await asyncio.wait([previous])
+        try:
+            await write()
+        except Exception:
+            logger.warning("Failed to persist a deferred checkpoint", exc_info=True)
+
+
+def with_durability(saver: BaseCheckpointSaver, mode: str) -> BaseCheckpointSaver:
+    """``saver`` as is for ``sync``, wrapped for the other modes."""
+    if mode == SYNC:
+        return saver
+    return DeferredCheckpointer(saver, mode)
+
+
+async def end_run(checkpointer: BaseCheckpointSaver | None, thread_id: str) -> None:
+    """Called when a run of ``thread_id`` stops: with ``exit`` durability this
+    persists the run and waits for it, the other modes have nothing to do."""
+    if isinstance(checkpointer, DeferredCheckpointer) and checkpointer.mode == EXIT:
+        await checkpointer.aflush(thread_id)
+
+
+async def wait_for_writes(
+    checkpointer: BaseCheckpointSaver | None, thread_id: str
+) -> None:
+    """Wait until the writes queued for ``thread_id`` are persisted, for
+    reads; unlike :func:`flush_checkpoints` it does not persist a run that
+    is still going."""
+    if isinstance(checkpointer, DeferredCheckpointer):
+        await checkpointer.await_queued(thread_id)
+
+
+async def flush_checkpoints(
+    checkpointer: BaseCheckpointSaver | None, thread_id: str | None = None
+) -> None:
+    """Persist what a deferred checkpointer holds back for ``thread_id``, or
+    for every thread (e.g. at shutdown); a no-op for other checkpointers."""
+    if isinstance(checkpointer, DeferredCheckpointer):
+        await checkpointer.aflush(thread_id)
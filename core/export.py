@@ -0,0 +1,188 @@
+"""Bulk export of interview results straight from the checkpoint tables.
+
+The latest checkpoint of every thread is read through a server-side cursor,
+``EXPORT_BATCH_SIZE`` rows at a time, and only the blobs of the requested
+channels are fetched and deserialized, so exporting all interviews takes
+bounded memory and never loads resumes or transcripts that were not asked
+for. ``message_count`` is derived from the ``messages`` channel.
+
+Rows are written as JSON lines, or as Parquet when ``pyarrow`` is
+installed. Used by ``GET /export`` and ``python -m cli.export``.
+"""
+
+import json
+from collections.abc import AsyncIterator, Iterable
+from datetime import datetime
+from typing import Any, BinaryIO
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from psycopg_pool import AsyncConnectionPool
+from pydantic_core import to_jsonable_python
+
+from core.agent import Interview
+from core.config import env_int
+
+COMPLETED = "completed"
+IN_PROGRESS = "in_progress"
+
+DEFAULT_FIELDS = [
+    "skills",
+    "coding_scores",
+    "coding_interview_score",
+    "experience_interview_score",
+    "message_count",
+]
+
+# Columns every row has, besides the requested fields.
+BASE_COLUMNS = ["thread_id", "checkpoint_id", "updated_at", "status"]
+
+# The checkpoint timestamp is the time of the thread's last step.
+EXPORT_SQL = """
+SELECT
+    latest.thread_id,
+    latest.checkpoint_id,
+    (latest.checkpoint ->> 'ts')::timestamptz AS updated_at,
+    latest.checkpoint -> 'channel_versions' ? 'experience_interview_score',
+    (
+        SELECT array_agg(array[bl.channel::bytea, bl.type::bytea, bl.blob])
+        FROM jsonb_each_text(latest.checkpoint -> 'channel_versions') v
+        JOIN checkpoint_blobs bl
+            ON bl.thread_id = latest.thread_id
+            AND bl.checkpoint_ns = ''
+            AND bl.channel = v.key
+            AND bl.version = v.value
+        WHERE v.key = ANY(%(channels)s)
+    )
+FROM (
+    SELECT DISTINCT ON (thread_id) thread_id, checkpoint_id, checkpoint
+    FROM checkpoints
+    WHERE checkpoint_ns = ''
+    ORDER BY thread_id, checkpoint_id DESC
+) latest
+WHERE {conditions}
+"""
+
+serde = JsonPlusSerializer()
+
+
+def validate_fields(fields: Iterable[str]) -> list[str]:
+    """The requested fields, or :class:`ValueError` naming unknown ones."""
+    fields = list(dict.fromkeys(fields))
+    unknown = sorted(set(fields) - set(Interview.__annotations__) - {"message_count"})
+    if unknown:
+        raise ValueError(f"Unknown export fields: {', '.join(unknown)}")
+    return fields
+
+
+async def export_rows(
+    pool: AsyncConnectionPool,
+    fields: list[str],
+    since: datetime | None = None,
+    until: datetime | None = None,
+    status: str | None = None,
+) -> AsyncIterator[dict[str, Any]]:
+    """Yield one row per thread updated in ``[since, until)`` with ``status``
+    (``completed``, ``in_progress`` or ``None`` for both)."""
+    channels = ["messages" if field == "message_count" else field for field in fields]
+    conditions = ["TRUE"]
+    if since is not None:
+        conditions.append("(latest.checkpoint ->> 'ts')::timestamptz >= %(since)s")
+    if until is not None:
+        conditions.append("(latest.checkpoint ->> 'ts')::timestamptz < %(until)s")
+    if status is not None:
+        completed = (
+            "latest.checkpoint -> 'channel_versions' ? 'experience_interview_score'"
+        )
+        conditions.append(completed if status == COMPLETED else f"NOT {completed}")
+    query = EXPORT_SQL.format(conditions=" AND ".join(conditions))
+
+    async with pool.connection() as conn:
+        # Named cursors only live inside a transaction.
+        async with conn.transaction():
+            async with conn.cursor(name="interview_export") as cursor:
+                cursor.itersize = env_int("EXPORT_BATCH_SIZE", 500)
+                await cursor.execute(
+                    query, {"channels": channels, "since": since, "until": until}
+                )
+                async for thread_id, checkpoint_id, updated_at, done, blobs in cursor:
+                    values = {
+                        channel.decode(): serde.loads_typed((type_.decode(), blob))
+                        for channel, type_, blob in blobs or []
+                        if type_.decode() != "empty"
+                    }
+                    row = {
+                        "thread_id": thread_id,
+                        "checkpoint_id": checkpoint_id,
+                        "updated_at": updated_at,
+                        "status": COMPLETED if done else IN_PROGRESS,
+                    }
+                    for field in fields:
+                        if field == "message_count":
+                            row[field] = len(values.get("messages", []))
+                        else:
+                            row[field] = to_jsonable_python(values.get(field))
+                    yield row
+
+
+def jsonl_line(row: dict[str, Any]) -> str:
+    return json.dumps(row, default=to_jsonable_python) + "\n"
+
+
+async def write_parquet(
+    rows: AsyncIterator[dict[str, Any]],
+    fields: list[str],
+    output: str | BinaryIO,
+    chunk_size: int = 1000,
+) -> int:
+    """Write ``rows`` to ``output`` one row group per ``chunk_size`` rows;
+    returns the number of rows written."""
+    # Imported here so the service does not load pyarrow for JSON exports.
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow installed")
+    # Types of the common fields; any other field is stored as JSON text.
+    types = {
+        "thread_id": pa.string(),
+        "checkpoint_id": pa.string(),
+        "updated_at": pa.timestamp("us", tz="UTC"),
+        "status": pa.string(),
+        "skills": pa.list_(pa.string()),
+        "coding_scores": pa.list_(pa.int64()),
+        "coding_interview_score": pa.int64(),
+        "experience_interview_score": pa.int64(),
+        "message_count": pa.int64(),
+    }
+    columns = BASE_COLUMNS + fields
+    schema = pa.schema([(column, types.get(column, pa.string())) for column in columns])
+
+    def to_table(chunk: list[dict[str, Any]]) -> "pa.Table":
+        return pa.Table.from_pylist(
+            [
+                {
+                    column: (
+                        row[column]
+                        if column in types or row[column] is None
+                        else json.dumps(row[column])
+                    )
+                    for column in columns
+                }
+                for row in chunk
+            ],
+            schema=schema,
+        )
+
+    written = 0
+    chunk: list[dict[str, Any]] = []
+    with pq.ParquetWriter(output, schema) as writer:
+        async for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                writer.write_table(to_table(chunk))
+                written += len(chunk)
+                chunk = []
+        if chunk:
+            writer.write_table(to_table(chunk))
+            written += len(chunk)
+    return written
@@ -0,0 +1,231 @@
+"""Offline stand-in for ``ChatGroq``, selected with ``LLM_BACKEND=fake``.
+
+:class:`FakeChatModel` answers every structured-output call with a payload
+that validates against the bound schema, streams it as tool call chunks like
+the real model does and waits according to a configurable latency model.
+This lets the service be load tested without network access and isolates
+its own overhead (graph execution, checkpointing, SSE) from provider latency.
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import time
+from collections.abc import AsyncIterator, Iterator, Sequence
+from typing import Any
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.messages.utils import (
+    count_tokens_approximately,
+    message_chunk_to_message,
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from core.config import env_float, env_int
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model returning schema-valid tool calls after a simulated delay.
+
+    Time to first token is drawn from a log-normal distribution with median
+    ``ttft_ms`` and shape ``ttft_sigma`` (0 makes it constant), plus
+    ``prefill_ms_per_1k_tokens`` per thousand prompt tokens; every further
+    chunk of ``chunk_chars`` characters takes ``chunk_ms``. Payloads are
+    derived from the prompt, so the same prompt always gets the same answer.
+
+    The experience interviewer asks ``experience_questions`` questions and
+    then returns a score, so fake interviews run to completion.
+    """
+
+    model: str = "fake"
+    ttft_ms: float = 300.0
+    ttft_sigma: float = 0.5
+    prefill_ms_per_1k_tokens: float = 0.0
+    chunk_ms: float = 5.0
+    chunk_chars: int = 16
+    experience_questions: int = 3
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return {"model": self.model}
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> Runnable:
+        kwargs.pop("tool_choice", None)
+        return self.bind(
+            tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs
+        )
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        chunks = list(self._stream(messages, stop, **kwargs))
+        return self._result(chunks)
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        chunks = [c async for c in self._astream(messages, stop, **kwargs)]
+        return self._result(chunks)
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        for delay, chunk in self._chunks(messages, kwargs.get("tools")):
+            time.sleep(delay)
+            if run_manager:
+                run_manager.on_llm_new_token("", chunk=chunk)
+            yield chunk
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        for delay, chunk in self._chunks(messages, kwargs.get("tools")):
+            await asyncio.sleep(delay)
+            if run_manager:
+                await run_manager.on_llm_new_token("", chunk=chunk)
+            yield chunk
+
+    def _chunks(
+        self, messages: list[BaseMessage], tools: list[dict] | None
+    ) -> Iterator[tuple[float, ChatGenerationChunk]]:
+        digest = hashlib.sha256(
+            json.dumps([m.model_dump() for m in messages], default=str).encode()
+        ).digest()
+        rng = random.Random(digest)
+        input_tokens = count_tokens_approximately(messages)
+        delay = (
+            self.ttft_ms * rng.lognormvariate(0, self.ttft_sigma)
+            + self.prefill_ms_per_1k_tokens * input_tokens / 1000
+        ) / 1000
+
+        if not tools:
+            text = "This is a response from the fake chat model."
+            pieces = [
+                {"content": text[i : i + self.chunk_chars]}
+                for i in range(0, len(text), self.chunk_chars)
+            ]
+        else:
+            function = tools[0]["function"]
+            args = json.dumps(self._payload(function, messages, rng))
+            pieces = [
+                {
+                    "content": "",
+                    "tool_call_chunks": [
+                        {
+                            "name": function["name"] if i == 0 else None,
+                            "args": args[i : i + self.chunk_chars],
+                            "id": "call_fake" if i == 0 else None,
+                            "index": 0,
+                        }
+                    ],
+                }
+                for i in range(0, len(args), self.chunk_chars)
+            ]
+            text = args
+
+        for i, piece in enumerate(pieces):
+            if i == len(pieces) - 1:
+                output_tokens = max(len(text) // 4, 1)
+                piece["usage_metadata"] = {
+                    "input_tokens": input_tokens,
+                    "output_tokens": output_tokens,
+                    "total_tokens": input_tokens + output_tokens,
+                }
+                piece["response_metadata"] = {"model_name": self.model}
+            yield delay, ChatGenerationChunk(message=AIMessageChunk(**piece))
+            delay = self.chunk_ms / 1000
+
+    def _payload(
+        self, function: dict, messages: list[BaseMessage], rng: random.Random
+    ) -> dict:
+        name = function["name"]
+        if name == "ExperienceInterviewQuestion":
+            asked = sum(isinstance(m, AIMessage) for m in messages)
+            if asked >= self.experience_questions:
+                return {"response": {"score": rng.randint(1, 10)}}
+            return {
+                "response": f"Tell me more about your experience, question {asked + 1}."
+            }
+        return _fake_value(function["parameters"], name, rng)
+
+    @staticmethod
+    def _result(chunks: list[ChatGenerationChunk]) -> ChatResult:
+        message = chunks[0].message
+        for chunk in chunks[1:]:
+            message += chunk.message
+        return ChatResult(
+            generations=[ChatGeneration(message=message_chunk_to_message(message))]
+        )
+
+
+_WORDS = (
+    "design implement service latency cache queue database index python "
+    "api scale test deploy debug optimize stream model data pipeline team"
+).split()
+
+
+def _fake_value(schema: dict, name: str, rng: random.Random) -> Any:
+    """A value matching the JSON ``schema`` of a tool argument."""
+    if "anyOf" in schema:
+        return _fake_value(schema["anyOf"][0], name, rng)
+    kind = schema.get("type")
+    if kind == "object":
+        return {
+            key: _fake_value(value, key, rng)
+            for key, value in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        return [
+            _fake_value(schema.get("items", {}), f"{name} {i + 1}", rng)
+            for i in range(2)
+        ]
+    if kind == "integer":
+        return rng.randint(1, 10)
+    if kind == "number":
+        return round(rng.uniform(1, 10), 2)
+    if kind == "boolean":
+        return rng.random() < 0.5
+    words = rng.choices(_WORDS, k=rng.randint(8, 40))
+    return f"{name.replace('_', ' ').capitalize()}: {' '.join(words)}."
+
+
+def fake_chat_model(model: str, **kwargs: Any) -> FakeChatModel:
+    """A :class:`FakeChatModel` configured from ``LLM_FAKE_*`` variables."""
+    return FakeChatModel(
+        model=model,
+        ttft_ms=env_float("LLM_FAKE_TTFT_MS", 300.0),
+        ttft_sigma=env_float("LLM_FAKE_TTFT_SIGMA", 0.5),
+        prefill_ms_per_1k_tokens=env_float("LLM_FAKE_PREFILL_MS_PER_1K_TOKENS", 0.0),
+        chunk_ms=env_float("LLM_FAKE_CHUNK_MS", 5.0),
+        chunk_chars=env_int("LLM_FAKE_CHUNK_CHARS", 16),
+        experience_questions=env_int("LLM_FAKE_EXPERIENCE_QUESTIONS", 3),
+        **kwargs,
+    )
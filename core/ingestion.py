@@ -0,0 +1,200 @@
+"""Text extraction for resumes and job descriptions off the event loop.
+
+PDF pages are extracted by PyMuPDF in a process pool, ``INGEST_PAGES_PER_TASK``
+pages per task, so a large resume neither blocks the event loop nor holds
+the GIL for the other live interviews of the worker. Job description URLs
+are fetched with a shared async HTTP client (connection reuse, timeouts and
+a size cap) and the extracted text is kept in a small TTL cache, so the same
+posting opened by many candidates is fetched once.
+
+``INGEST_WORKERS=0`` runs the extraction in threads instead of processes.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor
+from html.parser import HTMLParser
+
+import httpx
+
+from core.config import env_float, env_int, env_str
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentTooLarge(ValueError):
+    """An upload or a fetched page is over its size limit."""
+
+
+def _pdf_pages(content: bytes, start: int, stop: int) -> tuple[int, str]:
+    """Page count of the PDF and the text of its pages ``[start, stop)``."""
+    # Imported here: PyMuPDF is only needed in the worker processes.
+    import fitz
+
+    with fitz.open(stream=content, filetype="pdf") as pdf:
+        text = " ".join(
+            pdf[page].get_text("text")
+            for page in range(start, min(stop, pdf.page_count))
+        )
+        return pdf.page_count, text
+
+
+class _TextExtractor(HTMLParser):
+    # Elements whose content is not part of the readable page.
+    SKIPPED = {"script", "style", "noscript", "template", "svg"}
+    # Elements that start a new line, so sections stay apart in the text.
+    BLOCKS = {
+        "address", "article", "br", "dd", "div", "dl", "dt", "footer", "h1",
+        "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "nav", "ol",
+        "p", "section", "table", "td", "th", "tr", "ul",
+    }  # fmt: skip
+
+    def __init__(self):
+        super().__init__()
+        self.parts: list[str] = []
+        self._skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIPPED:
+            self._skipping += 1
+        elif tag in self.BLOCKS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIPPED and self._skipping:
+            self._skipping -= 1
+        elif tag in self.BLOCKS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skipping:
+            self.parts.append(data)
+
+
+def _html_text(html: str) -> str:
+    """Readable text of a page, one line per block element."""
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    lines = (" ".join(line.split()) for line in "".join(parser.parts).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+class Ingestor:
+    """Extract the text of PDFs and web pages without blocking the loop.
+
+    The process pool and the HTTP client are created on first use and
+    released by :meth:`close`.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        pages_per_task: int = 8,
+        fetch_timeout: float = 10.0,
+        fetch_max_bytes: int = 5 * 1024 * 1024,
+        fetch_cache_size: int = 128,
+        fetch_cache_ttl: float = 600.0,
+    ):
+        self.workers = workers
+        self.pages_per_task = max(pages_per_task, 1)
+        self.fetch_timeout = fetch_timeout
+        self.fetch_max_bytes = fetch_max_bytes
+        self.fetch_cache_size = fetch_cache_size
+        self.fetch_cache_ttl = fetch_cache_ttl
+        self._executor: Executor | None = None
+        self._client: httpx.AsyncClient | None = None
+        self._cache: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    async def _run(self, fn: Callable, *args):
+        if self.workers <= 0:
+            return await asyncio.to_thread(fn, *args)
+        if self._executor is None:
+            # Forking a process that runs an event loop and a connection pool
+            # is unsafe; workers are started from a clean server process.
+            self._executor = ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context("forkserver")
+            )
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, fn, *args
+        )
+
+    async def pdf_text(self, content: bytes) -> str:
+        """The text of every page of a PDF, extracted page-parallel."""
+        step = self.pages_per_task
+        # The first task also reports the page count the rest is split by.
+        page_count, first = await self._run(_pdf_pages, content, 0, step)
+        rest = await asyncio.gather(
+            *(
+                self._run(_pdf_pages, content, start, start + step)
+                for start in range(step, page_count, step)
+            )
+        )
+        return " ".join([first, *(text for _, text in rest)])
+
+    def _client_for_fetch(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.fetch_timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+                headers={"User-Agent": env_str("USER_AGENT", "interviewer")},
+            )
+        return self._client
+
+    async def fetch_text(self, url: str) -> str:
+        """The readable text of the page at ``url``; HTML is stripped of
+        markup and a linked PDF is extracted like an upload."""
+        cached = self._cache.get(url)
+        if cached is not None and cached[0] > time.monotonic():
+            self._cache.move_to_end(url)
+            return cached[1]
+
+        async with self._client_for_fetch().stream("GET", url) as response:
+            response.raise_for_status()
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body.extend(chunk)
+                if len(body) > self.fetch_max_bytes:
+                    raise DocumentTooLarge(
+                        f"{url} is larger than {self.fetch_max_bytes} bytes"
+                    )
+            content_type = response.headers.get("content-type", "")
+            encoding = response.encoding or "utf-8"
+
+        if "pdf" in content_type:
+            text = await self.pdf_text(bytes(body))
+        elif "html" in content_type or not content_type:
+            text = await self._run(_html_text, body.decode(encoding, "replace"))
+        else:
+            text = body.decode(encoding, "replace")
+
+        if self.fetch_cache_size > 0:
+            self._cache[url] = (time.monotonic() + self.fetch_cache_ttl, text)
+            self._cache.move_to_end(url)
+            while len(self._cache) > self.fetch_cache_size:
+                self._cache.popitem(last=False)
+        return text
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+ingestor = Ingestor(
+    workers=env_int("INGEST_WORKERS", min(4, os.cpu_count() or 1)),
+    pages_per_task=env_int("INGEST_PAGES_PER_TASK", 8),
+    fetch_timeout=env_float("INGEST_FETCH_TIMEOUT_SECONDS", 10.0),
+    fetch_max_bytes=env_int("INGEST_FETCH_MAX_BYTES", 5 * 1024 * 1024),
+    fetch_cache_size=env_int("INGEST_FETCH_CACHE_SIZE", 128),
+    fetch_cache_ttl=env_float("INGEST_FETCH_CACHE_TTL_SECONDS", 600.0),
+)
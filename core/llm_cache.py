@@ -0,0 +1,225 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration
+
+from core.config import env_int, env_str
+
+logger = logging.getLogger(__name__)
+
+SETUP_SQL = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    latency REAL NOT NULL,
+    created_at REAL NOT NULL
+)
+"""
+
+SELECT_SQL = "SELECT value, latency FROM llm_cache WHERE key = ? AND created_at > ?"
+
+UPSERT_SQL = "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?)"
+
+PRUNE_SQL = "DELETE FROM llm_cache WHERE created_at <= ?"
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    # llm_string covers the model, its parameters and the bound schema tool.
+    return hashlib.sha256(f"{prompt}\0{llm_string}".encode()).hexdigest()
+
+
+class LLMCache(BaseCache):
+    """Two-tier LLM response cache keyed by the rendered prompt and model.
+
+    The first tier is an in-process LRU, the second a SQLite file at
+    ``path`` (disabled when empty). Entries expire after ``ttl`` seconds in
+    both. The cache is enabled per chain by passing it as the chat model's
+    ``cache``, see :func:`core.runnables.structured_llm`.
+
+    The latency of each cached call is stored with it, so hits also report
+    the time they saved.
+    """
+
+    def __init__(
+        self,
+        path: str | None = ".cache/llm_cache.sqlite",
+        max_entries: int = 1024,
+        ttl: int = 24 * 3600,
+        prune_every: int = 100,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.prune_every = prune_every
+        self._memory: OrderedDict[str, tuple[float, str, float]] = OrderedDict()
+        # Start time of calls that missed, to measure their latency.
+        self._pending: OrderedDict[str, float] = OrderedDict()
+        self._connection: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+    def lookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        key = cache_key(prompt, llm_string)
+        entry = self._get_memory(key)
+        if entry is None:
+            entry = self._from_disk(key, self._get_disk(key))
+        return self._hit(key, entry)
+
+    async def alookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        key = cache_key(prompt, llm_string)
+        entry = self._get_memory(key)
+        if entry is None and self.path:
+            entry = self._from_disk(key, await asyncio.to_thread(self._get_disk, key))
+        return self._hit(key, entry)
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key, value, latency = self._entry(prompt, llm_string, return_val)
+        self._set_disk(key, value, latency)
+
+    async def aupdate(
+        self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE
+    ) -> None:
+        key, value, latency = self._entry(prompt, llm_string, return_val)
+        if self.path:
+            await asyncio.to_thread(self._set_disk, key, value, latency)
+
+    def clear(self, **kwargs: Any) -> None:
+        self._memory.clear()
+        if self.path:
+            with self._lock:
+                self._connect().execute("DELETE FROM llm_cache")
+
+    def stats(self) -> dict:
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+            "saved_seconds": round(self.saved_seconds, 3),
+            "memory_entries": len(self._memory),
+        }
+
+    def _hit(self, key: str, entry: tuple[str, float] | None) -> RETURN_VAL_TYPE | None:
+        if entry is None:
+            self.misses += 1
+            self._pending[key] = time.monotonic()
+            while len(self._pending) > self.max_entries:
+                self._pending.popitem(last=False)
+            return None
+        value, latency = entry
+        self.saved_seconds += latency
+        # Every hit gets fresh objects since callers may mutate the messages.
+        return [
+            ChatGeneration(
+                message=messages_from_dict([item["message"]])[0],
+                generation_info=item["generation_info"],
+            )
+            for item in json.loads(value)
+        ]
+
+    def _entry(
+        self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE
+    ) -> tuple[str, str, float]:
+        key = cache_key(prompt, llm_string)
+        started = self._pending.pop(key, None)
+        latency = time.monotonic() - started if started is not None else 0.0
+        value = json.dumps(
+            [
+                {
+                    "message": message_to_dict(generation.message),
+                    "generation_info": generation.generation_info,
+                }
+                for generation in return_val
+            ]
+        )
+        self._remember(key, value, latency)
+        return key, value, latency
+
+    def _remember(self, key: str, value: str, latency: float) -> None:
+        self._memory[key] = (time.monotonic() + self.ttl, value, latency)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _from_disk(
+        self, key: str, entry: tuple[str, float] | None
+    ) -> tuple[str, float] | None:
+        if entry is not None:
+            self.disk_hits += 1
+            self._remember(key, *entry)
+        return entry
+
+    def _get_memory(self, key: str) -> tuple[str, float] | None:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        expires_at, value, latency = entry
+        if expires_at <= time.monotonic():
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        self.memory_hits += 1
+        return value, latency
+
+    def _get_disk(self, key: str) -> tuple[str, float] | None:
+        if not self.path:
+            return None
+        try:
+            with self._lock:
+                row = (
+                    self._connect()
+                    .execute(SELECT_SQL, (key, time.time() - self.ttl))
+                    .fetchone()
+                )
+        except sqlite3.Error:
+            logger.warning("LLM cache lookup failed", exc_info=True)
+            return None
+        return tuple(row) if row is not None else None
+
+    def _set_disk(self, key: str, value: str, latency: float) -> None:
+        if not self.path:
+            return
+        try:
+            with self._lock:
+                connection = self._connect()
+                connection.execute(UPSERT_SQL, (key, value, latency, time.time()))
+                self._writes += 1
+                if self._writes % self.prune_every == 0:
+                    connection.execute(PRUNE_SQL, (time.time() - self.ttl,))
+        except sqlite3.Error:
+            logger.warning("Failed to store LLM response", exc_info=True)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._connection = sqlite3.connect(
+                self.path, check_same_thread=False, isolation_level=None
+            )
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(SETUP_SQL)
+        return self._connection
+
+
+llm_cache = LLMCache(
+    path=env_str("LLM_CACHE_PATH", ".cache/llm_cache.sqlite"),
+    max_entries=env_int("LLM_CACHE_MAX_ENTRIES", 1024),
+    ttl=env_int("LLM_CACHE_TTL_SECONDS", 24 * 3600),
+)
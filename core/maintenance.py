@@ -0,0 +1,323 @@
+"""Maintenance of the checkpoint tables.
+
+``AsyncPostgresSaver`` keeps every checkpoint of every thread, and each new
+version of the ``messages`` channel is a full copy of the conversation, so
+the tables grow without bound. Maintenance:
+
+* compacts completed interviews (the experience score has been written, so
+  the graph reached ``END``) down to their final checkpoint,
+* deletes abandoned interviews whose last checkpoint is older than a TTL,
+* deletes documents of :mod:`core.documents` no thread references anymore,
+* deletes persisted SSE replay frames (``sse_replay_frames``) of the threads
+  it compacts or prunes, and frames older than a separate, shorter TTL.
+
+Sizes are reported with ``pg_column_size`` of the deleted rows; the disk
+space itself is returned to Postgres by (auto)vacuum.
+
+Run it with ``python -m cli.checkpoints`` or periodically in the service
+with ``CHECKPOINT_MAINTENANCE_INTERVAL_SECONDS``.
+"""
+
+import asyncio
+import logging
+
+import psycopg
+from psycopg_pool import AsyncConnectionPool
+
+from core.documents import SETUP_SQL as DOCUMENTS_SETUP_SQL
+
+logger = logging.getLogger(__name__)
+
+LOCK_SQL = "SELECT pg_try_advisory_lock(hashtext('checkpoint_maintenance'))"
+UNLOCK_SQL = "SELECT pg_advisory_unlock(hashtext('checkpoint_maintenance'))"
+
+# The candidates of a run are selected once, with a single scan of the latest
+# checkpoints, and then processed in batches.
+LATEST_SQL = """
+SELECT DISTINCT ON (thread_id) thread_id, checkpoint_id, checkpoint
+FROM checkpoints
+WHERE checkpoint_ns = ''
+ORDER BY thread_id, checkpoint_id DESC
+"""
+
+COMPLETED_SQL = f"""
+SELECT thread_id, checkpoint_id FROM ({LATEST_SQL}) latest
+WHERE checkpoint -> 'channel_versions' ? 'experience_interview_score'
+  AND EXISTS (
+      SELECT 1 FROM checkpoints c
+      WHERE c.thread_id = latest.thread_id
+        AND c.checkpoint_id <> latest.checkpoint_id
+  )
+"""
+
+ABANDONED_SQL = f"""
+SELECT thread_id FROM ({LATEST_SQL}) latest
+WHERE NOT checkpoint -> 'channel_versions' ? 'experience_interview_score'
+  AND (checkpoint ->> 'ts')::timestamptz < now() - make_interval(secs => %s)
+"""
+
+# Rechecked for every batch: a thread may have been resumed after the run
+# selected it.
+STILL_ABANDONED_SQL = """
+SELECT thread_id FROM unnest(%s::text[]) AS t (thread_id)
+WHERE NOT EXISTS (
+    SELECT 1 FROM checkpoints c
+    WHERE c.thread_id = t.thread_id
+      AND c.checkpoint_ns = ''
+      AND (c.checkpoint ->> 'ts')::timestamptz >= now() - make_interval(secs => %s)
+)
+"""
+
+# Each statement reports the number and size of the rows it deleted.
+COMPACT_CHECKPOINTS_SQL = """
+WITH deleted AS (
+    DELETE FROM checkpoints t
+    WHERE thread_id = %(thread_id)s AND checkpoint_id <> %(checkpoint_id)s
+    RETURNING pg_column_size(t.*) AS size
+)
+SELECT count(*), COALESCE(sum(size), 0) FROM deleted
+"""
+
+COMPACT_WRITES_SQL = """
+WITH deleted AS (
+    DELETE FROM checkpoint_writes t
+    WHERE thread_id = %(thread_id)s AND checkpoint_id <> %(checkpoint_id)s
+    RETURNING pg_column_size(t.*) AS size
+)
+SELECT count(*), COALESCE(sum(size), 0) FROM deleted
+"""
+
+# Blob versions not referenced by the remaining checkpoint.
+COMPACT_BLOBS_SQL = """
+WITH deleted AS (
+    DELETE FROM checkpoint_blobs t
+    WHERE thread_id = %(thread_id)s
+      AND NOT EXISTS (
+          SELECT 1
+          FROM checkpoints c,
+               jsonb_each_text(c.checkpoint -> 'channel_versions') v
+          WHERE c.thread_id = t.thread_id
+            AND c.checkpoint_ns = t.checkpoint_ns
+            AND v.key = t.channel
+            AND v.value = t.version
+      )
+    RETURNING pg_column_size(t.*) AS size
+)
+SELECT count(*), COALESCE(sum(size), 0) FROM deleted
+"""
+
+DETACH_SQL = """
+UPDATE checkpoints SET parent_checkpoint_id = NULL
+WHERE thread_id = %(thread_id)s
+"""
+
+PRUNE_TEMPLATE = """
+WITH deleted AS (
+    DELETE FROM {table} t WHERE thread_id = ANY(%s)
+    RETURNING pg_column_size(t.*) AS size
+)
+SELECT count(*), COALESCE(sum(size), 0) FROM deleted
+"""
+
+PRUNE_SQL = {
+    table: PRUNE_TEMPLATE.format(table=table)
+    for table in ("checkpoints", "checkpoint_writes", "checkpoint_blobs")
+}
+
+PRUNE_REFS_SQL = "DELETE FROM interview_document_refs WHERE thread_id = ANY(%s)"
+
+# The replay table is created by the service only when persistence is enabled.
+REPLAY_EXISTS_SQL = "SELECT to_regclass('sse_replay_frames') IS NOT NULL"
+
+PRUNE_REPLAY_SQL = PRUNE_TEMPLATE.format(table="sse_replay_frames")
+
+EXPIRE_REPLAY_SQL = """
+WITH deleted AS (
+    DELETE FROM sse_replay_frames t
+    WHERE created_at < now() - make_interval(secs => %s)
+    RETURNING pg_column_size(t.*) AS size
+)
+SELECT count(*), COALESCE(sum(size), 0) FROM deleted
+"""
+
+PRUNE_DOCUMENTS_SQL = """
+WITH deleted AS (
+    DELETE FROM interview_documents t
+    WHERE NOT EXISTS (
+        SELECT 1 FROM interview_document_refs r WHERE r.hash = t.hash
+    )
+    RETURNING pg_column_size(t.*) AS size
+)
+SELECT count(*), COALESCE(sum(size), 0) FROM deleted
+"""
+
+TABLE_SIZES_SQL = """
+SELECT relname, pg_total_relation_size(oid)
+FROM pg_class
+WHERE relname = ANY(%s) AND relkind = 'r'
+ORDER BY relname
+"""
+
+
+class MaintenanceReport:
+    """Threads processed, and rows and bytes deleted per table."""
+
+    def __init__(self):
+        self.compacted_threads = 0
+        self.pruned_threads = 0
+        self.deleted_rows: dict[str, int] = {}
+        self.reclaimed_bytes: dict[str, int] = {}
+
+    def add(self, table: str, rows: int, size: int) -> None:
+        self.deleted_rows[table] = self.deleted_rows.get(table, 0) + rows
+        self.reclaimed_bytes[table] = self.reclaimed_bytes.get(table, 0) + size
+
+    @property
+    def total_reclaimed_bytes(self) -> int:
+        return sum(self.reclaimed_bytes.values())
+
+
+async def _delete(conn, sql: str, params, table: str, report: MaintenanceReport):
+    cursor = await conn.execute(sql, params)
+    rows, size = await cursor.fetchone()
+    report.add(table, rows, int(size))
+
+
+async def compact_completed(
+    conn: psycopg.AsyncConnection,
+    report: MaintenanceReport,
+    dry_run: bool = False,
+    replay: bool = False,
+) -> None:
+    """Reduce completed threads to their final checkpoint, one at a time.
+
+    With ``replay`` their persisted SSE frames are deleted as well.
+    """
+    cursor = await conn.execute(COMPLETED_SQL)
+    for thread_id, checkpoint_id in await cursor.fetchall():
+        params = {"thread_id": thread_id, "checkpoint_id": checkpoint_id}
+        async with conn.transaction(force_rollback=dry_run):
+            await _delete(conn, COMPACT_CHECKPOINTS_SQL, params, "checkpoints", report)
+            await _delete(conn, COMPACT_WRITES_SQL, params, "checkpoint_writes", report)
+            await _delete(conn, COMPACT_BLOBS_SQL, params, "checkpoint_blobs", report)
+            await conn.execute(DETACH_SQL, params)
+            if replay:
+                await _delete(
+                    conn, PRUNE_REPLAY_SQL, ([thread_id],), "sse_replay_frames", report
+                )
+        report.compacted_threads += 1
+
+
+async def prune_abandoned(
+    conn: psycopg.AsyncConnection,
+    report: MaintenanceReport,
+    ttl: int,
+    batch_size: int = 100,
+    dry_run: bool = False,
+    replay: bool = False,
+) -> None:
+    """Delete unfinished threads whose last checkpoint is older than ``ttl``,
+    ``batch_size`` threads per transaction; with ``replay`` also their
+    persisted SSE frames."""
+    cursor = await conn.execute(ABANDONED_SQL, (ttl,))
+    abandoned = [row[0] for row in await cursor.fetchall()]
+    for start in range(0, len(abandoned), batch_size):
+        async with conn.transaction(force_rollback=dry_run):
+            cursor = await conn.execute(
+                STILL_ABANDONED_SQL, (abandoned[start : start + batch_size], ttl)
+            )
+            threads = [row[0] for row in await cursor.fetchall()]
+            for table, sql in PRUNE_SQL.items():
+                await _delete(conn, sql, (threads,), table, report)
+            await conn.execute(PRUNE_REFS_SQL, (threads,))
+            if replay:
+                await _delete(
+                    conn, PRUNE_REPLAY_SQL, (threads,), "sse_replay_frames", report
+                )
+        report.pruned_threads += len(threads)
+
+
+async def prune_documents(
+    conn: psycopg.AsyncConnection, report: MaintenanceReport, dry_run: bool = False
+) -> None:
+    """Delete documents that no thread references anymore."""
+    async with conn.transaction(force_rollback=dry_run):
+        await _delete(conn, PRUNE_DOCUMENTS_SQL, (), "interview_documents", report)
+
+
+async def expire_replay_frames(
+    conn: psycopg.AsyncConnection,
+    report: MaintenanceReport,
+    ttl: int,
+    dry_run: bool = False,
+) -> None:
+    """Delete persisted SSE frames written more than ``ttl`` seconds ago."""
+    async with conn.transaction(force_rollback=dry_run):
+        await _delete(conn, EXPIRE_REPLAY_SQL, (ttl,), "sse_replay_frames", report)
+
+
+async def run_maintenance(
+    pool: AsyncConnectionPool,
+    ttl: int,
+    batch_size: int = 100,
+    dry_run: bool = False,
+    replay_ttl: int = 0,
+) -> MaintenanceReport | None:
+    """Compact, prune and collect documents; ``None`` if another run is active.
+
+    Runs are serialized across processes with a Postgres advisory lock.
+    """
+    report = MaintenanceReport()
+    async with pool.connection() as conn:
+        await conn.execute(DOCUMENTS_SETUP_SQL, prepare=False)
+        cursor = await conn.execute(LOCK_SQL)
+        if not (await cursor.fetchone())[0]:
+            return None
+        try:
+            cursor = await conn.execute(REPLAY_EXISTS_SQL)
+            replay = (await cursor.fetchone())[0]
+            await compact_completed(conn, report, dry_run, replay)
+            if ttl > 0:
+                await prune_abandoned(conn, report, ttl, batch_size, dry_run, replay)
+            await prune_documents(conn, report, dry_run)
+            if replay and replay_ttl > 0:
+                await expire_replay_frames(conn, report, replay_ttl, dry_run)
+        finally:
+            await conn.execute(UNLOCK_SQL)
+    return report
+
+
+async def table_sizes(pool: AsyncConnectionPool) -> dict[str, int]:
+    tables = [
+        "checkpoints",
+        "checkpoint_writes",
+        "checkpoint_blobs",
+        "interview_documents",
+        "interview_document_refs",
+        "sse_replay_frames",
+    ]
+    async with pool.connection() as conn:
+        cursor = await conn.execute(TABLE_SIZES_SQL, (tables,))
+        return dict(await cursor.fetchall())
+
+
+async def maintenance_loop(
+    pool: AsyncConnectionPool, interval: float, ttl: int, replay_ttl: int = 0
+):
+    """Run :func:`run_maintenance` every ``interval`` seconds until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            report = await run_maintenance(pool, ttl, replay_ttl=replay_ttl)
+        except Exception:
+            # Logged and retried next interval; the loop must keep running.
+            logger.warning("Checkpoint maintenance failed", exc_info=True)
+            continue
+        if report is not None:
+            logger.info(
+                "Checkpoint maintenance: compacted %d, pruned %d threads, "
+                "reclaimed %d bytes",
+                report.compacted_threads,
+                report.pruned_threads,
+                report.total_reclaimed_bytes,
+            )
@@ -0,0 +1,191 @@
+"""Prometheus metrics and optional OpenTelemetry spans for the hot paths.
+
+Graph nodes are timed with :func:`observe_node`, LLM calls with the
+:data:`llm_metrics` callback handler set on every chat model, checkpointer
+calls with :func:`instrument_checkpointer` and SSE responses with
+:func:`observe_first_frame`. All of them only read the clock and update
+in-process counters, which is cheap enough to leave on.
+
+Spans are emitted when ``OTEL_TRACING`` is set and ``opentelemetry-api`` is
+installed; an exporter is configured by the OpenTelemetry SDK as usual.
+"""
+
+import functools
+import time
+from collections.abc import AsyncGenerator, AsyncIterator, Awaitable, Callable
+from contextlib import nullcontext
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.runnables import ensure_config
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from prometheus_client import Counter, Histogram
+
+from core.config import env_bool
+
+try:
+    from opentelemetry import trace
+except ImportError:
+    trace = None
+
+# Turn latencies are dominated by LLM calls, so the buckets reach further
+# than the prometheus_client defaults.
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+
+NODE_DURATION = Histogram(
+    "interview_node_duration_seconds",
+    "Duration of graph node executions.",
+    ["node"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_DURATION = Histogram(
+    "interview_llm_duration_seconds",
+    "Duration of LLM calls.",
+    ["model"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TIME_TO_FIRST_TOKEN = Histogram(
+    "interview_llm_time_to_first_token_seconds",
+    "Time from the start of a streamed LLM call to its first chunk.",
+    ["model"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "interview_llm_tokens",
+    "Tokens used by LLM calls.",
+    ["model", "kind"],
+)
+LLM_ERRORS = Counter("interview_llm_errors", "Failed LLM calls.", ["model"])
+CHECKPOINT_DURATION = Histogram(
+    "interview_checkpoint_duration_seconds",
+    "Duration of checkpointer operations.",
+    ["operation"],
+    buckets=FAST_BUCKETS,
+)
+SSE_TIME_TO_FIRST_BYTE = Histogram(
+    "interview_sse_time_to_first_byte_seconds",
+    "Time from receiving a request to sending its first SSE frame.",
+    ["endpoint"],
+    buckets=LATENCY_BUCKETS,
+)
+
+tracer = trace.get_tracer(__name__) if trace and env_bool("OTEL_TRACING") else None
+
+
+def _span(name: str):
+    if tracer is None:
+        return nullcontext()
+    thread_id = ensure_config().get("configurable", {}).get("thread_id")
+    return tracer.start_as_current_span(
+        name, attributes={"thread_id": str(thread_id)} if thread_id else None
+    )
+
+
+def observe_node(node: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """Time an async graph node (and trace it, tagged with the thread id)."""
+    histogram = NODE_DURATION.labels(node.__name__)
+
+    @functools.wraps(node)
+    async def wrapper(state):
+        with _span(node.__name__):
+            start = time.perf_counter()
+            try:
+                return await node(state)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+
+    return wrapper
+
+
+class LLMMetricsHandler(BaseCallbackHandler):
+    """Record duration, time to first token and token usage of LLM calls."""
+
+    run_inline = True
+
+    def __init__(self):
+        # run id -> (model, start time, first token seen)
+        self._runs: dict[UUID, list] = {}
+
+    def on_chat_model_start(
+        self, serialized: dict, messages: list, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        metadata = kwargs.get("metadata") or {}
+        model = metadata.get("ls_model_name") or "unknown"
+        self._runs[run_id] = [model, time.perf_counter(), False]
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._runs.get(run_id)
+        if run is not None and not run[2]:
+            run[2] = True
+            LLM_TIME_TO_FIRST_TOKEN.labels(run[0]).observe(time.perf_counter() - run[1])
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        model, start, _ = run
+        LLM_DURATION.labels(model).observe(time.perf_counter() - start)
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(
+                    getattr(generation, "message", None), "usage_metadata", None
+                )
+                if usage:
+                    LLM_TOKENS.labels(model, "prompt").inc(usage["input_tokens"])
+                    LLM_TOKENS.labels(model, "completion").inc(usage["output_tokens"])
+
+    def on_llm_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        run = self._runs.pop(run_id, None)
+        if run is not None:
+            LLM_ERRORS.labels(run[0]).inc()
+
+
+llm_metrics = LLMMetricsHandler()
+
+
+def _timed_method(method: Callable, operation: str) -> Callable:
+    histogram = CHECKPOINT_DURATION.labels(operation)
+
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - start)
+
+    return wrapper
+
+
+def instrument_checkpointer(checkpointer: BaseCheckpointSaver) -> BaseCheckpointSaver:
+    """Time the async reads and writes of ``checkpointer`` in place."""
+    for method, operation in (
+        ("aget_tuple", "get"),
+        ("aput", "put"),
+        ("aput_writes", "put_writes"),
+    ):
+        setattr(
+            checkpointer,
+            method,
+            _timed_method(getattr(checkpointer, method), operation),
+        )
+    return checkpointer
+
+
+async def observe_first_frame(
+    frames: AsyncIterator[str], endpoint: str, started: float
+) -> AsyncGenerator[str, None]:
+    """Yield ``frames``, recording the time from ``started`` to the first one."""
+    first = True
+    async for frame in frames:
+        if first:
+            SSE_TIME_TO_FIRST_BYTE.labels(endpoint).observe(
+                time.perf_counter() - started
+            )
+            first = False
+        yield frame
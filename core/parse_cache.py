@@ -0,0 +1,223 @@
+import asyncio
+import hashlib
+import logging
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+import psycopg
+from psycopg.types.json import Jsonb
+from psycopg_pool import AsyncConnectionPool
+from pydantic import BaseModel
+
+from core.config import env_int
+
+logger = logging.getLogger(__name__)
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+SETUP_SQL = """
+CREATE TABLE IF NOT EXISTS parse_cache (
+    kind TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    payload JSONB NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (kind, content_hash)
+);
+CREATE INDEX IF NOT EXISTS parse_cache_created_at_idx ON parse_cache (created_at);
+"""
+
+SELECT_SQL = """
+SELECT payload FROM parse_cache
+WHERE kind = %s AND content_hash = %s
+  AND created_at > now() - make_interval(secs => %s)
+"""
+
+UPSERT_SQL = """
+INSERT INTO parse_cache (kind, content_hash, payload)
+VALUES (%s, %s, %s)
+ON CONFLICT (kind, content_hash)
+DO UPDATE SET payload = EXCLUDED.payload, created_at = now()
+"""
+
+PRUNE_SQL = """
+DELETE FROM parse_cache
+WHERE created_at <= now() - make_interval(secs => %(ttl)s)
+   OR (kind, content_hash) IN (
+       SELECT kind, content_hash FROM parse_cache
+       ORDER BY created_at DESC
+       OFFSET %(max_entries)s
+   )
+"""
+
+
+def normalize_content(text: str) -> str:
+    """Normalize text so formatting-only differences hash the same."""
+    text = unicodedata.normalize("NFKC", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def content_hash(kind: str, text: str) -> str:
+    digest = hashlib.sha256(f"{kind}\0{normalize_content(text)}".encode())
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """Two-tier cache of parsed documents keyed by a normalized content hash.
+
+    The first tier is an in-process LRU; the second, enabled with
+    :meth:`attach`, is a ``parse_cache`` table in the checkpointer's Postgres.
+    Both tiers expire entries after ``ttl`` seconds and are bounded in size.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl: int = 7 * 24 * 3600,
+        persistent_max_entries: int = 100_000,
+        prune_every: int = 100,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.persistent_max_entries = persistent_max_entries
+        self.prune_every = prune_every
+        self.pool: AsyncConnectionPool | None = None
+        self._memory: OrderedDict[tuple[str, str], tuple[float, BaseModel]] = (
+            OrderedDict()
+        )
+        self._inflight: dict[tuple[str, str], asyncio.Future] = {}
+        self._writes = 0
+        self.memory_hits = 0
+        self.postgres_hits = 0
+        self.coalesced = 0
+        self.misses = 0
+
+    async def attach(self, pool: AsyncConnectionPool) -> None:
+        """Enable the Postgres tier, creating its table if needed."""
+        async with pool.connection() as conn:
+            await conn.execute(SETUP_SQL, prepare=False)
+        self.pool = pool
+
+    async def aget_or_parse(
+        self,
+        kind: str,
+        text: str,
+        schema: type[ModelT],
+        parse: Callable[[], Awaitable[ModelT]],
+    ) -> ModelT:
+        """Return the cached parse of ``text`` or run ``parse`` and store it.
+
+        Concurrent calls for the same content share a single ``parse`` call.
+        If the caller running it is cancelled, one of the waiting calls takes
+        the parse over instead of failing with it.
+        """
+        key = (kind, content_hash(kind, text))
+
+        cached = self._get_memory(key)
+        if cached is not None:
+            self.memory_hits += 1
+            return cached
+
+        if key in self._inflight:
+            self.coalesced += 1
+        while key in self._inflight:
+            # None: the owner was cancelled, so look again and take over.
+            result = await asyncio.shield(self._inflight[key])
+            if result is not None:
+                return result
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._get_postgres(key, schema)
+            if result is not None:
+                self.postgres_hits += 1
+            else:
+                self.misses += 1
+                result = await parse()
+                await self._set_postgres(key, result)
+            self._set_memory(key, result)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            # Not cancelled: that would fail every coalesced caller with it.
+            future.set_result(None)
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else is waiting.
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    def stats(self) -> dict:
+        hits = self.memory_hits + self.postgres_hits + self.coalesced
+        lookups = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "postgres_hits": self.postgres_hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+    def _get_memory(self, key: tuple[str, str]) -> BaseModel | None:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return value
+
+    def _set_memory(self, key: tuple[str, str], value: BaseModel) -> None:
+        self._memory[key] = (time.monotonic() + self.ttl, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    async def _get_postgres(
+        self, key: tuple[str, str], schema: type[ModelT]
+    ) -> ModelT | None:
+        if self.pool is None:
+            return None
+        try:
+            async with self.pool.connection() as conn:
+                cursor = await conn.execute(SELECT_SQL, (*key, self.ttl))
+                row = await cursor.fetchone()
+        except psycopg.Error:
+            logger.warning("Parse cache lookup failed", exc_info=True)
+            return None
+        return schema.model_validate(row[0]) if row else None
+
+    async def _set_postgres(self, key: tuple[str, str], value: BaseModel) -> None:
+        if self.pool is None:
+            return
+        try:
+            async with self.pool.connection() as conn:
+                await conn.execute(UPSERT_SQL, (*key, Jsonb(value.model_dump())))
+                self._writes += 1
+                if self._writes % self.prune_every == 0:
+                    await conn.execute(
+                        PRUNE_SQL,
+                        {
+                            "ttl": self.ttl,
+                            "max_entries": self.persistent_max_entries,
+                        },
+                    )
+        except psycopg.Error:
+            logger.warning("Parse cache write failed", exc_info=True)
+
+
+parse_cache = ParseCache(
+    max_entries=env_int("PARSE_CACHE_MAX_ENTRIES", 512),
+    ttl=env_int("PARSE_CACHE_TTL_SECONDS", 7 * 24 * 3600),
+    persistent_max_entries=env_int("PARSE_CACHE_PERSISTENT_MAX_ENTRIES", 100_000),
+)
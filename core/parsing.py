@@ -0,0 +1,184 @@
+"""Resume and job description parsing, chunked for long documents.
+
+A document longer than ``PARSE_CHUNK_THRESHOLD_CHARS`` is split on section
+boundaries (blank lines and heading lines) into chunks of at most
+``PARSE_CHUNK_CHARS`` characters, every chunk is parsed concurrently and the
+partial results are merged in document order: experiences and projects with
+the same title are combined, skills are de-duplicated by their normalized
+form and job description parts are joined. Shorter documents are parsed in
+one call as before. ``PARSE_CHUNK_THRESHOLD_CHARS=0`` turns chunking off.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+from core.config import env_int
+from core.question_bank import normalize_skill
+from core.runnables import job_description_parser, resume_breaker
+from schemas.llm_responses import Experience, JobDescription, Project, Resume
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+SECTION_NAMES = (
+    "about",
+    "achievements",
+    "awards",
+    "benefits",
+    "certifications",
+    "education",
+    "experience",
+    "professional experience",
+    "work experience",
+    "employment",
+    "projects",
+    "publications",
+    "qualifications",
+    "requirements",
+    "responsibilities",
+    "skills",
+    "technical skills",
+    "summary",
+)
+
+# A short line that is either in capitals or a known section name.
+HEADING = re.compile(
+    r"^[^\S\n]*(?:[A-Z][A-Z0-9&/,\- ]{2,40}|(?i:"
+    + "|".join(SECTION_NAMES)
+    + r"))[^\S\n]*:?[^\S\n]*$",
+    re.MULTILINE,
+)
+
+
+def _sections(text: str) -> list[str]:
+    """Sections of ``text``: a heading and the paragraphs up to the next one."""
+    sections: list[list[str]] = [[]]
+    for paragraph in re.split(r"\n[^\S\n]*\n", text):
+        starts = [0, *(m.start() for m in HEADING.finditer(paragraph) if m.start())]
+        for start, end in zip(starts, [*starts[1:], len(paragraph)]):
+            block = paragraph[start:end].strip("\n")
+            if not block.strip():
+                continue
+            if HEADING.match(block) and sections[-1]:
+                sections.append([])
+            sections[-1].append(block)
+    return ["\n\n".join(blocks) for blocks in sections if blocks]
+
+
+def _cut(section: str, max_chars: int) -> list[str]:
+    """Split a section longer than ``max_chars`` on lines, then hard."""
+    pieces, current = [], ""
+    for line in section.splitlines(keepends=True):
+        while len(line) > max_chars:
+            pieces.append(line[:max_chars])
+            line = line[max_chars:]
+        if current and len(current) + len(line) > max_chars:
+            pieces.append(current)
+            current = ""
+        current += line
+    return [*pieces, current] if current else pieces
+
+
+def split_sections(text: str, max_chars: int) -> list[str]:
+    """Chunks of at most ``max_chars`` characters split on section boundaries.
+
+    Whole sections are packed greedily; only a section longer than a chunk
+    is split, on line boundaries.
+    """
+    if len(text) <= max_chars:
+        return [text]
+    chunks, current = [], ""
+    for section in _sections(text):
+        pieces = [section] if len(section) <= max_chars else _cut(section, max_chars)
+        for piece in pieces:
+            if current and len(current) + 2 + len(piece) > max_chars:
+                chunks.append(current)
+                current = ""
+            current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _key(title: str) -> str:
+    return " ".join(title.casefold().split())
+
+
+def _merge_entries(entries: list[Experience] | list[Project]) -> list:
+    """Entries with the same title (one role split across chunks) combined,
+    in order of first appearance."""
+    merged: dict[str, tuple[type, str, list[str]]] = {}
+    for entry in entries:
+        kind, title, descriptions = merged.setdefault(
+            _key(entry.title), (type(entry), entry.title, [])
+        )
+        if entry.description and entry.description not in descriptions:
+            descriptions.append(entry.description)
+    return [
+        kind(title=title, description=" ".join(descriptions))
+        for kind, title, descriptions in merged.values()
+    ]
+
+
+def merge_resumes(parts: list[Resume]) -> Resume:
+    skills: dict[str, str] = {}
+    for part in parts:
+        for skill in part.skills:
+            skills.setdefault(normalize_skill(skill), skill.strip())
+    return Resume(
+        experiences=_merge_entries([e for part in parts for e in part.experiences]),
+        projects=_merge_entries([p for part in parts for p in part.projects]),
+        skills=list(skills.values()),
+    )
+
+
+def merge_job_descriptions(parts: list[JobDescription]) -> JobDescription:
+    texts = dict.fromkeys(
+        part.job_description.strip() for part in parts if part.job_description.strip()
+    )
+    return JobDescription(job_description="\n\n".join(texts))
+
+
+async def _parse(
+    kind: str,
+    text: str,
+    parse: Callable[[str], Awaitable[T]],
+    merge: Callable[[list[T]], T],
+) -> T:
+    threshold = env_int("PARSE_CHUNK_THRESHOLD_CHARS", 16000)
+    if not threshold or len(text) <= threshold:
+        return await parse(text)
+    chunks = split_sections(text, env_int("PARSE_CHUNK_CHARS", 8000))
+    start = time.perf_counter()
+    parts = await asyncio.gather(*(parse(chunk) for chunk in chunks))
+    logger.info(
+        "Parsed a %s of %d characters in %d chunks in %.2fs",
+        kind,
+        len(text),
+        len(chunks),
+        time.perf_counter() - start,
+    )
+    return merge(parts)
+
+
+async def break_resume(resume: str) -> Resume:
+    return await _parse(
+        "resume",
+        resume,
+        lambda text: resume_breaker.ainvoke({"resume": text}),
+        merge_resumes,
+    )
+
+
+async def parse_job_description(job_description: str) -> JobDescription:
+    return await _parse(
+        "job description",
+        job_description,
+        lambda text: job_description_parser.ainvoke({"job_description": text}),
+        merge_job_descriptions,
+    )
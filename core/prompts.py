@@ -1,6 +1,5 @@
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
-
 job_description_parser_prompt = ChatPromptTemplate.from_messages(
     [
         (
@@ -29,12 +28,25 @@ generate_coding_question_prompt = ChatPromptTemplate.from_messages(
         (
             "system",
             "You are a coding interviewer. Your task is to generate exactly 2 technical "
-            "programming/coding questions based on the skills mentioned below."
+            "programming/coding questions based on the skills mentioned below.",
         ),
         ("system", "<skills>\n{skills}\n</skills>"),
     ]
 )
 
+# Used to grow the question bank: the questions it already has for the skill
+# are listed so the model does not return them again.
+generate_new_coding_question_prompt = ChatPromptTemplate.from_messages(
+    [
+        *generate_coding_question_prompt.messages,
+        (
+            "system",
+            "Do not repeat any of these existing questions:\n"
+            "<existing_questions>\n{existing_questions}\n</existing_questions>",
+        ),
+    ]
+)
+
 coding_question_assessment_promt = ChatPromptTemplate.from_messages(
     [
         (
@@ -63,6 +75,40 @@ expereince_interviewer_prompt = ChatPromptTemplate.from_messages(
         ("system", "<job_description>\n{job_description}\n</job_description>"),
         ("system", "<experience>\n{experience}\n</experience>"),
         ("system", "<projects>\n{projects}\n</projects>"),
+        (
+            "system",
+            "<conversation_summary>\n{conversation_summary}\n</conversation_summary>",
+        ),
+        MessagesPlaceholder("chat_history"),
+    ]
+)
+
+experience_assessment_prompt = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            "You are a highly experienced interviewer at a tech company. Below is the "
+            "transcript of an interview about the candidate's previous work experiences "
+            "and projects for the provided job description (if any is provided). Score the "
+            "candidate's answers between 1 to 10 where 1 is very bad and 10 is perfect "
+            "using the Experience Interview Score schema.",
+        ),
+        ("system", "<job_description>\n{job_description}\n</job_description>"),
+        ("system", "<experience>\n{experience}\n</experience>"),
+        ("system", "<projects>\n{projects}\n</projects>"),
         MessagesPlaceholder("chat_history"),
     ]
-)
\ No newline at end of file
+)
+
+conversation_summarizer_prompt = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            "You are assisting an interviewer. Update the summary of the interview "
+            "so far with the new messages below. Keep every question that was asked, "
+            "the candidate's key claims and anything worth following up on. Be brief.",
+        ),
+        ("system", "<summary>\n{summary}\n</summary>"),
+        MessagesPlaceholder("messages"),
+    ]
+)
@@ -0,0 +1,238 @@
+"""Precomputed coding questions indexed by skill.
+
+Questions are generated offline per skill and stored in Postgres together
+with an inverted index from normalized skill to question ids. At interview
+start :meth:`QuestionBank.select` picks the questions that best cover the
+candidate's skills, and the LLM is only asked for the skills left uncovered.
+
+The bank is warmed and grown in bulk with ``python -m cli.question_bank``.
+"""
+
+import hashlib
+import logging
+import random
+import re
+
+import psycopg
+from psycopg_pool import AsyncConnectionPool
+
+from core.config import env_int
+from core.parse_cache import normalize_content
+
+logger = logging.getLogger(__name__)
+
+SETUP_SQL = """
+CREATE TABLE IF NOT EXISTS coding_question_bank (
+    id BIGSERIAL PRIMARY KEY,
+    question TEXT NOT NULL,
+    question_hash TEXT NOT NULL UNIQUE,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE TABLE IF NOT EXISTS coding_question_skills (
+    skill TEXT NOT NULL,
+    question_id BIGINT NOT NULL REFERENCES coding_question_bank (id) ON DELETE CASCADE,
+    PRIMARY KEY (skill, question_id)
+);
+"""
+
+INSERT_QUESTION_SQL = """
+WITH inserted AS (
+    INSERT INTO coding_question_bank (question, question_hash)
+    VALUES (%s, %s)
+    ON CONFLICT (question_hash) DO NOTHING
+    RETURNING id
+)
+SELECT id FROM inserted
+UNION ALL
+SELECT id FROM coding_question_bank WHERE question_hash = %s
+"""
+
+# A question inserted by a concurrent transaction is not visible to the
+# statement above; it is once that transaction has committed.
+SELECT_QUESTION_SQL = """
+SELECT id FROM coding_question_bank WHERE question_hash = %s
+"""
+
+INSERT_SKILL_SQL = """
+INSERT INTO coding_question_skills (skill, question_id)
+VALUES (%s, %s)
+ON CONFLICT DO NOTHING
+"""
+
+CANDIDATES_SQL = """
+SELECT q.id, q.question, array_agg(s.skill) AS matched
+FROM coding_question_skills s
+JOIN coding_question_bank q ON q.id = s.question_id
+WHERE s.skill = ANY(%s)
+GROUP BY q.id, q.question
+ORDER BY count(*) DESC, random()
+LIMIT %s
+"""
+
+QUESTIONS_SQL = """
+SELECT q.question
+FROM coding_question_skills s
+JOIN coding_question_bank q ON q.id = s.question_id
+WHERE s.skill = %s
+ORDER BY q.created_at DESC
+LIMIT %s
+"""
+
+COUNTS_SQL = """
+SELECT skill, count(*) FROM coding_question_skills
+WHERE %s::text[] IS NULL OR skill = ANY(%s)
+GROUP BY skill ORDER BY skill
+"""
+
+SKILL_ALIASES = {
+    "js": "javascript",
+    "ts": "typescript",
+    "py": "python",
+    "python3": "python",
+    "golang": "go",
+    "postgres": "postgresql",
+    "k8s": "kubernetes",
+    "node": "node.js",
+    "nodejs": "node.js",
+    "reactjs": "react",
+    "react.js": "react",
+    "c plus plus": "c++",
+    "cpp": "c++",
+}
+
+
+def normalize_skill(skill: str) -> str:
+    skill = re.sub(r"\s+", " ", skill).strip().lower()
+    return SKILL_ALIASES.get(skill, skill)
+
+
+def question_hash(question: str) -> str:
+    return hashlib.sha256(normalize_content(question).lower().encode()).hexdigest()
+
+
+def question_skills(question: str, skills: list[str]) -> list[str]:
+    """The ``skills`` a question generated for them is about.
+
+    A question generated for one skill is about that skill. Otherwise only
+    the skills named in the question count, so a question about one of
+    several skills is not indexed under the others.
+    """
+    if len(skills) == 1:
+        return skills
+    text = question.lower()
+    names = {
+        skill: {skill.strip().lower(), normalize_skill(skill)}
+        | {
+            alias
+            for alias, name in SKILL_ALIASES.items()
+            if name == normalize_skill(skill)
+        }
+        for skill in skills
+    }
+    return [
+        skill
+        for skill, aliases in names.items()
+        if any(re.search(rf"(?<!\w){re.escape(a)}(?!\w)", text) for a in aliases if a)
+    ]
+
+
+class QuestionBank:
+    """Skill-indexed store of pre-generated coding questions.
+
+    The bank is disabled (``select`` returns nothing) until :meth:`attach`
+    is called with the Postgres pool.
+    """
+
+    def __init__(self, candidate_limit: int = 50):
+        self.candidate_limit = candidate_limit
+        self.pool: AsyncConnectionPool | None = None
+
+    async def attach(self, pool: AsyncConnectionPool) -> None:
+        async with pool.connection() as conn:
+            await conn.execute(SETUP_SQL, prepare=False)
+        self.pool = pool
+
+    async def select(self, skills: list[str], count: int) -> tuple[list[str], set]:
+        """Pick up to ``count`` questions covering as many ``skills`` as possible.
+
+        Returns the questions and the normalized skills they do not cover.
+        Among equally good questions the choice is random, so candidates with
+        the same skills do not all get the same questions.
+        """
+        wanted = {normalize_skill(skill) for skill in skills if skill.strip()}
+        if self.pool is None or not wanted:
+            return [], wanted
+        try:
+            async with self.pool.connection() as conn:
+                cursor = await conn.execute(
+                    CANDIDATES_SQL, (list(wanted), self.candidate_limit)
+                )
+                candidates = await cursor.fetchall()
+        except psycopg.Error:
+            logger.warning("Question bank lookup failed", exc_info=True)
+            return [], wanted
+
+        random.shuffle(candidates)
+        selected: list[str] = []
+        seen: set[str] = set()
+        uncovered = set(wanted)
+        while candidates and len(selected) < count:
+            # Greedy set cover: prefer the question covering most new skills.
+            best = max(candidates, key=lambda row: len(uncovered & set(row[2])))
+            candidates.remove(best)
+            _, question, matched = best
+            digest = question_hash(question)
+            if digest in seen:
+                continue
+            seen.add(digest)
+            selected.append(question)
+            uncovered -= set(matched)
+        return selected, uncovered
+
+    async def add(self, questions: list[str], skills: list[str]) -> int:
+        """Index ``questions`` under ``skills``; returns the new index entries."""
+        if self.pool is None or not questions:
+            return 0
+        normalized = sorted({normalize_skill(skill) for skill in skills})
+        added = 0
+        try:
+            async with self.pool.connection() as conn:
+                async with conn.transaction():
+                    for question in questions:
+                        digest = question_hash(question)
+                        cursor = await conn.execute(
+                            INSERT_QUESTION_SQL, (question, digest, digest)
+                        )
+                        row = await cursor.fetchone()
+                        if row is None:
+                            cursor = await conn.execute(SELECT_QUESTION_SQL, (digest,))
+                            row = await cursor.fetchone()
+                        if row is None:
+                            continue
+                        (question_id,) = row
+                        for skill in normalized:
+                            cursor = await conn.execute(
+                                INSERT_SKILL_SQL, (skill, question_id)
+                            )
+                            added += cursor.rowcount
+        except psycopg.Error:
+            logger.warning("Failed to add questions to the bank", exc_info=True)
+            return 0
+        return added
+
+    async def questions(self, skill: str, limit: int = 50) -> list[str]:
+        """The newest ``limit`` questions indexed under ``skill``."""
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute(QUESTIONS_SQL, (normalize_skill(skill), limit))
+            return [row[0] for row in await cursor.fetchall()]
+
+    async def counts(self, skills: list[str] | None = None) -> dict[str, int]:
+        normalized = [normalize_skill(skill) for skill in skills] if skills else None
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute(COUNTS_SQL, (normalized, normalized))
+            return dict(await cursor.fetchall())
+
+
+question_bank = QuestionBank(
+    candidate_limit=env_int("QUESTION_BANK_CANDIDATE_LIMIT", 50)
+)
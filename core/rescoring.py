@@ -0,0 +1,330 @@
+"""Offline re-scoring of finished interviews.
+
+Completed threads are read from the checkpoint tables page by page, their
+coding question/answer pairs and experience transcript are rebuilt from
+``messages``, and both parts are scored again with the current prompts and
+models (``coding_question_assessment`` and ``experience_assessment``).
+Results go to ``interview_rescores`` keyed by a run id; a run that is
+interrupted and started again with the same id skips the threads it has
+already scored.
+
+Run it with ``python -m cli.rescore``.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator
+
+import psycopg
+from langchain_core.messages import BaseMessage
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from psycopg.types.json import Jsonb
+from psycopg_pool import AsyncConnectionPool
+
+from core.documents import document_store
+from core.runnables import (
+    MODEL_ROUTES,
+    coding_question_assessment,
+    experience_assessment,
+)
+
+logger = logging.getLogger(__name__)
+
+SETUP_SQL = """
+CREATE TABLE IF NOT EXISTS interview_rescores (
+    run_id TEXT NOT NULL,
+    thread_id TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    coding_scores JSONB,
+    coding_interview_score INTEGER,
+    experience_interview_score INTEGER,
+    original_coding_interview_score INTEGER,
+    original_experience_interview_score INTEGER,
+    models JSONB NOT NULL,
+    error TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (run_id, thread_id)
+);
+"""
+
+# Completed threads (the experience score has been written) not yet scored
+# by the run, in pages ordered by thread id.
+PENDING_SQL = """
+SELECT thread_id FROM (
+    SELECT DISTINCT ON (thread_id) thread_id, checkpoint
+    FROM checkpoints
+    WHERE checkpoint_ns = '' AND thread_id > %(after)s
+    ORDER BY thread_id, checkpoint_id DESC
+) latest
+WHERE checkpoint -> 'channel_versions' ? 'experience_interview_score'
+  AND NOT EXISTS (
+      SELECT 1 FROM interview_rescores r
+      WHERE r.run_id = %(run_id)s AND r.thread_id = latest.thread_id
+  )
+ORDER BY thread_id
+LIMIT %(limit)s
+"""
+
+INSERT_SQL = """
+INSERT INTO interview_rescores (
+    run_id, thread_id, checkpoint_id, coding_scores, coding_interview_score,
+    experience_interview_score, original_coding_interview_score,
+    original_experience_interview_score, models, error
+) VALUES (
+    %(run_id)s, %(thread_id)s, %(checkpoint_id)s, %(coding_scores)s,
+    %(coding_interview_score)s, %(experience_interview_score)s,
+    %(original_coding_interview_score)s, %(original_experience_interview_score)s,
+    %(models)s, %(error)s
+)
+ON CONFLICT (run_id, thread_id) DO NOTHING
+"""
+
+STATS_SQL = """
+SELECT
+    count(*),
+    count(error),
+    avg(coding_interview_score - original_coding_interview_score),
+    avg(experience_interview_score - original_experience_interview_score),
+    min(created_at),
+    max(created_at)
+FROM interview_rescores
+WHERE run_id = %s
+"""
+
+
+def split_transcript(
+    values: dict,
+) -> tuple[list[tuple[str, str]], list[BaseMessage]]:
+    """Coding question/answer pairs and the experience part of ``messages``.
+
+    The coding interview alternates a question and an answer until
+    ``experience_start_index``, where the experience interview begins.
+    Checkpoints written before that index existed end the coding part after
+    one question and one answer per coding question.
+    """
+    messages: list[BaseMessage] = values.get("messages", [])
+    start = values.get("experience_start_index")
+    if start is None:
+        start = min(2 * len(values.get("coding_questions", [])), len(messages))
+    coding = messages[:start]
+    pairs = [
+        (question.content, answer.content)
+        for question, answer in zip(coding, coding[1:])
+        if question.type == "ai" and answer.type == "human"
+    ]
+    return pairs, messages[start:]
+
+
+async def score_interview(values: dict) -> dict:
+    """Score the coding answers and the experience transcript concurrently."""
+    pairs, experience_messages = split_transcript(values)
+
+    async def coding() -> list[int]:
+        scores = await asyncio.gather(
+            *(
+                coding_question_assessment.ainvoke(
+                    {"question": question, "response": answer}
+                )
+                for question, answer in pairs
+            )
+        )
+        return [score.score for score in scores]
+
+    async def experience() -> int:
+        score = await experience_assessment.ainvoke(
+            {
+                "job_description": await document_store.resolve(
+                    values.get("job_description", "")
+                ),
+                "experience": values.get("experiences", []),
+                "projects": values.get("projects", []),
+                "chat_history": experience_messages,
+            }
+        )
+        return score.score
+
+    coding_scores, experience_score = await asyncio.gather(coding(), experience())
+    return {
+        "coding_scores": coding_scores,
+        # Same aggregation as coding_interviewer_node.
+        "coding_interview_score": (
+            sum(coding_scores) // len(coding_scores) if coding_scores else None
+        ),
+        "experience_interview_score": experience_score,
+    }
+
+
+class RescoreReport:
+    def __init__(self):
+        self.scored = 0
+        self.failed = 0
+        self.started = time.monotonic()
+
+    @property
+    def per_minute(self) -> float:
+        elapsed = time.monotonic() - self.started
+        return (self.scored + self.failed) * 60 / elapsed if elapsed else 0.0
+
+
+async def pending_threads(
+    pool: AsyncConnectionPool, run_id: str, page_size: int = 100
+) -> AsyncIterator[str]:
+    """Completed threads the run has not scored yet, one page at a time."""
+    after = ""
+    while True:
+        async with pool.connection() as conn:
+            cursor = await conn.execute(
+                PENDING_SQL, {"after": after, "run_id": run_id, "limit": page_size}
+            )
+            threads = [row[0] for row in await cursor.fetchall()]
+        for thread_id in threads:
+            yield thread_id
+        if len(threads) < page_size:
+            return
+        after = threads[-1]
+
+
+async def rescore_thread(
+    pool: AsyncConnectionPool,
+    checkpointer: BaseCheckpointSaver,
+    run_id: str,
+    thread_id: str,
+    report: RescoreReport,
+) -> None:
+    checkpoint = await checkpointer.aget_tuple(
+        {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    )
+    if checkpoint is None:
+        # Deleted by checkpoint maintenance in the meantime.
+        return
+    values = checkpoint.checkpoint["channel_values"]
+    row = {
+        "run_id": run_id,
+        "thread_id": thread_id,
+        "checkpoint_id": checkpoint.config["configurable"]["checkpoint_id"],
+        "coding_scores": None,
+        "coding_interview_score": None,
+        "experience_interview_score": None,
+        "original_coding_interview_score": values.get("coding_interview_score"),
+        "original_experience_interview_score": values.get("experience_interview_score"),
+        "models": Jsonb(
+            {
+                chain: MODEL_ROUTES[chain]["model"]
+                for chain in ("coding_question_assessment", "experience_assessment")
+            }
+        ),
+        "error": None,
+    }
+    try:
+        row.update(await score_interview(values))
+        row["coding_scores"] = Jsonb(row["coding_scores"])
+    except Exception as e:
+        # Recorded so the run does not retry it forever; delete the row to
+        # score the thread again.
+        logger.warning("Failed to re-score thread %s", thread_id, exc_info=True)
+        row["error"] = repr(e)
+    async with pool.connection() as conn:
+        await conn.execute(INSERT_SQL, row)
+    if row["error"] is None:
+        report.scored += 1
+    else:
+        report.failed += 1
+
+
+async def record_failure(
+    pool: AsyncConnectionPool, run_id: str, thread_id: str, error: Exception
+) -> None:
+    """Record a thread that could not be loaded or stored as failed."""
+    row = {
+        "run_id": run_id,
+        "thread_id": thread_id,
+        # Unknown when the checkpoint itself could not be read.
+        "checkpoint_id": "",
+        "coding_scores": None,
+        "coding_interview_score": None,
+        "experience_interview_score": None,
+        "original_coding_interview_score": None,
+        "original_experience_interview_score": None,
+        "models": Jsonb({}),
+        "error": repr(error),
+    }
+    async with pool.connection() as conn:
+        await conn.execute(INSERT_SQL, row)
+
+
+async def rescore(
+    pool: AsyncConnectionPool,
+    checkpointer: BaseCheckpointSaver,
+    run_id: str,
+    concurrency: int = 8,
+    limit: int | None = None,
+    progress_every: int = 50,
+) -> RescoreReport:
+    """Re-score every completed thread not yet scored by ``run_id``.
+
+    ``concurrency`` interviews are scored at once (the LLM calls also go
+    through the rate limits of :mod:`core.scheduler`); ``limit`` stops after
+    that many threads.
+    """
+    async with pool.connection() as conn:
+        await conn.execute(SETUP_SQL)
+    report = RescoreReport()
+    queue: asyncio.Queue[str | None] = asyncio.Queue(maxsize=concurrency * 2)
+
+    async def produce() -> None:
+        count = 0
+        async for thread_id in pending_threads(pool, run_id):
+            if limit is not None and count >= limit:
+                break
+            await queue.put(thread_id)
+            count += 1
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def work() -> None:
+        while (thread_id := await queue.get()) is not None:
+            try:
+                await rescore_thread(pool, checkpointer, run_id, thread_id, report)
+            except Exception as e:
+                # One broken thread must not stop the worker and the run.
+                logger.warning("Failed to re-score thread %s", thread_id, exc_info=True)
+                report.failed += 1
+                try:
+                    await record_failure(pool, run_id, thread_id, e)
+                except psycopg.Error:
+                    logger.warning(
+                        "Failed to record thread %s", thread_id, exc_info=True
+                    )
+            done = report.scored + report.failed
+            if progress_every and done % progress_every == 0:
+                logger.info(
+                    "Re-scored %d interviews, %.1f per minute", done, report.per_minute
+                )
+
+    await asyncio.gather(produce(), *(work() for _ in range(concurrency)))
+    return report
+
+
+async def rescore_stats(pool: AsyncConnectionPool, run_id: str) -> dict:
+    async with pool.connection() as conn:
+        await conn.execute(SETUP_SQL)
+        cursor = await conn.execute(STATS_SQL, (run_id,))
+        (
+            count,
+            errors,
+            coding_delta,
+            experience_delta,
+            first,
+            last,
+        ) = await cursor.fetchone()
+    return {
+        "interviews": count,
+        "errors": errors,
+        "mean_coding_delta": float(coding_delta) if coding_delta is not None else None,
+        "mean_experience_delta": (
+            float(experience_delta) if experience_delta is not None else None
+        ),
+        "started": first,
+        "finished": last,
+    }
@@ -1,38 +1,222 @@
-from langchain_groq import ChatGroq
+from collections.abc import Callable
+from typing import Any
 
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from core.config import env_bool, env_float, env_int, env_str
+from core.fake_llm import fake_chat_model
+from core.llm_cache import llm_cache
+from core.metrics import llm_metrics
 from core.prompts import (
     coding_question_assessment_promt,
+    conversation_summarizer_prompt,
     expereince_interviewer_prompt,
+    experience_assessment_prompt,
     generate_coding_question_prompt,
+    generate_new_coding_question_prompt,
     job_description_parser_prompt,
     resume_breaker_prompt,
 )
+from core.scheduler import BATCH, INTERACTIVE, scheduled
 from schemas.llm_responses import (
     CodingInterviewScore,
     CodingQuestions,
+    ConversationSummary,
     ExperienceInterviewQuestion,
+    ExperienceInterviewScore,
     JobDescription,
     Resume,
 )
 
 # TODO: improve all prompts
 # TODO: rather than importing all the prompts create a getter function
-llm = ChatGroq(model="llama-3.3-70b-specdec")
+DEFAULT_MODEL = "llama-3.3-70b-specdec"
+
+# Extraction and 1-10 scoring do not need a 70B model.
+DEFAULT_MODELS = {
+    "job_description_parser": "llama-3.1-8b-instant",
+    "coding_question_assessment": "llama-3.1-8b-instant",
+}
+
+
+# Chains whose answers depend only on their input. The interviewers are
+# conversational and must not repeat themselves.
+CACHED_CHAINS = {"resume_breaker", "job_description_parser", "generate_coding_question"}
+
+
+def model_route(chain: str) -> dict:
+    """Model settings of ``chain`` from ``LLM_<CHAIN>_*`` environment variables.
+
+    ``LLM_MODEL`` overrides the default model of every chain without a
+    model of its own; max tokens and timeout are unset by default, and
+    ``LLM_<CHAIN>_CACHE`` turns the response cache on or off.
+    """
+    prefix = f"LLM_{chain.upper()}_"
+    return {
+        "model": env_str(prefix + "MODEL")
+        or DEFAULT_MODELS.get(chain)
+        or env_str("LLM_MODEL", DEFAULT_MODEL),
+        "max_tokens": env_int(prefix + "MAX_TOKENS", 0) or None,
+        "timeout": env_float(prefix + "TIMEOUT", 0) or None,
+        "fallback_model": env_str(prefix + "FALLBACK_MODEL") or None,
+        "cache": env_bool(prefix + "CACHE", chain in CACHED_CHAINS),
+    }
+
+
+# Recorded in the interview state so latency and cost can be compared
+# across configurations.
+MODEL_ROUTES = {
+    chain: model_route(chain)
+    for chain in (
+        "resume_breaker",
+        "job_description_parser",
+        "generate_coding_question",
+        "coding_question_assessment",
+        "experience_interviewer",
+        "conversation_summarizer",
+        "experience_assessment",
+    )
+}
+
+
+def structured_llm(chain: str, schema: type, cache: bool | None = None) -> Runnable:
+    """The routed model of ``chain`` with ``schema`` as structured output.
+
+    With a fallback model configured, a call that fails on the primary
+    model (rate limited, or slower than the chain's timeout) is repeated on
+    the fallback. ``cache`` overrides the route's response cache setting.
+    """
+    route = MODEL_ROUTES[chain]
+    if cache is None:
+        cache = route["cache"]
+
+    def build(model: str) -> Runnable:
+        # Retries are left to the scheduler so a 429 goes back through the
+        # rate limiter instead of being retried blindly by the client.
+        response_cache = llm_cache if cache else False
+        if env_str("LLM_BACKEND", "groq") == "fake":
+            llm = fake_chat_model(model, cache=response_cache, callbacks=[llm_metrics])
+        else:
+            from langchain_groq import ChatGroq
+
+            llm = ChatGroq(
+                model=model,
+                max_tokens=route["max_tokens"],
+                timeout=route["timeout"],
+                max_retries=0,
+                cache=response_cache,
+                callbacks=[llm_metrics],
+            )
+        return llm.with_structured_output(schema)
+
+    llm = build(route["model"])
+    if route["fallback_model"]:
+        llm = llm.with_fallbacks([build(route["fallback_model"])])
+    return llm
+
+
+class LazyRunnable(Runnable):
+    """A runnable built by ``build`` on first use.
+
+    Creating the model clients (and importing ``langchain_groq``) is left
+    out of module import, so a worker starts serving before the chains are
+    needed; :func:`warm_up` builds them ahead of the first interview.
+    """
+
+    def __init__(self, build: Callable[[], Runnable]):
+        self._build = build
+        self._runnable: Runnable | None = None
+
+    @property
+    def runnable(self) -> Runnable:
+        if self._runnable is None:
+            self._runnable = self._build()
+        return self._runnable
+
+    def invoke(
+        self, input: Any, config: RunnableConfig | None = None, **kwargs: Any
+    ) -> Any:
+        return self.runnable.invoke(input, config, **kwargs)
 
-resume_breaker = resume_breaker_prompt | llm.with_structured_output(Resume)
+    async def ainvoke(
+        self, input: Any, config: RunnableConfig | None = None, **kwargs: Any
+    ) -> Any:
+        return await self.runnable.ainvoke(input, config, **kwargs)
 
-job_description_parser = job_description_parser_prompt | llm.with_structured_output(
-    JobDescription
+
+_chains: list[LazyRunnable] = []
+
+
+def chain(
+    prompt: Runnable,
+    name: str,
+    schema: type,
+    priority: int,
+    cache: bool | None = None,
+) -> Runnable:
+    """``prompt`` into the routed model of ``name``, run through the scheduler."""
+    runnable = LazyRunnable(lambda: prompt | structured_llm(name, schema, cache))
+    _chains.append(runnable)
+    return scheduled(runnable, name, priority)
+
+
+def warm_up() -> None:
+    """Build every chain and its model clients now instead of on first use."""
+    for runnable in _chains:
+        runnable.runnable
+
+
+# Parsing runs in the background of /start; everything the candidate is
+# waiting on right now is interactive.
+resume_breaker = chain(resume_breaker_prompt, "resume_breaker", Resume, BATCH)
+
+job_description_parser = chain(
+    job_description_parser_prompt, "job_description_parser", JobDescription, BATCH
 )
 
-generate_coding_question = generate_coding_question_prompt | llm.with_structured_output(
-    CodingQuestions
+generate_coding_question = chain(
+    generate_coding_question_prompt,
+    "generate_coding_question",
+    CodingQuestions,
+    INTERACTIVE,
+)
+
+# The question bank CLI asks for new questions about the same skill again
+# and again, so the response cache must not answer for the model.
+generate_new_coding_question = chain(
+    generate_new_coding_question_prompt,
+    "generate_coding_question",
+    CodingQuestions,
+    BATCH,
+    cache=False,
+)
+
+coding_question_assessment = chain(
+    coding_question_assessment_promt,
+    "coding_question_assessment",
+    CodingInterviewScore,
+    INTERACTIVE,
+)
+
+experience_interviewer = chain(
+    expereince_interviewer_prompt,
+    "experience_interviewer",
+    ExperienceInterviewQuestion,
+    INTERACTIVE,
 )
 
-coding_question_assessment = (
-    coding_question_assessment_promt | llm.with_structured_output(CodingInterviewScore)
+conversation_summarizer = chain(
+    conversation_summarizer_prompt,
+    "conversation_summarizer",
+    ConversationSummary,
+    INTERACTIVE,
 )
 
-experience_interviewer = expereince_interviewer_prompt | llm.with_structured_output(
-    ExperienceInterviewQuestion
+# Scores a finished experience interview from its transcript; used by
+# offline re-scoring only.
+experience_assessment = chain(
+    experience_assessment_prompt,
+    "experience_assessment",
+    ExperienceInterviewScore,
+    BATCH,
 )
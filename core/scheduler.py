@@ -0,0 +1,306 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+
+from core.config import env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+INTERACTIVE = 0
+BATCH = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BATCH: "batch"}
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``per_minute`` tokens a minute.
+
+    A rate of 0 disables the limit.
+    """
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float) -> float:
+        """Seconds until ``amount`` tokens are available."""
+        if not self.rate:
+            return 0.0
+        self._refill()
+        # A single request larger than the bucket waits for a full bucket.
+        amount = min(amount, self.capacity)
+        return max(amount - self.tokens, 0.0) / self.rate
+
+    def consume(self, amount: float) -> None:
+        if self.rate:
+            self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, amount: float) -> None:
+        """Give back (or, when negative, take) ``amount`` tokens."""
+        if self.rate:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class UsageRecorder(BaseCallbackHandler):
+    """Token usage reported by the model calls of one scheduled call."""
+
+    run_inline = True
+
+    def __init__(self):
+        self.calls = 0
+        self.completion_tokens = 0
+        self._pending: int | None = None
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(
+                    getattr(generation, "message", None), "usage_metadata", None
+                )
+                if usage:
+                    self.calls += 1
+                    self.completion_tokens += usage["output_tokens"]
+                    self._pending = (self._pending or 0) + usage["total_tokens"]
+
+    def take(self) -> int | None:
+        """Tokens reported since the last call, ``None`` if nothing was."""
+        pending, self._pending = self._pending, None
+        return pending
+
+
+def _is_retryable(error: Exception) -> bool:
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(error, "response", None), "status_code", None)
+    if status_code is not None:
+        return status_code == 429 or status_code >= 500
+    return type(error).__name__ in ("APITimeoutError", "APIConnectionError")
+
+
+def _retry_after(error: Exception) -> float | None:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers["retry-after"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class LLMScheduler:
+    """Admit LLM calls under RPM/TPM limits, interactive calls first.
+
+    Waiting calls are served strictly by priority and then arrival order, so
+    a burst of batch parsing never delays a candidate's next question longer
+    than the call currently at the head of the queue. Calls failing with a
+    rate limit, timeout or server error are retried with full-jitter
+    exponential backoff (or the server's ``Retry-After``), going through the
+    queue again each time.
+
+    Each call reserves an estimate of its tokens when it is admitted; with a
+    :class:`UsageRecorder` the difference to the usage the model reports is
+    given back or charged once the call has finished.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = 30,
+        tokens_per_minute: float = 20000,
+        max_concurrency: int = 8,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 20.0,
+    ):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.running = 0
+        self._queue: list[tuple[int, int, float, asyncio.Future]] = []
+        self._counter = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+        self._metrics = {
+            priority: {
+                "requests": 0,
+                "retries": 0,
+                "failures": 0,
+                "tokens_reserved": 0,
+                "tokens_used": 0,
+                "wait_seconds": deque(maxlen=1000),
+            }
+            for priority in PRIORITY_NAMES
+        }
+
+    async def run(
+        self,
+        priority: int,
+        tokens: int,
+        call: Callable[[], Awaitable[T]],
+        usage: UsageRecorder | None = None,
+    ) -> T:
+        metrics = self._metrics[priority]
+        metrics["requests"] += 1
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            await self._acquire(priority, tokens)
+            metrics["wait_seconds"].append(time.monotonic() - started)
+            metrics["tokens_reserved"] += tokens
+            try:
+                return await call()
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    metrics["failures"] += 1
+                    raise
+                delay = _retry_after(e) or random.uniform(
+                    0, min(self.backoff_max, self.backoff_base * 2**attempt)
+                )
+                attempt += 1
+                metrics["retries"] += 1
+                logger.warning(
+                    "LLM call failed (%s), retry %d in %.2fs", e, attempt, delay
+                )
+            finally:
+                used = usage.take() if usage is not None else None
+                if used is not None:
+                    metrics["tokens_used"] += used
+                    self.tokens.adjust(tokens - used)
+                self.running -= 1
+                self._dispatch()
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        stats: dict[str, Any] = {
+            "running": self.running,
+            "queue_depth": len(self._queue),
+        }
+        for priority, metrics in self._metrics.items():
+            waits = sorted(metrics["wait_seconds"])
+            stats[PRIORITY_NAMES[priority]] = {
+                "queued": sum(1 for item in self._queue if item[0] == priority),
+                "requests": metrics["requests"],
+                "retries": metrics["retries"],
+                "failures": metrics["failures"],
+                "tokens_reserved": metrics["tokens_reserved"],
+                "tokens_used": metrics["tokens_used"],
+                "wait_p50": round(waits[len(waits) // 2], 3) if waits else 0.0,
+                "wait_p95": round(waits[int(len(waits) * 0.95)], 3) if waits else 0.0,
+                "wait_max": round(waits[-1], 3) if waits else 0.0,
+            }
+        return stats
+
+    async def _acquire(self, priority: int, tokens: int) -> None:
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._counter), tokens, future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted just before the cancellation: give the slot back.
+                self.running -= 1
+                self._dispatch()
+            raise
+
+    def _dispatch(self) -> None:
+        while self._queue and self.running < self.max_concurrency:
+            _, _, tokens, future = self._queue[0]
+            if future.done():
+                heapq.heappop(self._queue)
+                continue
+            delay = max(self.requests.delay(1), self.tokens.delay(tokens))
+            if delay > 0:
+                # The head may have changed, e.g. to an interactive call that
+                # needs fewer tokens: never wait longer than it has to.
+                loop = asyncio.get_running_loop()
+                when = loop.time() + delay
+                if self._timer is None or when < self._timer.when():
+                    if self._timer is not None:
+                        self._timer.cancel()
+                    self._timer = loop.call_at(when, self._on_timer)
+                return
+            heapq.heappop(self._queue)
+            self.requests.consume(1)
+            self.tokens.consume(tokens)
+            self.running += 1
+            future.set_result(None)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._dispatch()
+
+
+llm_scheduler = LLMScheduler(
+    requests_per_minute=env_float("LLM_REQUESTS_PER_MINUTE", 30),
+    # One interview uses about 5k tokens, 2.5k of them to start; this leaves
+    # room for a few interviews starting at once.
+    tokens_per_minute=env_float("LLM_TOKENS_PER_MINUTE", 20000),
+    max_concurrency=env_int("LLM_MAX_CONCURRENCY", 8),
+    max_retries=env_int("LLM_MAX_RETRIES", 4),
+    backoff_base=env_float("LLM_BACKOFF_BASE", 0.5),
+    backoff_max=env_float("LLM_BACKOFF_MAX", 20.0),
+)
+
+
+def estimate_tokens(input: Any, completion_tokens: int = 512) -> int:
+    """Rough token cost of a call: ~4 characters per prompt token."""
+    return len(str(input)) // 4 + completion_tokens
+
+
+def _with_handler(config: RunnableConfig, handler: BaseCallbackHandler) -> dict:
+    """``config`` with ``handler`` added to its callbacks."""
+    callbacks = config.get("callbacks")
+    if callbacks is None:
+        callbacks = [handler]
+    elif isinstance(callbacks, list):
+        callbacks = [*callbacks, handler]
+    else:
+        callbacks = callbacks.copy()
+        callbacks.add_handler(handler, inherit=True)
+    return {**config, "callbacks": callbacks}
+
+
+def scheduled(runnable: Runnable, name: str, priority: int) -> Runnable:
+    """Run ``runnable`` through the shared :data:`llm_scheduler`.
+
+    The completion tokens reserved for a call are the chain's average so
+    far, 512 until the first call has reported its usage.
+    """
+    completion = {"calls": 0, "tokens": 0}
+
+    async def call(input: Any, config: RunnableConfig) -> Any:
+        usage = UsageRecorder()
+        expected = (
+            completion["tokens"] // completion["calls"] if completion["calls"] else 512
+        )
+        try:
+            return await llm_scheduler.run(
+                priority,
+                estimate_tokens(input, expected),
+                lambda: runnable.ainvoke(input, _with_handler(config, usage)),
+                usage,
+            )
+        finally:
+            completion["calls"] += usage.calls
+            completion["tokens"] += usage.completion_tokens
+
+    return RunnableLambda(call, name=name)
@@ -1,29 +1,71 @@
-import os
+from typing import TYPE_CHECKING
 
-import fitz
-import psycopg
-from langchain_community.document_loaders import WebBaseLoader
-from langgraph.checkpoint.postgres.base import BasePostgresSaver
-from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from psycopg_pool import AsyncConnectionPool
 
+from core.config import env_float, env_int, env_str
 
-def parse_pdf(file: __file__) -> str:
-    pdf_docs = fitz.open(file, filetype="pdf")
-    text = " ".join(page.get_text("text") for page in pdf_docs)
-    return text
+if TYPE_CHECKING:
+    from langgraph.checkpoint.postgres.base import BasePostgresSaver
 
 
-def parse_link(link: str) -> str:
-    docs = WebBaseLoader(link).load()
-    text = " ".join(doc.page_content for doc in docs)
-    return text
+async def get_connection_pool() -> AsyncConnectionPool:
+    """Open the process-wide Postgres pool used by the checkpointer."""
+    pool = AsyncConnectionPool(
+        conninfo=env_str("POSTGRES_DB_URL"),
+        min_size=env_int("POSTGRES_POOL_MIN_SIZE", 1),
+        max_size=env_int("POSTGRES_POOL_MAX_SIZE", 10),
+        timeout=env_float("POSTGRES_POOL_TIMEOUT", 30.0),
+        max_idle=env_float("POSTGRES_POOL_MAX_IDLE", 600.0),
+        max_lifetime=env_float("POSTGRES_POOL_MAX_LIFETIME", 3600.0),
+        # prepare_threshold=0 prepares every statement on its first execution;
+        # multi-statement scripts must be run with prepare=False.
+        kwargs={"autocommit": True, "prepare_threshold": 0},
+        open=False,
+    )
+    await pool.open(wait=True)
+    return pool
 
 
-async def get_checkpointer() -> BasePostgresSaver:
-    conn = await psycopg.AsyncConnection.connect(
-        os.environ.get("POSTGRES_DB_URL"), autocommit=True
-    )
-    checkpointer = AsyncPostgresSaver(conn)
+async def get_checkpointer(pool: AsyncConnectionPool) -> "BasePostgresSaver":
+    """Create the checkpointer on top of the shared pool.
+
+    ``setup()`` runs the migrations, so call this once at startup only.
+    """
+    # Imported here so the in-memory checkpointer does not load it.
+    from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+
+    checkpointer = AsyncPostgresSaver(pool)
     await checkpointer.setup()
 
     return checkpointer
+
+
+LATEST_CHECKPOINT_SQL = """
+SELECT checkpoint_id FROM checkpoints
+WHERE thread_id = %s AND checkpoint_ns = ''
+ORDER BY checkpoint_id DESC
+LIMIT 1
+"""
+
+
+async def get_latest_checkpoint_id(
+    pool: AsyncConnectionPool, thread_id: str
+) -> str | None:
+    """Id of the thread's newest checkpoint, without loading its blobs."""
+    async with pool.connection() as conn:
+        cursor = await conn.execute(LATEST_CHECKPOINT_SQL, (thread_id,))
+        row = await cursor.fetchone()
+    return row[0] if row else None
+
+
+def get_pool_stats(pool: AsyncConnectionPool) -> dict:
+    stats = pool.get_stats()
+    in_use = stats.get("pool_size", 0) - stats.get("pool_available", 0)
+    return {
+        "size": stats.get("pool_size", 0),
+        "max_size": pool.max_size,
+        "in_use": in_use,
+        "available": stats.get("pool_available", 0),
+        "requests_waiting": stats.get("requests_waiting", 0),
+        "saturation": round(in_use / pool.max_size, 3) if pool.max_size else 0.0,
+    }
@@ -1,6 +1,7 @@
 from schemas.llm_responses import (
     CodingInterviewScore,
     CodingQuestions,
+    ConversationSummary,
     Experience,
     ExperienceInterviewQuestion,
     ExperienceInterviewScore,
@@ -9,8 +10,10 @@ from schemas.llm_responses import (
     Resume,
 )
 from schemas.schema import (
+    BatchStartInput,
     ChatHistory,
     ChatHistoryInput,
+    ExportInput,
     StartInput,
     StateInput,
     UserInput,
@@ -25,9 +28,12 @@ __all__ = [
     "CodingInterviewScore",
     "ExperienceInterviewScore",
     "ExperienceInterviewQuestion",
+    "ConversationSummary",
     "StartInput",
+    "BatchStartInput",
     "UserInput",
     "ChatHistoryInput",
     "StateInput",
     "ChatHistory",
+    "ExportInput",
 ]
@@ -51,6 +51,15 @@ class ExperienceInterviewScore(BaseModel):
     score: int = Field(description="The score of the candidate's response.")
 
 
+class ConversationSummary(BaseModel):
+    """Schema for a running summary of an interview conversation."""
+
+    summary: str = Field(
+        description="A concise summary of the conversation so far, keeping the "
+        "questions asked, the candidate's key claims and any open follow ups."
+    )
+
+
 class ExperienceInterviewQuestion(BaseModel):
     """Schema for an experience interview."""
 
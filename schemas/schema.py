@@ -1,6 +1,8 @@
+from datetime import datetime
+from typing import Literal
+
 from langchain_core.messages import BaseMessage
 from pydantic import BaseModel, Field
-from fastapi import UploadFile
 
 
 class StartInput(BaseModel):
@@ -13,15 +15,27 @@ class StartInput(BaseModel):
             "Software Engineer at Google...",
         ],
     )
-    resume: UploadFile | str = Field(
-        description="Resume file in PDF format or as plain text"
+    resume: str = Field(
+        description="Resume as plain text. PDF resumes are uploaded to /start/upload."
     )
     thread_id: str | None = Field(
         description="Thread ID to persist and continue a multi-turn conversation.",
         default=None,
         examples=["847c6285-8fc9-4560-a83f-4e6285809254"],
     )
-    # TODO: add more formats support like .docx, etc or str
+
+
+class BatchStartInput(BaseModel):
+    """Input for starting interviews of many candidates for the same job."""
+
+    job_description: str = Field(
+        description="Job description shared by every interview. Can be a URL or plain text.",
+        examples=["https://example.com/job-description"],
+    )
+    resumes: list[str] = Field(
+        description="Plain text resumes, one interview is started per resume.",
+        min_length=1,
+    )
 
 
 class UserInput(BaseModel):
@@ -52,6 +66,16 @@ class ChatHistoryInput(BaseModel):
         description="Thread ID to persist and continue a multi-turn conversation.",
         examples=["847c6285-8fc9-4560-a83f-4e6285809254"],
     )
+    since: int = Field(
+        description="Index of the first message to return, e.g. next_since of the previous page.",
+        default=0,
+        ge=0,
+    )
+    limit: int | None = Field(
+        description="Maximum number of messages to return; all of them by default.",
+        default=None,
+        ge=1,
+    )
 
 
 class StateInput(BaseModel):
@@ -61,6 +85,40 @@ class StateInput(BaseModel):
         description="Thread ID to persist and continue a multi-turn conversation.",
         examples=["847c6285-8fc9-4560-a83f-4e6285809254"],
     )
+    fields: list[str] | None = Field(
+        description="State fields to return instead of the whole snapshot.",
+        default=None,
+        examples=[["coding_interview_score", "experience_interview_score"]],
+    )
+
+
+class ExportInput(BaseModel):
+    """Input for exporting interview results in bulk."""
+
+    fields: list[str] | None = Field(
+        description=(
+            "State fields to export per thread, or message_count. Defaults to the "
+            "skills, the coding and experience scores and the message count."
+        ),
+        default=None,
+        examples=[["coding_interview_score", "experience_interview_score"]],
+    )
+    since: datetime | None = Field(
+        description="Only threads last updated at or after this time.", default=None
+    )
+    until: datetime | None = Field(
+        description="Only threads last updated before this time.", default=None
+    )
+    status: Literal["completed", "in_progress"] | None = Field(
+        description="Only completed or only unfinished interviews; both by default.",
+        default=None,
+    )
+
 
 class ChatHistory(BaseModel):
     messages: list[BaseMessage]
+    next_since: int = Field(
+        description="Pass as since to get only the messages after this page.",
+        default=0,
+    )
+    total: int = Field(description="Number of messages in the thread.", default=0)
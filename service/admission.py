@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from collections.abc import AsyncGenerator, AsyncIterator
+
+from core.config import env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+TURN = "turn"
+START = "start"
+
+
+class Overloaded(Exception):
+    """Raised when a graph execution is not admitted.
+
+    ``status_code`` is 429 for new interviews and 503 for turns of running
+    ones; ``retry_after`` is the suggested delay in whole seconds.
+    """
+
+    def __init__(self, kind: str, retry_after: int):
+        self.kind = kind
+        self.status_code = 429 if kind == START else 503
+        self.retry_after = retry_after
+        super().__init__(f"Too many concurrent {kind} requests")
+
+
+class AdmissionController:
+    """Cap the graph executions running at once in this process.
+
+    Up to ``max_concurrency`` executions run; the rest wait in a bounded
+    queue for at most ``queue_timeout`` seconds and are rejected with
+    :class:`Overloaded` when the queue is full. Turns of interviews already
+    in progress are served first: new interviews may only take
+    ``max_start_queue`` places in the queue, and a turn arriving at a full
+    queue displaces the most recently queued new interview.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 32,
+        max_queue: int = 64,
+        max_start_queue: int = 16,
+        queue_timeout: float = 10.0,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_start_queue = max_start_queue
+        self.queue_timeout = queue_timeout
+        self.running = 0
+        self._waiters: dict[str, deque[asyncio.Future]] = {
+            TURN: deque(),
+            START: deque(),
+        }
+        self._durations: deque[float] = deque(maxlen=100)
+        self._metrics = {
+            kind: {
+                "admitted": 0,
+                "rejected": 0,
+                "shed": 0,
+                "wait_seconds": deque(maxlen=1000),
+            }
+            for kind in (TURN, START)
+        }
+
+    @property
+    def queued(self) -> int:
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    async def acquire(self, kind: str) -> None:
+        """Wait for an execution slot; raises :class:`Overloaded` if refused."""
+        metrics = self._metrics[kind]
+        if self.max_concurrency <= 0 or (
+            self.running < self.max_concurrency and not self.queued
+        ):
+            self.running += 1
+            metrics["admitted"] += 1
+            metrics["wait_seconds"].append(0.0)
+            return
+
+        starts = self._waiters[START]
+        if kind == START and len(starts) >= self.max_start_queue:
+            self._reject(kind)
+        if self.queued >= self.max_queue:
+            if kind == START or not starts:
+                self._reject(kind)
+            self._shed(starts.pop())
+
+        started = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[kind].append(future)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except TimeoutError:
+            if not future.done():
+                self._waiters[kind].remove(future)
+                future.cancel()
+                self._reject(kind)
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled() and not future.exception():
+                self.release()
+            elif not future.done():
+                self._waiters[kind].remove(future)
+                future.cancel()
+            raise
+        # Shed while waiting: raises the Overloaded set on the future.
+        future.result()
+        metrics["admitted"] += 1
+        metrics["wait_seconds"].append(time.monotonic() - started)
+
+    def release(self, duration: float | None = None) -> None:
+        if duration is not None:
+            self._durations.append(duration)
+        self.running -= 1
+        for kind in (TURN, START):
+            waiters = self._waiters[kind]
+            while waiters and self.running < self.max_concurrency:
+                future = waiters.popleft()
+                if not future.done():
+                    self.running += 1
+                    future.set_result(None)
+
+    async def hold(self, frames: AsyncIterator[str]) -> AsyncGenerator[str, None]:
+        """Yield ``frames`` and release the slot once they are exhausted."""
+        started = time.monotonic()
+        try:
+            async for frame in frames:
+                yield frame
+        finally:
+            self.release(time.monotonic() - started)
+
+    def retry_after(self) -> int:
+        """Seconds until the queue is expected to have drained."""
+        if not self._durations or self.max_concurrency <= 0:
+            return 1
+        average = sum(self._durations) / len(self._durations)
+        drain = average * (self.queued + 1) / self.max_concurrency
+        return min(max(math.ceil(drain), 1), 60)
+
+    def stats(self) -> dict:
+        stats: dict = {"running": self.running, "queued": self.queued}
+        for kind, metrics in self._metrics.items():
+            waits = sorted(metrics["wait_seconds"])
+            stats[kind] = {
+                "queued": len(self._waiters[kind]),
+                "admitted": metrics["admitted"],
+                "rejected": metrics["rejected"],
+                "shed": metrics["shed"],
+                "wait_p50": round(waits[len(waits) // 2], 3) if waits else 0.0,
+                "wait_p95": round(waits[int(len(waits) * 0.95)], 3) if waits else 0.0,
+                "wait_max": round(waits[-1], 3) if waits else 0.0,
+            }
+        return stats
+
+    def _reject(self, kind: str) -> None:
+        self._metrics[kind]["rejected"] += 1
+        logger.warning(
+            "Rejecting %s request: %d running, %d queued",
+            kind,
+            self.running,
+            self.queued,
+        )
+        raise Overloaded(kind, self.retry_after())
+
+    def _shed(self, future: asyncio.Future) -> None:
+        self._metrics[START]["shed"] += 1
+        logger.warning("Shedding a queued start request for a running interview")
+        future.set_exception(Overloaded(START, self.retry_after()))
+
+
+admission = AdmissionController(
+    max_concurrency=env_int("ADMISSION_MAX_CONCURRENCY", 32),
+    max_queue=env_int("ADMISSION_MAX_QUEUE", 64),
+    max_start_queue=env_int("ADMISSION_MAX_START_QUEUE", 16),
+    queue_timeout=env_float("ADMISSION_QUEUE_TIMEOUT", 10.0),
+)
@@ -0,0 +1,167 @@
+import asyncio
+import json
+import logging
+import time
+from collections.abc import AsyncGenerator
+from uuid import uuid4
+
+from fastapi import APIRouter, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import StreamingResponse
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph.state import CompiledStateGraph
+
+from core.config import env_int
+from core.documents import document_store
+from core.durability import end_run
+from core.ingestion import ingestor
+from core.parse_cache import parse_cache
+from core.parsing import parse_job_description
+from schemas import BatchStartInput, JobDescription
+from service.admission import START, Overloaded, admission
+from service.uploads import read_upload
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+async def prepare_job_description(job_description: str) -> str:
+    """Fetch a job description URL and parse the text once for the batch.
+
+    The parse lands in the parse cache, so ``parser_node`` of every interview
+    of the batch reads it from there instead of calling the LLM again.
+    """
+    if job_description.startswith("https://"):
+        job_description = await ingestor.fetch_text(job_description)
+    await parse_cache.aget_or_parse(
+        "job_description",
+        job_description,
+        JobDescription,
+        lambda: parse_job_description(job_description),
+    )
+    return job_description
+
+
+async def start_interview(
+    agent: CompiledStateGraph, index: int, job_description: str, resume: str
+) -> dict:
+    """Run a new interview up to its first question; returns its status line."""
+    thread_id = str(uuid4())
+    try:
+        await admission.acquire(START)
+    except Overloaded as e:
+        return {"index": index, "status": "rejected", "retry_after": e.retry_after}
+    started = time.monotonic()
+    try:
+        result = await agent.ainvoke(
+            await document_store.put_many(
+                thread_id, job_description=job_description, resume=resume
+            ),
+            config=RunnableConfig(configurable={"thread_id": thread_id}),
+        )
+        await end_run(agent.checkpointer, thread_id)
+    except Exception:
+        logger.error("Failed to start interview %s of a batch", index, exc_info=True)
+        return {"index": index, "thread_id": thread_id, "status": "failed"}
+    finally:
+        admission.release(time.monotonic() - started)
+    question = next(
+        (m.content for m in reversed(result.get("messages", [])) if m.type == "ai"),
+        None,
+    )
+    return {
+        "index": index,
+        "thread_id": thread_id,
+        "status": "ready",
+        "question": question,
+    }
+
+
+async def batch_lines(
+    agent: CompiledStateGraph, job_description: str, resumes: list[str | None]
+) -> AsyncGenerator[str, None]:
+    """Start every interview, yielding one NDJSON line per candidate as it is
+    ready. A ``None`` resume could not be read and is reported as failed.
+
+    At most ``BATCH_START_CONCURRENCY`` interviews are started at once. If the
+    client goes away the interviews not started yet are cancelled.
+    """
+    semaphore = asyncio.Semaphore(env_int("BATCH_START_CONCURRENCY", 4))
+
+    async def bounded(index: int, resume: str | None) -> dict:
+        if resume is None:
+            return {"index": index, "status": "failed"}
+        async with semaphore:
+            return await start_interview(agent, index, job_description, resume)
+
+    tasks = [
+        asyncio.create_task(bounded(index, resume))
+        for index, resume in enumerate(resumes)
+    ]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield json.dumps(await task) + "\n"
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def check_batch_size(count: int) -> None:
+    max_resumes = env_int("BATCH_MAX_RESUMES", 100)
+    if count > max_resumes:
+        raise HTTPException(
+            status_code=413, detail=f"At most {max_resumes} resumes per batch"
+        )
+
+
+async def batch_response(
+    request: Request, job_description: str, resumes: list[str | None]
+) -> StreamingResponse:
+    try:
+        job_description = await prepare_job_description(job_description)
+    except Exception as e:
+        logger.error(f"Failed to parse the batch job description: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Unexpected error")
+    return StreamingResponse(
+        batch_lines(request.app.state.agent, job_description, resumes),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.post("/start/batch", response_class=StreamingResponse)
+async def start_batch(batch_input: BatchStartInput, request: Request):
+    """Start one interview per resume for a shared job description.
+
+    The job description is fetched and parsed once, the interviews are run up
+    to their first question concurrently, and the response streams one JSON
+    line per candidate as it finishes, in completion order:
+    ``{"index", "thread_id", "status", "question"}`` with status ``ready``,
+    ``failed`` or ``rejected`` (with ``retry_after``) under overload.
+    """
+    logger.info(f"Starting a batch of {len(batch_input.resumes)} interviews")
+    check_batch_size(len(batch_input.resumes))
+    return await batch_response(
+        request, batch_input.job_description, batch_input.resumes
+    )
+
+
+@router.post("/start/batch/upload", response_class=StreamingResponse)
+async def start_batch_upload(
+    request: Request,
+    job_description: str = Form(),
+    resumes: list[UploadFile] = File(),
+):
+    """:func:`start_batch` for resume files: PDFs, or plain text otherwise."""
+    logger.info(f"Starting a batch of {len(resumes)} uploaded interviews")
+    check_batch_size(len(resumes))
+
+    async def read(upload: UploadFile) -> str | None:
+        try:
+            return await read_upload(upload)
+        except Exception:
+            logger.warning(f"Could not read resume {upload.filename}", exc_info=True)
+            return None
+
+    # PDFs are extracted in the ingestion process pool, several at a time.
+    texts = await asyncio.gather(*(read(upload) for upload in resumes))
+    return await batch_response(request, job_description, texts)
@@ -0,0 +1,307 @@
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from collections.abc import AsyncGenerator, AsyncIterator
+
+import psycopg
+from psycopg_pool import AsyncConnectionPool
+
+from core.config import env_int
+
+logger = logging.getLogger(__name__)
+
+SETUP_SQL = """
+CREATE TABLE IF NOT EXISTS sse_replay_frames (
+    thread_id TEXT NOT NULL,
+    event_id BIGINT NOT NULL,
+    frame TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (thread_id, event_id)
+);
+CREATE INDEX IF NOT EXISTS sse_replay_frames_created_at_idx
+    ON sse_replay_frames (created_at);
+"""
+
+INSERT_SQL = """
+INSERT INTO sse_replay_frames (thread_id, event_id, frame)
+VALUES (%s, %s, %s)
+ON CONFLICT (thread_id, event_id) DO NOTHING
+"""
+
+TRIM_SQL = """
+DELETE FROM sse_replay_frames
+WHERE thread_id = %s AND event_id < %s AND event_id <> %s
+"""
+
+LAST_ID_SQL = """
+SELECT COALESCE(MAX(event_id), 0) FROM sse_replay_frames WHERE thread_id = %s
+"""
+
+SELECT_SQL = """
+SELECT event_id, frame FROM sse_replay_frames
+WHERE thread_id = %s AND event_id >= %s
+ORDER BY event_id
+"""
+
+# Last frame of every run, see service.service.message_generator.
+END_FRAME = "data: [DONE]\n\n"
+
+
+class ReplayGone(Exception):
+    """The frames after the requested event id are no longer buffered."""
+
+
+class TurnRunning(Exception):
+    """A turn is already running for the thread."""
+
+
+class TurnStream:
+    """The SSE frames of the latest run on a thread, shared by its readers."""
+
+    def __init__(self, thread_id: str, first_id: int, max_frames: int):
+        self.thread_id = thread_id
+        self.first_id = first_id
+        self.next_id = first_id
+        self.frames: deque[tuple[int, str]] = deque(maxlen=max_frames)
+        self.done = False
+        self.task: asyncio.Task | None = None
+        self._changed = asyncio.Condition()
+
+    async def append(self, frame: str) -> None:
+        async with self._changed:
+            self.frames.append((self.next_id, frame))
+            self.next_id += 1
+            self._changed.notify_all()
+
+    async def finish(self) -> None:
+        async with self._changed:
+            self.done = True
+            self._changed.notify_all()
+
+    async def follow(self, last_event_id: int) -> AsyncGenerator[str, None]:
+        """Yield frames after ``last_event_id`` until the run has finished."""
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(
+                    lambda: self.done or self.next_id - 1 > last_event_id
+                )
+                pending = [item for item in self.frames if item[0] > last_event_id]
+                done = self.done
+            for event_id, frame in pending:
+                last_event_id = event_id
+                yield f"id: {event_id}\n{frame}"
+            if done and not pending:
+                return
+
+
+class ReplayStore:
+    """Bounded per-thread replay buffers for resumable SSE responses.
+
+    Each run is generated by a background task into a :class:`TurnStream`,
+    so a client that disconnects can reconnect with ``Last-Event-ID``,
+    receive the frames it missed and keep following the same run instead of
+    starting a new one. Event ids increase monotonically per thread across
+    runs. At most ``max_threads`` finished streams are kept, least recently
+    used first out; with :meth:`attach` finished runs are also written to
+    Postgres so they can be replayed after eviction or by another worker.
+    Persisted frames of earlier runs are deleted when a run is written, and
+    checkpoint maintenance deletes those older than ``SSE_REPLAY_TTL_SECONDS``.
+
+    The store is also the guard that keeps turns of a thread from running
+    concurrently: SSE runs claim their thread in :meth:`start`, WebSocket
+    turns with :meth:`claim`, and both are refused while another is running.
+    """
+
+    def __init__(self, max_threads: int = 1000, max_frames: int = 2000):
+        self.max_threads = max_threads
+        self.max_frames = max_frames
+        self.pool: AsyncConnectionPool | None = None
+        self._streams: OrderedDict[str, TurnStream] = OrderedDict()
+        self._running: set[str] = set()
+
+    async def attach(self, pool: AsyncConnectionPool) -> None:
+        """Persist finished runs to Postgres, creating the table if needed."""
+        async with pool.connection() as conn:
+            await conn.execute(SETUP_SQL, prepare=False)
+        self.pool = pool
+
+    def get(self, thread_id: str) -> TurnStream | None:
+        stream = self._streams.get(thread_id)
+        if stream is not None:
+            self._streams.move_to_end(thread_id)
+        return stream
+
+    def is_running(self, thread_id: str) -> bool:
+        return thread_id in self._running
+
+    def claim(self, thread_id: str) -> None:
+        """Mark a turn of ``thread_id`` as running until :meth:`release`.
+
+        Raises :class:`TurnRunning` if one already is.
+        """
+        if thread_id in self._running:
+            raise TurnRunning(f"A turn is already running for {thread_id}")
+        self._running.add(thread_id)
+
+    def release(self, thread_id: str) -> None:
+        self._running.discard(thread_id)
+
+    async def start(self, thread_id: str, frames: AsyncIterator[str]) -> TurnStream:
+        """Generate ``frames`` in the background into a new stream.
+
+        Claims the thread for the run; raises :class:`TurnRunning` if a turn
+        is already running for it.
+        """
+        self.claim(thread_id)
+        previous = self._streams.get(thread_id)
+        try:
+            if previous is not None:
+                first_id = previous.next_id
+            else:
+                first_id = await self._last_id(thread_id) + 1
+        except BaseException:
+            self.release(thread_id)
+            raise
+        stream = TurnStream(thread_id, first_id, self.max_frames)
+        stream.task = asyncio.create_task(self._pump(stream, frames))
+        self._streams[thread_id] = stream
+        self._streams.move_to_end(thread_id)
+        self._evict()
+        return stream
+
+    async def replay(
+        self, thread_id: str, last_event_id: int | None = None
+    ) -> AsyncGenerator[str, None] | None:
+        """Frames of the latest run after ``last_event_id``.
+
+        Returns ``None`` when there is nothing to resume: the id belongs to
+        an earlier run, or the run it belongs to has been fully received.
+        Without an id the latest run is replayed from its start. Raises
+        :class:`ReplayGone` when the id falls inside a run whose following
+        frames have been evicted.
+        """
+        stream = self.get(thread_id)
+        if stream is not None:
+            return self._replay_stream(stream, last_event_id)
+        rows = await self._load(thread_id, last_event_id or 0)
+        if last_event_id is None:
+            # The latest run starts after the last end frame before its own.
+            ends = [i for i, (_, frame) in enumerate(rows[:-1]) if frame == END_FRAME]
+            rows = rows[ends[-1] + 1 :] if ends else rows
+            return self._chain(rows) if rows else None
+        if not rows:
+            return None
+        if rows[0][0] != last_event_id:
+            if rows[0][1] == END_FRAME:
+                # The end of the run before the kept one: the id is older.
+                return None
+            # Trimmed: whether the client had finished that run is unknown.
+            raise ReplayGone(f"Frames after {last_event_id} are no longer available")
+        if rows[0][1] == END_FRAME:
+            return None
+        run = []
+        for row in rows[1:]:
+            run.append(row)
+            if row[1] == END_FRAME:
+                break
+        return self._chain(run)
+
+    @staticmethod
+    def _replay_stream(
+        stream: TurnStream, last_event_id: int | None
+    ) -> AsyncGenerator[str, None] | None:
+        if last_event_id is None:
+            return stream.follow(stream.first_id - 1)
+        # A running stream may not have sent its first frame yet; a finished
+        # one has to be partly received to be resumed.
+        first = stream.first_id - 1 if not stream.done else stream.first_id
+        if not first <= last_event_id < stream.next_id - (1 if stream.done else 0):
+            return None
+        oldest = stream.frames[0][0] if stream.frames else stream.next_id
+        if last_event_id + 1 < oldest:
+            raise ReplayGone(f"Frames after {last_event_id} are no longer available")
+        return stream.follow(last_event_id)
+
+    async def close(self) -> None:
+        tasks = [s.task for s in self._streams.values() if s.task and not s.done]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "threads": len(self._streams),
+            "running": len(self._running),
+            "frames": sum(len(s.frames) for s in self._streams.values()),
+        }
+
+    async def _pump(self, stream: TurnStream, frames: AsyncIterator[str]) -> None:
+        try:
+            async for frame in frames:
+                await stream.append(frame)
+        finally:
+            await stream.finish()
+            self.release(stream.thread_id)
+            await self._persist(stream)
+            self._evict()
+
+    def _evict(self) -> None:
+        finished = [t for t, s in self._streams.items() if s.done]
+        for thread_id in finished[: max(len(self._streams) - self.max_threads, 0)]:
+            del self._streams[thread_id]
+
+    async def _persist(self, stream: TurnStream) -> None:
+        if self.pool is None or not stream.frames:
+            return
+        try:
+            async with self.pool.connection() as conn:
+                async with conn.cursor() as cur:
+                    await cur.executemany(
+                        INSERT_SQL,
+                        [(stream.thread_id, i, frame) for i, frame in stream.frames],
+                    )
+                    # Only the latest run can be resumed; the end frame of the
+                    # one before is kept to tell older ids from trimmed ones.
+                    await cur.execute(
+                        TRIM_SQL,
+                        (
+                            stream.thread_id,
+                            max(stream.first_id - 1, stream.next_id - self.max_frames),
+                            stream.first_id - 1,
+                        ),
+                    )
+        except psycopg.Error:
+            logger.warning("Failed to persist SSE replay frames", exc_info=True)
+
+    async def _last_id(self, thread_id: str) -> int:
+        if self.pool is None:
+            return 0
+        try:
+            async with self.pool.connection() as conn:
+                cursor = await conn.execute(LAST_ID_SQL, (thread_id,))
+                return (await cursor.fetchone())[0]
+        except psycopg.Error:
+            logger.warning("Failed to load the last SSE event id", exc_info=True)
+            return 0
+
+    async def _load(self, thread_id: str, last_event_id: int) -> list[tuple]:
+        if self.pool is None:
+            return []
+        try:
+            async with self.pool.connection() as conn:
+                cursor = await conn.execute(SELECT_SQL, (thread_id, last_event_id))
+                return await cursor.fetchall()
+        except psycopg.Error:
+            logger.warning("Failed to load SSE replay frames", exc_info=True)
+            return []
+
+    @staticmethod
+    async def _chain(rows: list[tuple]) -> AsyncGenerator[str, None]:
+        for event_id, frame in rows:
+            yield f"id: {event_id}\n{frame}"
+
+
+replay_store = ReplayStore(
+    max_threads=env_int("SSE_REPLAY_MAX_THREADS", 1000),
+    max_frames=env_int("SSE_REPLAY_MAX_FRAMES", 2000),
+)
@@ -1,26 +1,163 @@
+import asyncio
 import json
 import logging
+import time
 from collections.abc import AsyncGenerator
-from typing import Any
-
-from fastapi import APIRouter, FastAPI, HTTPException, status
-from fastapi.responses import StreamingResponse
+from contextlib import aclosing, asynccontextmanager
+from functools import partial
+from typing import Annotated, Any
+from uuid import uuid4
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    FastAPI,
+    File,
+    Form,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    UploadFile,
+    status,
+)
+from fastapi.responses import Response, StreamingResponse
 from langchain_core.messages import AnyMessage, ChatMessage
 from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph.state import CompiledStateGraph
 from langgraph.types import Command, StateSnapshot
-
-from core.agent import get_interview_agent
-from schemas import ChatHistory, ChatHistoryInput, StartInput, StateInput, UserInput
-from service.utils import (
-    convert_message_content_to_string,
-    remove_tool_calls,
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from core.agent import Interview, get_interview_agent
+from core.config import env_bool, env_float, env_int, env_str
+from core.documents import document_store
+from core.durability import flush_checkpoints, wait_for_writes
+from core.export import DEFAULT_FIELDS, export_rows, jsonl_line, validate_fields
+from core.ingestion import DocumentTooLarge, ingestor
+from core.llm_cache import llm_cache
+from core.maintenance import maintenance_loop
+from core.metrics import observe_first_frame
+from core.parse_cache import parse_cache
+from core.question_bank import question_bank
+from core.runnables import warm_up as warm_up_chains
+from core.scheduler import llm_scheduler
+from core.utils import (
+    get_checkpointer,
+    get_connection_pool,
+    get_latest_checkpoint_id,
+    get_pool_stats,
 )
+from schemas import (
+    ChatHistory,
+    ChatHistoryInput,
+    ExportInput,
+    StartInput,
+    StateInput,
+    UserInput,
+)
+from service.admission import START, TURN, Overloaded, admission
+from service.batch import router as batch_router
+from service.replay import END_FRAME, ReplayGone, TurnRunning, replay_store
+from service.streaming import agent_events
+from service.uploads import UploadSizeLimit, read_upload
+from service.websocket import router as websocket_router
+
+logger = logging.getLogger(__name__)
+
+
+async def warm_up(app: FastAPI) -> None:
+    """Build the LLM clients, check out a pooled connection and read a state
+    through the compiled graph, then mark the process ready (``/ready``).
 
-app = FastAPI()
+    Runs after startup so ``/health`` answers while it is in progress.
+    """
+    started = time.monotonic()
+    while True:
+        try:
+            await asyncio.to_thread(warm_up_chains)
+            if app.state.pool is not None:
+                async with app.state.pool.connection() as conn:
+                    await conn.execute("SELECT 1")
+            await app.state.agent.aget_state(
+                RunnableConfig(configurable={"thread_id": "warm-up"})
+            )
+            break
+        except Exception:
+            logger.error("Warm-up failed, retrying", exc_info=True)
+            await asyncio.sleep(5)
+    app.state.ready = True
+    logger.info("Ready after a %.2fs warm-up", time.monotonic() - started)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the Postgres pool and compile the agent once per process."""
+    app.state.ready = False
+    if env_str("CHECKPOINTER", "postgres") == "memory":
+        # For local runs and load tests without Postgres: nothing persists.
+        logger.warning("Using the in-memory checkpointer")
+        app.state.pool = None
+        app.state.agent = get_interview_agent(MemorySaver())
+        warming = asyncio.create_task(warm_up(app))
+        try:
+            yield
+        finally:
+            warming.cancel()
+            await flush_checkpoints(app.state.agent.checkpointer)
+            await replay_store.close()
+            await ingestor.close()
+        return
+
+    pool = await get_connection_pool()
+    maintenance = warming = None
+    try:
+        checkpointer = await get_checkpointer(pool)
+        await parse_cache.attach(pool)
+        await question_bank.attach(pool)
+        await document_store.attach(pool)
+        if env_bool("SSE_REPLAY_PERSIST"):
+            await replay_store.attach(pool)
+        app.state.pool = pool
+        app.state.agent = get_interview_agent(checkpointer)
+        logger.info("Interview agent compiled, pool stats: %s", get_pool_stats(pool))
+        warming = asyncio.create_task(warm_up(app))
+        interval = env_float("CHECKPOINT_MAINTENANCE_INTERVAL_SECONDS", 0)
+        if interval > 0:
+            maintenance = asyncio.create_task(
+                maintenance_loop(
+                    pool,
+                    interval,
+                    env_int("CHECKPOINT_TTL_SECONDS", 30 * 24 * 3600),
+                    env_int("SSE_REPLAY_TTL_SECONDS", 24 * 3600),
+                )
+            )
+        yield
+    finally:
+        for task in (maintenance, warming):
+            if task is not None:
+                task.cancel()
+        # Deferred checkpoints have to reach Postgres before the pool closes.
+        agent = getattr(app.state, "agent", None)
+        if agent is not None:
+            await flush_checkpoints(agent.checkpointer)
+        await replay_store.close()
+        await ingestor.close()
+        await pool.close()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(UploadSizeLimit)
 router = APIRouter()
 
-logger = logging.getLogger(__name__)
+
+def get_agent(request: Request) -> CompiledStateGraph:
+    return request.app.state.agent
+
+
+Agent = Annotated[CompiledStateGraph, Depends(get_agent)]
+LastEventID = Annotated[str | None, Header()]
+IfNoneMatch = Annotated[str | None, Header()]
 
 
 def _sse_response_example() -> dict[int, Any]:
@@ -37,79 +174,178 @@ def _sse_response_example() -> dict[int, Any]:
     }
 
 
-async def message_generator(kwargs) -> AsyncGenerator[str, None]:
+async def message_generator(
+    agent: CompiledStateGraph, kwargs
+) -> AsyncGenerator[str, None]:
     """
     Generate a stream of messages from the agent.
 
     This is the workhorse method for the /stream endpoint.
     """
-    logger.info(
-        f"Starting message generation with thread_id: {kwargs.get('config', {}).get('configurable', {}).get('thread_id')}"
-    )
-    agent: CompiledStateGraph = await get_interview_agent()
-
+    thread_id = kwargs.get("config", {}).get("configurable", {}).get("thread_id")
+    logger.info("Starting message generation with thread_id: %s", thread_id)
     try:
-        async for event in agent.astream_events(**kwargs, version="v2"):
-            if not event:
-                continue
-
-            logger.debug(f"Received event: {event['event']}")
-            new_messages = []
-            if event["event"] == "on_chain_end" and any(
-                t.startswith("graph:step:") for t in event.get("tags", [])
-            ):
-                logger.debug(
-                    f"Processing chain end event with tags: {event.get('tags', [])}"
-                )
-                if isinstance(event["data"]["output"], Command):
-                    new_messages = event["data"]["output"].update.get("messages", [])
-                elif "messages" in event["data"]["output"]:
-                    new_messages = event["data"]["output"]["messages"]
-
-            for message in new_messages:
-                logger.debug(f"Yielding new message of role: {message.type}")
-                yield f"data: {json.dumps({'type': 'message', 'content': message.model_dump()})}\n\n"
-
-            if event["event"] == "on_chat_model_stream":
-                content = remove_tool_calls(event["data"]["chunk"].content)
-                if content:
-                    logger.debug(f"Streaming token: {content[:20]}...")
-                    yield f"data: {json.dumps({'type': 'token', 'content': convert_message_content_to_string(content)})}\n\n"
-                continue
+        async for event in agent_events(agent, kwargs):
+            yield f"data: {json.dumps(event)}\n\n"
 
         logger.info("Message generation completed successfully")
-        yield "data: [DONE]\n\n"
+        yield END_FRAME
     except Exception as e:
-        logger.error(f"Error in message generation: {str(e)}", exc_info=True)
+        logger.error("Error in message generation: %s", e, exc_info=True)
         yield f"data: {json.dumps({'type': 'error', 'content': 'An error occurred during message generation'})}\n\n"
-        yield "data: [DONE]\n\n"
+        yield END_FRAME
+
+
+def _parse_event_id(last_event_id: str | None) -> int | None:
+    if not last_event_id:
+        return None
+    try:
+        return int(last_event_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+
+
+def _ensure_not_running(thread_id: str) -> None:
+    if replay_store.is_running(thread_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A turn is already running for this thread",
+        )
+
+
+async def _replay(
+    thread_id: str, last_event_id: int | None
+) -> AsyncGenerator[str, None] | None:
+    try:
+        return await replay_store.replay(thread_id, last_event_id)
+    except ReplayGone as e:
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail=str(e))
+
+
+async def resumable_response(
+    thread_id: str,
+    last_event_id: str | None,
+    agent: CompiledStateGraph,
+    kwargs,
+    kind: str = TURN,
+) -> StreamingResponse:
+    """Run a turn in the background and stream it with replayable event ids.
+
+    A request carrying the ``Last-Event-ID`` of a run it has not fully
+    received replays the frames missed since that id and attaches to the run
+    if it is still going, instead of starting the turn (and its LLM calls)
+    again; an id of an earlier or fully received run starts the new turn.
+    If the frames after the id have been evicted the request is refused with
+    410 so the client can tell. New runs wait for admission and are refused
+    with 429 (``kind`` ``start``) or 503 (``turn``) under overload.
+    """
+    started = time.perf_counter()
+    headers = {"X-Thread-ID": thread_id}
+    event_id = _parse_event_id(last_event_id)
+    if event_id is not None:
+        frames = await _replay(thread_id, event_id)
+        if frames is not None:
+            logger.info(
+                "Resuming stream for thread %s after %s", thread_id, last_event_id
+            )
+            return StreamingResponse(
+                frames, media_type="text/event-stream", headers=headers
+            )
+    _ensure_not_running(thread_id)
+    try:
+        await admission.acquire(kind)
+    except Overloaded as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    try:
+        # Another turn of the thread, over SSE or a WebSocket, may have
+        # started while this waited.
+        turn = await replay_store.start(
+            thread_id, admission.hold(message_generator(agent, kwargs))
+        )
+    except TurnRunning as e:
+        admission.release()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except BaseException:
+        admission.release()
+        raise
+    return StreamingResponse(
+        observe_first_frame(turn.follow(turn.first_id - 1), kind, started),
+        media_type="text/event-stream",
+        headers=headers,
+    )
 
 
 @router.post(
     "/start", response_class=StreamingResponse, responses=_sse_response_example()
 )
-async def start(start_input: StartInput) -> StreamingResponse:
-    thread_id = start_input.thread_id
+async def start(
+    start_input: StartInput, agent: Agent, last_event_id: LastEventID = None
+) -> StreamingResponse:
+    thread_id = start_input.thread_id or str(uuid4())
     logger.info(f"Starting new interview session with thread_id: {thread_id}")
     logger.debug(
         f"Job description length: {len(start_input.job_description)}, Resume length: {len(start_input.resume)}"
     )
 
+    # Large documents are stored once and referenced from the checkpoints,
+    # but only once the turn has been admitted.
     kwargs = {
-        "input": {
-            "job_description": start_input.job_description,
-            "resume": start_input.resume,
-        },
+        "input": partial(
+            document_store.put_many,
+            thread_id,
+            job_description=start_input.job_description,
+            resume=start_input.resume,
+        ),
         "config": RunnableConfig(configurable={"thread_id": thread_id}),
     }
     logger.info(f"Initiating streaming response for thread: {thread_id}")
-    return StreamingResponse(message_generator(kwargs), media_type="text/event-stream")
+    return await resumable_response(thread_id, last_event_id, agent, kwargs, START)
+
+
+@router.post(
+    "/start/upload",
+    response_class=StreamingResponse,
+    responses=_sse_response_example(),
+)
+async def start_upload(
+    agent: Agent,
+    job_description: Annotated[str, Form()],
+    resume: Annotated[UploadFile, File()],
+    thread_id: Annotated[str | None, Form()] = None,
+    last_event_id: LastEventID = None,
+) -> StreamingResponse:
+    """:func:`start` with the resume uploaded as a file: a PDF, or plain text
+    otherwise. Files over ``INGEST_MAX_UPLOAD_BYTES`` are rejected with 413."""
+    try:
+        resume_text = await read_upload(resume)
+    except DocumentTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e)
+        )
+    except Exception:
+        logger.warning(f"Could not read resume {resume.filename}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Could not read the resume"
+        )
+    return await start(
+        StartInput(
+            job_description=job_description, resume=resume_text, thread_id=thread_id
+        ),
+        agent,
+        last_event_id,
+    )
 
 
 @router.post(
     "/stream", response_class=StreamingResponse, responses=_sse_response_example()
 )
-async def stream(user_input: UserInput) -> StreamingResponse:
+async def stream(
+    user_input: UserInput, agent: Agent, last_event_id: LastEventID = None
+) -> StreamingResponse:
     logger.info(f"Received user message for thread: {user_input.thread_id}")
     logger.debug(f"User message: {user_input.message[:50]}...")
 
@@ -118,24 +354,105 @@ async def stream(user_input: UserInput) -> StreamingResponse:
         "config": RunnableConfig(configurable={"thread_id": user_input.thread_id}),
     }
     logger.info(f"Continuing conversation stream for thread: {user_input.thread_id}")
-    return StreamingResponse(message_generator(kwargs), media_type="text/event-stream")
+    return await resumable_response(user_input.thread_id, last_event_id, agent, kwargs)
+
+
+@router.get(
+    "/stream/{thread_id}",
+    response_class=StreamingResponse,
+    responses=_sse_response_example(),
+)
+async def resume_stream(
+    thread_id: str, last_event_id: LastEventID = None
+) -> StreamingResponse:
+    """Replay the latest turn of a thread and follow it if it is still running."""
+    frames = await _replay(thread_id, _parse_event_id(last_event_id))
+    if frames is None:
+        raise HTTPException(status_code=404, detail="No stream to resume")
+    return StreamingResponse(frames, media_type="text/event-stream")
+
+
+def _etag(checkpoint_id: str | None) -> str | None:
+    return f'"{checkpoint_id}"' if checkpoint_id else None
+
+
+def _not_modified(if_none_match: str | None, etag: str | None) -> Response | None:
+    """A ``304`` response if ``If-None-Match`` names the current ``etag``."""
+    if etag is None or not if_none_match:
+        return None
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if "*" in tags or etag in tags:
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+    return None
+
+
+async def _current_etag(
+    request: Request, agent: CompiledStateGraph, thread_id: str
+) -> str | None:
+    """ETag of the thread's newest checkpoint, looked up without loading it.
+
+    Without Postgres there is no cheap lookup, and the ETag is taken from the
+    loaded checkpoint instead.
+    """
+    pool = request.app.state.pool
+    if pool is None:
+        return None
+    # Never flushes: a run still going under exit durability stays buffered.
+    await wait_for_writes(agent.checkpointer, thread_id)
+    return _etag(await get_latest_checkpoint_id(pool, thread_id))
 
 
 @router.get("/history")
-async def history(history_input: ChatHistoryInput) -> ChatHistory:
+async def history(
+    history_input: Annotated[ChatHistoryInput, Query()],
+    agent: Agent,
+    request: Request,
+    response: Response,
+    if_none_match: IfNoneMatch = None,
+) -> ChatHistory:
+    """Messages of a thread from ``since``, at most ``limit`` of them.
+
+    Answers ``404`` for a thread without a checkpoint, and ``304`` when
+    ``If-None-Match`` carries the ETag of the thread's current checkpoint.
+    """
     logger.info(f"Retrieving chat history for thread: {history_input.thread_id}")
 
-    agent: CompiledStateGraph = await get_interview_agent()
     try:
-        state_snapshot = await agent.aget_state(
-            config=RunnableConfig(configurable={"thread_id": history_input.thread_id})
+        etag = await _current_etag(request, agent, history_input.thread_id)
+        if not_modified := _not_modified(if_none_match, etag):
+            return not_modified
+        # Only the channel values are needed, not the whole StateSnapshot.
+        checkpoint = await agent.checkpointer.aget_tuple(
+            RunnableConfig(configurable={"thread_id": history_input.thread_id})
+        )
+        if checkpoint is None:
+            raise HTTPException(status_code=404, detail="Thread not found")
+        etag = _etag(checkpoint.config["configurable"]["checkpoint_id"])
+        if not_modified := _not_modified(if_none_match, etag):
+            return not_modified
+        messages: list[AnyMessage] = checkpoint.checkpoint["channel_values"].get(
+            "messages", []
         )
-        messages: list[AnyMessage] = state_snapshot.values["messages"]
-        chat_messages: list[ChatMessage] = [m for m in messages]
+        end = (
+            len(messages)
+            if history_input.limit is None
+            else history_input.since + history_input.limit
+        )
+        chat_messages: list[ChatMessage] = messages[history_input.since : end]
+        if etag is not None:
+            response.headers["ETag"] = etag
         logger.info(
             f"Successfully retrieved {len(chat_messages)} messages for thread: {history_input.thread_id}"
         )
-        return ChatHistory(messages=chat_messages)
+        return ChatHistory(
+            messages=chat_messages,
+            next_since=min(end, len(messages)),
+            total=len(messages),
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(
             f"Failed to retrieve chat history for thread {history_input.thread_id}: {str(e)}",
@@ -144,19 +461,72 @@ async def history(history_input: ChatHistoryInput) -> ChatHistory:
         raise HTTPException(status_code=500, detail="Unexpected error")
 
 
-@router.get("/state")
-async def state(state_input: StateInput) -> StateSnapshot:
+@router.get("/state", response_model=None)
+async def state(
+    state_input: Annotated[StateInput, Query()],
+    agent: Agent,
+    request: Request,
+    response: Response,
+    if_none_match: IfNoneMatch = None,
+) -> StateSnapshot | dict:
+    """The thread's state snapshot, or only the requested ``fields``.
+
+    With ``fields`` (repeated, or comma separated) the response is
+    ``{"values": {...}, "status": ..., "checkpoint_id": ...}``, where status is
+    ``completed`` once the interview has ended and ``in_progress`` before.
+    Answers ``404`` for a thread without a checkpoint, and ``304`` when
+    ``If-None-Match`` carries the current ETag.
+    """
     logger.info(f"Ending conversation for thread: {state_input.thread_id}")
 
-    agent: CompiledStateGraph = await get_interview_agent()
+    fields = None
+    if state_input.fields:
+        fields = [
+            field.strip()
+            for value in state_input.fields
+            for field in value.split(",")
+            if field.strip()
+        ]
+        unknown = sorted(set(fields) - set(Interview.__annotations__))
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown state fields: {', '.join(unknown)}",
+            )
+
     try:
+        etag = await _current_etag(request, agent, state_input.thread_id)
+        if not_modified := _not_modified(if_none_match, etag):
+            return not_modified
         state_snapshot = await agent.aget_state(
             config=RunnableConfig(configurable={"thread_id": state_input.thread_id})
         )
+        checkpoint_id = state_snapshot.config.get("configurable", {}).get(
+            "checkpoint_id"
+        )
+        if checkpoint_id is None:
+            raise HTTPException(status_code=404, detail="Thread not found")
+        etag = _etag(checkpoint_id)
+        if not_modified := _not_modified(if_none_match, etag):
+            return not_modified
+        if etag is not None:
+            response.headers["ETag"] = etag
         logger.info(
             f"Successfully ended conversation for thread: {state_input.thread_id}"
         )
-        return state_snapshot
+        if fields is None:
+            return state_snapshot
+        return {
+            "values": {
+                field: state_snapshot.values[field]
+                for field in fields
+                if field in state_snapshot.values
+            },
+            "status": "in_progress" if state_snapshot.next else "completed",
+            "checkpoint_id": checkpoint_id,
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(
             f"Failed to end conversation for thread {state_input.thread_id}: {str(e)}",
@@ -165,14 +535,85 @@ async def state(state_input: StateInput) -> StateSnapshot:
         raise HTTPException(status_code=500, detail="Unexpected error")
 
 
+@router.get("/export", response_class=StreamingResponse)
+async def export(
+    export_input: Annotated[ExportInput, Query()], request: Request
+) -> StreamingResponse:
+    """Stream the selected fields of the latest state of every thread as JSON
+    lines, filtered by last update time and status.
+
+    Reads the checkpoint tables through a server-side cursor instead of
+    loading each thread's state, so it suits analytics over all interviews.
+    """
+    pool = request.app.state.pool
+    if pool is None:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Export needs the Postgres checkpointer",
+        )
+    try:
+        fields = validate_fields(
+            field.strip()
+            for value in export_input.fields or DEFAULT_FIELDS
+            for field in value.split(",")
+            if field.strip()
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    logger.info(f"Exporting {fields} for {export_input.status or 'all'} threads")
+
+    async def lines() -> AsyncGenerator[str, None]:
+        rows = export_rows(
+            pool, fields, export_input.since, export_input.until, export_input.status
+        )
+        # Closed here so the cursor and connection are released even when the
+        # client goes away mid-export.
+        async with aclosing(rows):
+            async for row in rows:
+                yield jsonl_line(row)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
 # TODO: give description to the endpoints
 
 
 @app.get("/health")
-async def health_check():
-    """Health check endpoint."""
+async def health_check(request: Request):
+    """Liveness check, including Postgres pool saturation."""
     logger.debug("Health check endpoint called")
-    return {"status": "ok"}
+    pool = request.app.state.pool
+    return {"status": "ok", "pool": get_pool_stats(pool) if pool else None}
+
+
+@app.get("/ready")
+async def readiness_check(request: Request):
+    """Readiness check: 503 until the warm-up after startup has finished."""
+    if not request.app.state.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Warming up"
+        )
+    return {"status": "ready"}
+
+
+@app.get("/metrics", response_class=Response)
+async def metrics() -> Response:
+    """Prometheus metrics of this process."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/stats")
+async def stats():
+    """Counters of the in-process caches, LLM scheduler and admission control."""
+    return {
+        "parse_cache": parse_cache.stats(),
+        "llm_cache": llm_cache.stats(),
+        "sse_replay": replay_store.stats(),
+        "llm_scheduler": llm_scheduler.stats(),
+        "admission": admission.stats(),
+    }
 
 
 app.include_router(router)
+app.include_router(websocket_router)
+app.include_router(batch_router)
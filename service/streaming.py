@@ -0,0 +1,273 @@
+import asyncio
+import logging
+import time
+from collections.abc import AsyncGenerator, Iterable
+
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from langgraph.graph.state import CompiledStateGraph
+
+from core.config import env_float, env_int
+from core.durability import end_run
+from service.utils import convert_message_content_to_string, remove_tool_calls
+
+logger = logging.getLogger(__name__)
+
+# String fields of structured outputs that are streamed to the client as
+# tokens, keyed by tool (schema) name. Only the first coding question is
+# streamed since the rest are asked later in the interview.
+STREAMED_FIELDS: dict[str, list[tuple]] = {
+    "ExperienceInterviewQuestion": [("response",)],
+    "CodingQuestions": [("questions", 0)],
+}
+
+_ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+
+class PartialJSONStringStreamer:
+    """Incrementally scan a JSON document and emit decoded string fragments.
+
+    Chunks of the document are passed to :meth:`feed` as they arrive; every
+    string value whose path (a tuple of object keys and array indices) is in
+    ``paths`` is emitted fragment by fragment. Values of any other type at
+    those paths, e.g. an ``ExperienceInterviewScore`` object in place of the
+    ``response`` string, emit nothing.
+    """
+
+    def __init__(self, paths: Iterable[tuple]):
+        self.paths = set(paths)
+        # One [kind, key] frame per open container, where key is the current
+        # object key or array index.
+        self._stack: list[list] = []
+        self._expect_key = False
+        self._in_string = False
+        self._string_is_key = False
+        self._string_emits = False
+        self._key_chars: list[str] = []
+        self._escape = False
+        self._unicode: str | None = None
+        self._high_surrogate: str | None = None
+
+    def feed(self, text: str) -> list[tuple[tuple, str]]:
+        """Consume a chunk and return ``(path, fragment)`` pairs for it."""
+        fragments: list[tuple[tuple, str]] = []
+        emitted: list[str] = []
+
+        for char in text:
+            if not self._in_string:
+                self._structural(char)
+                continue
+
+            decoded = self._string_char(char)
+            if decoded is None:
+                if not self._in_string and emitted:
+                    fragments.append((self._path(), "".join(emitted)))
+                    emitted = []
+                continue
+            if self._string_is_key:
+                self._key_chars.append(decoded)
+            elif self._string_emits:
+                emitted.append(decoded)
+
+        if emitted:
+            fragments.append((self._path(), "".join(emitted)))
+        return fragments
+
+    def _path(self) -> tuple:
+        return tuple(frame[1] for frame in self._stack)
+
+    def _structural(self, char: str) -> None:
+        if char == "{":
+            self._stack.append(["object", None])
+            self._expect_key = True
+        elif char == "[":
+            self._stack.append(["array", 0])
+            self._expect_key = False
+        elif char in "}]":
+            if self._stack:
+                self._stack.pop()
+            self._expect_key = False
+        elif char == ",":
+            if self._stack and self._stack[-1][0] == "array":
+                self._stack[-1][1] += 1
+            else:
+                self._expect_key = True
+        elif char == ":":
+            self._expect_key = False
+        elif char == '"':
+            self._in_string = True
+            self._string_is_key = bool(
+                self._stack and self._stack[-1][0] == "object" and self._expect_key
+            )
+            self._string_emits = not self._string_is_key and self._path() in self.paths
+            self._key_chars = []
+
+    def _string_char(self, char: str) -> str | None:
+        """Decode one character inside a string; ``None`` if nothing decoded."""
+        if self._unicode is not None:
+            self._unicode += char
+            if len(self._unicode) < 4:
+                return None
+            code_point = chr(int(self._unicode, 16))
+            self._unicode = None
+            if "\ud800" <= code_point <= "\udbff":
+                self._high_surrogate = code_point
+                return None
+            if self._high_surrogate is not None:
+                pair = self._high_surrogate + code_point
+                self._high_surrogate = None
+                return pair.encode("utf-16", "surrogatepass").decode("utf-16")
+            return code_point
+
+        if self._escape:
+            self._escape = False
+            if char == "u":
+                self._unicode = ""
+                return None
+            return _ESCAPES.get(char, char)
+
+        if char == "\\":
+            self._escape = True
+            return None
+        if char == '"':
+            self._in_string = False
+            if self._string_is_key:
+                self._stack[-1][1] = "".join(self._key_chars)
+                self._expect_key = False
+            return None
+        return char
+
+
+class StructuredOutputStreamer:
+    """Route streamed tool-call argument chunks to per-call JSON streamers."""
+
+    def __init__(self, streamed_fields: dict[str, list[tuple]] = STREAMED_FIELDS):
+        self.streamed_fields = streamed_fields
+        self._streamers: dict[tuple, PartialJSONStringStreamer | None] = {}
+
+    def feed(self, run_id: str, tool_call_chunks: list[dict]) -> list[str]:
+        """Return the text fragments to stream for one model chunk."""
+        tokens: list[str] = []
+        for chunk in tool_call_chunks:
+            key = (run_id, chunk.get("index"))
+            if key not in self._streamers:
+                paths = self.streamed_fields.get(chunk.get("name"))
+                self._streamers[key] = (
+                    PartialJSONStringStreamer(paths) if paths else None
+                )
+            streamer = self._streamers[key]
+            if streamer is not None and chunk.get("args"):
+                tokens.extend(text for _, text in streamer.feed(chunk["args"]))
+        return tokens
+
+
+_END = object()
+
+
+async def agent_events(
+    agent: CompiledStateGraph, kwargs: dict
+) -> AsyncGenerator[dict, None]:
+    """Stream the ``token`` and ``message`` events of one agent run.
+
+    Built on ``stream_mode=["messages", "updates"]``: model chunks become
+    tokens and node updates carry the final messages, so no event is
+    materialized for the chains, prompts and parsers in between. Tokens are
+    coalesced into one event until ``STREAM_BATCH_CHARS`` characters are
+    buffered or ``STREAM_BATCH_MS`` milliseconds have passed.
+
+    The ``input`` of ``kwargs`` may be an async callable returning it, so
+    work such as storing the documents of a new interview only happens once
+    the turn is admitted and running.
+    """
+    batch_chars = env_int("STREAM_BATCH_CHARS", 64)
+    batch_seconds = env_float("STREAM_BATCH_MS", 30.0) / 1000
+    structured_output = StructuredOutputStreamer()
+    buffer: list[str] = []
+    buffered = 0
+    deadline = 0.0
+
+    # The graph runs in its own task so a partial token batch can be flushed
+    # on time while the next chunk is still being generated.
+    queue: asyncio.Queue = asyncio.Queue(maxsize=256)
+
+    thread_id = kwargs.get("config", {}).get("configurable", {}).get("thread_id")
+
+    async def produce():
+        try:
+            run_kwargs = kwargs
+            if callable(kwargs.get("input")):
+                run_kwargs = {**kwargs, "input": await kwargs["input"]()}
+            async for item in agent.astream(
+                **run_kwargs, stream_mode=["messages", "updates"]
+            ):
+                await queue.put(item)
+            # With CHECKPOINT_DURABILITY=exit the run is persisted here, so
+            # the turn completes only once its state is durable.
+            await end_run(agent.checkpointer, thread_id)
+        except Exception as e:
+            await queue.put(e)
+        else:
+            await queue.put(_END)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            timeout = max(deadline - time.monotonic(), 0) if buffer else None
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except TimeoutError:
+                item = None
+            if item is _END:
+                break
+            if isinstance(item, Exception):
+                raise item
+
+            mode, payload = item if item is not None else ("flush", None)
+            if mode == "messages":
+                chunk, _ = payload
+                # Full messages are taken from node updates instead.
+                if not isinstance(chunk, AIMessageChunk):
+                    continue
+                content = remove_tool_calls(chunk.content)
+                tokens = [convert_message_content_to_string(content)] if content else []
+                # Structured outputs arrive as tool call arguments; stream the
+                # question text out of the partial JSON as it is generated.
+                tokens.extend(structured_output.feed(chunk.id, chunk.tool_call_chunks))
+                for token in tokens:
+                    if token:
+                        if not buffer:
+                            deadline = time.monotonic() + batch_seconds
+                        buffer.append(token)
+                        buffered += len(token)
+                if buffered < batch_chars and time.monotonic() < deadline:
+                    continue
+
+            if buffer:
+                yield {"type": "token", "content": "".join(buffer)}
+                buffer.clear()
+                buffered = 0
+
+            if mode == "updates":
+                for node, update in payload.items():
+                    if not isinstance(update, dict):
+                        continue
+                    messages: list[BaseMessage] = update.get("messages", [])
+                    for message in messages:
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug(
+                                "Yielding %s message from %s", message.type, node
+                            )
+                        yield {"type": "message", "content": message.model_dump()}
+
+        if buffer:
+            yield {"type": "token", "content": "".join(buffer)}
+    finally:
+        producer.cancel()
@@ -0,0 +1,70 @@
+from fastapi import UploadFile, status
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from core.config import env_int
+from core.ingestion import DocumentTooLarge, ingestor
+
+CHUNK_SIZE = 64 * 1024
+
+
+class UploadSizeLimit:
+    """Reject multipart requests whose declared body is over
+    ``INGEST_MAX_REQUEST_BYTES`` before any of it is read.
+
+    Without a ``Content-Length`` (chunked uploads) the per-file limit of
+    :func:`read_upload` still applies once the file has been spooled.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.max_bytes = env_int("INGEST_MAX_REQUEST_BYTES", 64 * 1024 * 1024)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            headers = dict(scope["headers"])
+            length = headers.get(b"content-length", b"")
+            if (
+                headers.get(b"content-type", b"").startswith(b"multipart/form-data")
+                and length.isdigit()
+                and int(length) > self.max_bytes
+            ):
+                await send(
+                    {
+                        "type": "http.response.start",
+                        "status": status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        "headers": [(b"content-type", b"application/json")],
+                    }
+                )
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": b'{"detail":"Request body is too large"}',
+                    }
+                )
+                return
+        await self.app(scope, receive, send)
+
+
+def is_pdf(upload: UploadFile) -> bool:
+    return upload.content_type == "application/pdf" or (
+        upload.filename or ""
+    ).lower().endswith(".pdf")
+
+
+async def read_upload(upload: UploadFile) -> str:
+    """The text of an uploaded resume: a PDF, or plain text otherwise.
+
+    The file is read in chunks and given up on as soon as it is over
+    ``INGEST_MAX_UPLOAD_BYTES``.
+    """
+    max_bytes = env_int("INGEST_MAX_UPLOAD_BYTES", 10 * 1024 * 1024)
+    content = bytearray()
+    while chunk := await upload.read(CHUNK_SIZE):
+        content.extend(chunk)
+        if len(content) > max_bytes:
+            raise DocumentTooLarge(
+                f"{upload.filename or 'Upload'} is larger than {max_bytes} bytes"
+            )
+    if is_pdf(upload):
+        return await ingestor.pdf_text(bytes(content))
+    return content.decode()
@@ -0,0 +1,191 @@
+import asyncio
+import json
+import logging
+import time
+from functools import partial
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph.state import CompiledStateGraph
+from langgraph.types import Command
+
+from core.config import env_float, env_int
+from core.documents import document_store
+from service.admission import START, TURN, Overloaded, admission
+from service.replay import TurnRunning, replay_store
+from service.streaming import agent_events
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+class InterviewSocket:
+    """One interview session over a single WebSocket connection.
+
+    Client frames are JSON objects: ``{"type": "start", "job_description":
+    ..., "resume": ...}`` to begin, ``{"type": "answer", "message": ...}`` for
+    every candidate turn and ``{"type": "pong"}`` in reply to heartbeats.
+    The server sends the same ``token``/``message``/``error`` events as the
+    SSE endpoints, a ``done`` event at the end of each turn and ``ping``
+    heartbeats. A turn refused by admission control gets an ``error`` event
+    with a ``retry_after`` delay in seconds.
+
+    Outgoing events go through a bounded queue: when a client reads slowly
+    the queue fills up and generation waits for it, and a client that does
+    not accept a frame within ``WS_SEND_TIMEOUT`` seconds is disconnected.
+    """
+
+    def __init__(self, websocket: WebSocket, thread_id: str, agent: CompiledStateGraph):
+        self.websocket = websocket
+        self.thread_id = thread_id
+        self.agent = agent
+        self.heartbeat_interval = env_float("WS_HEARTBEAT_SECONDS", 20.0)
+        self.idle_timeout = env_float("WS_IDLE_TIMEOUT", 60.0)
+        self.send_timeout = env_float("WS_SEND_TIMEOUT", 10.0)
+        self.outgoing: asyncio.Queue = asyncio.Queue(
+            maxsize=env_int("WS_SEND_QUEUE_SIZE", 64)
+        )
+        self.last_seen = time.monotonic()
+        self.turn: asyncio.Task | None = None
+        self.closed = False
+
+    async def run(self) -> None:
+        sender = asyncio.create_task(self._sender())
+        heartbeat = asyncio.create_task(self._heartbeat())
+        try:
+            while True:
+                frame = await self.websocket.receive_text()
+                self.last_seen = time.monotonic()
+                await self._dispatch(frame)
+        except WebSocketDisconnect:
+            logger.info("WebSocket closed for thread: %s", self.thread_id)
+        finally:
+            self._close()
+            sender.cancel()
+            heartbeat.cancel()
+
+    async def _dispatch(self, frame: str) -> None:
+        try:
+            data = json.loads(frame)
+            kind = data["type"]
+        except (ValueError, KeyError, TypeError):
+            await self._send({"type": "error", "content": "Invalid frame"})
+            return
+
+        if kind == "pong":
+            return
+        if kind == "start":
+            # Stored by agent_events once the turn has been admitted.
+            turn_input = partial(
+                document_store.put_many,
+                self.thread_id,
+                job_description=data.get("job_description", ""),
+                resume=data.get("resume", ""),
+            )
+            admission_kind = START
+        elif kind == "answer":
+            turn_input = Command(resume=data.get("message", ""))
+            admission_kind = TURN
+        else:
+            await self._send({"type": "error", "content": f"Unknown type: {kind}"})
+            return
+
+        if (self.turn and not self.turn.done()) or replay_store.is_running(
+            self.thread_id
+        ):
+            await self._send({"type": "error", "content": "A turn is already running"})
+            return
+        self.turn = asyncio.create_task(self._run_turn(turn_input, admission_kind))
+
+    async def _run_turn(self, turn_input, admission_kind: str) -> None:
+        kwargs = {
+            "input": turn_input,
+            "config": RunnableConfig(configurable={"thread_id": self.thread_id}),
+        }
+        try:
+            await admission.acquire(admission_kind)
+        except Overloaded as e:
+            await self._send(
+                {"type": "error", "content": str(e), "retry_after": e.retry_after}
+            )
+            await self._send({"type": "done"})
+            return
+        try:
+            # Shared with the SSE endpoints: one turn per thread at a time.
+            replay_store.claim(self.thread_id)
+        except TurnRunning as e:
+            admission.release()
+            await self._send({"type": "error", "content": str(e)})
+            await self._send({"type": "done"})
+            return
+        started = time.monotonic()
+        try:
+            async for event in agent_events(self.agent, kwargs):
+                await self._send(event)
+        except Exception as e:
+            logger.error("Error in WebSocket turn: %s", e, exc_info=True)
+            await self._send(
+                {
+                    "type": "error",
+                    "content": "An error occurred during message generation",
+                }
+            )
+        finally:
+            replay_store.release(self.thread_id)
+            admission.release(time.monotonic() - started)
+        await self._send({"type": "done"})
+
+    async def _send(self, event: dict) -> None:
+        # After a disconnect the turn still runs to completion so its state
+        # is checkpointed, but its events are dropped.
+        if not self.closed:
+            await self.outgoing.put(event)
+
+    async def _sender(self) -> None:
+        while True:
+            event = await self.outgoing.get()
+            try:
+                await asyncio.wait_for(
+                    self.websocket.send_text(json.dumps(event)), self.send_timeout
+                )
+            except TimeoutError:
+                logger.warning("Dropping slow WebSocket client: %s", self.thread_id)
+                self._close()
+                await self._disconnect(status.WS_1013_TRY_AGAIN_LATER)
+                return
+            except Exception:
+                # The receive loop notices the disconnect and cleans up.
+                self._close()
+                return
+
+    async def _heartbeat(self) -> None:
+        while not self.closed:
+            await asyncio.sleep(self.heartbeat_interval)
+            if time.monotonic() - self.last_seen > self.idle_timeout:
+                logger.info("WebSocket heartbeat timed out: %s", self.thread_id)
+                self._close()
+                await self._disconnect(status.WS_1001_GOING_AWAY)
+                return
+            if not self.outgoing.full():
+                self.outgoing.put_nowait({"type": "ping"})
+
+    async def _disconnect(self, code: int) -> None:
+        try:
+            await self.websocket.close(code=code)
+        except RuntimeError:
+            # Already closed by the client.
+            pass
+
+    def _close(self) -> None:
+        self.closed = True
+        # Unblock a turn waiting on a full queue.
+        while not self.outgoing.empty():
+            self.outgoing.get_nowait()
+
+
+@router.websocket("/ws/{thread_id}")
+async def interview_socket(websocket: WebSocket, thread_id: str) -> None:
+    await websocket.accept()
+    logger.info("WebSocket opened for thread: %s", thread_id)
+    await InterviewSocket(websocket, thread_id, websocket.app.state.agent).run()
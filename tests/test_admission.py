@@ -0,0 +1,145 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from service import service
+from service.admission import START, TURN, AdmissionController, Overloaded
+
+
+async def queue(controller: AdmissionController, kind: str) -> asyncio.Task:
+    """Start an ``acquire`` and let it reach the queue."""
+    task = asyncio.create_task(controller.acquire(kind))
+    await asyncio.sleep(0)
+    return task
+
+
+def test_admits_up_to_max_concurrency():
+    async def main():
+        controller = AdmissionController(max_concurrency=2)
+        await controller.acquire(TURN)
+        await controller.acquire(START)
+        waiting = await queue(controller, TURN)
+        assert (controller.running, controller.queued) == (2, 1)
+        controller.release()
+        await waiting
+        assert (controller.running, controller.queued) == (2, 0)
+
+    asyncio.run(main())
+
+
+def test_turns_are_served_before_starts():
+    async def main():
+        controller = AdmissionController(max_concurrency=1)
+        await controller.acquire(TURN)
+        start = await queue(controller, START)
+        turn = await queue(controller, TURN)
+        controller.release()
+        await turn
+        assert not start.done()
+        controller.release()
+        await start
+        assert controller.stats()[START]["admitted"] == 1
+
+    asyncio.run(main())
+
+
+def test_starts_only_take_their_share_of_the_queue():
+    async def main():
+        controller = AdmissionController(
+            max_concurrency=1, max_queue=4, max_start_queue=1
+        )
+        await controller.acquire(TURN)
+        start = await queue(controller, START)
+        with pytest.raises(Overloaded) as e:
+            await controller.acquire(START)
+        assert e.value.status_code == 429
+        turn = await queue(controller, TURN)
+        assert controller.queued == 2
+        for task in (start, turn):
+            task.cancel()
+        await asyncio.gather(start, turn, return_exceptions=True)
+        assert controller.queued == 0
+
+    asyncio.run(main())
+
+
+def test_turn_sheds_the_latest_queued_start_from_a_full_queue():
+    async def main():
+        controller = AdmissionController(
+            max_concurrency=1, max_queue=2, max_start_queue=2
+        )
+        await controller.acquire(TURN)
+        first = await queue(controller, START)
+        last = await queue(controller, START)
+        turn = await queue(controller, TURN)
+        with pytest.raises(Overloaded) as e:
+            await last
+        assert e.value.status_code == 429
+        assert not first.done()
+        assert controller.stats()[START]["shed"] == 1
+
+        # The queue is full again, with a start and a turn: starts are refused.
+        with pytest.raises(Overloaded):
+            await controller.acquire(START)
+        controller.release()
+        await turn
+        controller.release()
+        await first
+
+    asyncio.run(main())
+
+
+def test_full_queue_of_turns_rejects_turns_with_503():
+    async def main():
+        controller = AdmissionController(max_concurrency=1, max_queue=1)
+        await controller.acquire(TURN)
+        waiting = await queue(controller, TURN)
+        with pytest.raises(Overloaded) as e:
+            await controller.acquire(TURN)
+        assert e.value.status_code == 503
+        assert e.value.retry_after >= 1
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+
+    asyncio.run(main())
+
+
+def test_queue_timeout_rejects_and_leaves_the_queue():
+    async def main():
+        controller = AdmissionController(max_concurrency=1, queue_timeout=0.01)
+        await controller.acquire(TURN)
+        with pytest.raises(Overloaded) as e:
+            await controller.acquire(TURN)
+        assert e.value.status_code == 503
+        assert controller.queued == 0
+        assert controller.stats()[TURN]["rejected"] == 1
+
+    asyncio.run(main())
+
+
+def test_retry_after_follows_run_durations():
+    controller = AdmissionController(max_concurrency=2)
+    assert controller.retry_after() == 1
+    for _ in range(3):
+        controller.running += 1
+        controller.release(duration=5.0)
+    # One 5 second run ahead, shared by two slots.
+    assert controller.retry_after() == 3
+    controller.running += 1
+    controller.release(duration=1000.0)
+    assert controller.retry_after() == 60
+
+
+@pytest.mark.parametrize("kind, status_code", [(START, 429), (TURN, 503)])
+def test_overloaded_request_gets_status_and_retry_after(monkeypatch, kind, status_code):
+    controller = AdmissionController(max_concurrency=1, max_queue=0)
+    controller.running = 1
+    for _ in range(2):
+        controller._durations.append(7.0)
+    monkeypatch.setattr(service, "admission", controller)
+
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(service.resumable_response("thread", None, None, {}, kind))
+    assert e.value.status_code == status_code
+    assert e.value.headers == {"Retry-After": "7"}
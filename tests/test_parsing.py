@@ -0,0 +1,128 @@
+import pytest
+
+from core.parsing import merge_job_descriptions, merge_resumes, split_sections
+from schemas.llm_responses import Experience, JobDescription, Project, Resume
+
+RESUME = """Jane Doe
+jane@example.com
+
+EXPERIENCE
+Backend Engineer, Acme
+Built the billing service in Python.
+Moved reporting to Postgres.
+
+Data Engineer, Initech
+Maintained the ETL pipelines.
+
+PROJECTS
+Interview bot
+A LangGraph agent.
+
+Skills:
+Python, SQL, Kubernetes
+
+EXPERIENCE
+Intern, Globex
+Wrote tests.
+"""
+
+
+def words(text: str) -> list[str]:
+    return text.split()
+
+
+@pytest.mark.parametrize("max_chars", [40, 60, 90, 150])
+def test_chunks_keep_the_text_in_order_and_fit(max_chars):
+    chunks = split_sections(RESUME, max_chars)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= max_chars for chunk in chunks)
+    assert words(" ".join(chunks)) == words(RESUME)
+
+
+def test_short_text_is_one_chunk():
+    assert split_sections(RESUME, len(RESUME)) == [RESUME]
+
+
+def test_chunks_start_at_headings():
+    chunks = split_sections(RESUME, 90)
+    # Each heading, including the repeated one, starts a chunk.
+    starts = [chunk.splitlines()[0] for chunk in chunks]
+    assert starts.count("EXPERIENCE") == 2
+    assert "PROJECTS" in starts
+    assert all("EXPERIENCE" not in chunk.splitlines()[1:] for chunk in chunks)
+
+
+def test_heading_inside_a_paragraph_splits_it():
+    text = "Intro line\nSKILLS\nPython\n\nMore text here"
+    chunks = split_sections(text, 20)
+    assert chunks[0] == "Intro line"
+    assert chunks[1].startswith("SKILLS")
+
+
+def test_long_section_is_cut_on_lines_then_hard():
+    text = "EXPERIENCE\n" + "a" * 25 + "\n" + "b" * 8
+    chunks = split_sections(text, 10)
+    assert all(len(chunk) <= 10 for chunk in chunks)
+    assert "".join(chunks).replace("\n", "") == text.replace("\n", "")
+
+
+def test_merge_combines_entries_split_across_chunks():
+    parts = [
+        Resume(
+            experiences=[
+                Experience(title="Backend Engineer", description="Built billing."),
+            ],
+            projects=[Project(title="Interview bot", description="An agent.")],
+            skills=["Python", "js"],
+        ),
+        Resume(
+            experiences=[
+                # The same role, continued in the next chunk.
+                Experience(title="backend  engineer", description="Moved to Postgres."),
+                Experience(title="Intern", description="Wrote tests."),
+            ],
+            projects=[],
+            skills=["python ", "JavaScript", "SQL"],
+        ),
+    ]
+    merged = merge_resumes(parts)
+    assert merged.experiences == [
+        Experience(
+            title="Backend Engineer", description="Built billing. Moved to Postgres."
+        ),
+        Experience(title="Intern", description="Wrote tests."),
+    ]
+    assert merged.projects == [Project(title="Interview bot", description="An agent.")]
+    assert merged.skills == ["Python", "js", "SQL"]
+
+
+def test_merge_drops_repeated_descriptions_of_overlapping_chunks():
+    entry = Experience(title="Data Engineer", description="Maintained the ETL.")
+    parts = [
+        Resume(experiences=[entry], projects=[], skills=[]),
+        Resume(
+            experiences=[entry, Experience(title="Data Engineer", description="")],
+            projects=[],
+            skills=[],
+        ),
+    ]
+    assert merge_resumes(parts).experiences == [entry]
+
+
+def test_merge_of_one_part_is_unchanged():
+    resume = Resume(
+        experiences=[Experience(title="A", description="x")],
+        projects=[Project(title="B", description="y")],
+        skills=["Go"],
+    )
+    assert merge_resumes([resume]) == resume
+
+
+def test_merge_job_descriptions_skips_empty_and_repeated_parts():
+    parts = [
+        JobDescription(job_description="Python role."),
+        JobDescription(job_description="  "),
+        JobDescription(job_description="Python role.\n"),
+        JobDescription(job_description="Remote."),
+    ]
+    assert merge_job_descriptions(parts).job_description == "Python role.\n\nRemote."
@@ -0,0 +1,149 @@
+import asyncio
+import os
+from uuid import uuid4
+
+import pytest
+
+from service.replay import END_FRAME, ReplayGone, ReplayStore, TurnRunning
+
+
+async def frames(count: int, gate: asyncio.Event | None = None):
+    """``count`` data frames and the end frame, pausing at ``gate`` if given."""
+    for i in range(count):
+        if gate is not None and i == count // 2:
+            await gate.wait()
+        yield f"data: {i}\n\n"
+    yield END_FRAME
+
+
+async def run(store: ReplayStore, thread_id: str, count: int) -> None:
+    stream = await store.start(thread_id, frames(count))
+    await stream.task
+
+
+async def ids(replay) -> list[int]:
+    return [int(frame.split("\n", 1)[0][4:]) async for frame in await replay]
+
+
+def test_resume_a_running_turn_from_last_event_id():
+    async def main():
+        store = ReplayStore()
+        gate = asyncio.Event()
+        stream = await store.start("t", frames(4, gate))
+        received = stream.follow(stream.first_id - 1)
+        assert [await anext(received) for _ in range(2)] == [
+            "id: 1\ndata: 0\n\n",
+            "id: 2\ndata: 1\n\n",
+        ]
+        await received.aclose()
+
+        # The client reconnects with the last id it received.
+        resumed = await store.replay("t", 2)
+        gate.set()
+        assert [frame async for frame in resumed] == [
+            "id: 3\ndata: 2\n\n",
+            "id: 4\ndata: 3\n\n",
+            f"id: 5\n{END_FRAME}",
+        ]
+
+    asyncio.run(main())
+
+
+def test_replay_of_a_finished_turn():
+    async def main():
+        store = ReplayStore()
+        await run(store, "t", 3)
+        await run(store, "t", 2)
+        # The second run has ids 5 to 7.
+        assert await ids(store.replay("t", 5)) == [6, 7]
+        assert await ids(store.replay("t")) == [5, 6, 7]
+        # Fully received, or from an earlier run: nothing to resume.
+        assert await store.replay("t", 7) is None
+        assert await store.replay("t", 2) is None
+        assert await store.replay("unknown", 1) is None
+
+    asyncio.run(main())
+
+
+def test_evicted_frames_are_gone():
+    async def main():
+        store = ReplayStore(max_frames=3)
+        await run(store, "t", 5)
+        assert await ids(store.replay("t", 3)) == [4, 5, 6]
+        with pytest.raises(ReplayGone):
+            await store.replay("t", 1)
+
+    asyncio.run(main())
+
+
+def test_least_recently_used_finished_threads_are_evicted():
+    async def main():
+        store = ReplayStore(max_threads=2)
+        for thread_id in ("a", "b"):
+            await run(store, thread_id, 1)
+        store.get("a")
+        await run(store, "c", 1)
+        assert store.get("b") is None
+        assert store.get("a") is not None
+
+    asyncio.run(main())
+
+
+def test_one_turn_per_thread():
+    async def main():
+        store = ReplayStore()
+        gate = asyncio.Event()
+        stream = await store.start("t", frames(2, gate))
+        with pytest.raises(TurnRunning):
+            await store.start("t", frames(1))
+        assert store.is_running("t")
+        gate.set()
+        await stream.task
+        assert not store.is_running("t")
+
+    asyncio.run(main())
+
+
+@pytest.mark.skipif(
+    not os.environ.get("POSTGRES_DB_URL"), reason="POSTGRES_DB_URL is not set"
+)
+def test_replay_persisted_runs():
+    from core.utils import get_connection_pool
+
+    async def main():
+        pool = await get_connection_pool()
+        thread_id = f"test-{uuid4()}"
+        try:
+            store = ReplayStore(max_threads=1, max_frames=5)
+            await store.attach(pool)
+            for count in (3, 4, 8):
+                await run(store, thread_id, count)
+            # Evicted from memory by another thread's run.
+            await run(store, f"{thread_id}-other", 1)
+            assert store.get(thread_id) is None
+
+            # Runs have ids 1-4, 5-9 and 10-18; the last 5 frames are kept,
+            # with the end frame of the run before.
+            assert await ids(store.replay(thread_id, 14)) == [15, 16, 17, 18]
+            assert await ids(store.replay(thread_id)) == [14, 15, 16, 17, 18]
+            assert await store.replay(thread_id, 18) is None
+            for earlier in (2, 9):
+                assert await store.replay(thread_id, earlier) is None
+            with pytest.raises(ReplayGone):
+                await store.replay(thread_id, 11)
+
+            # A new store continues the ids where the thread left off.
+            store = ReplayStore()
+            await store.attach(pool)
+            stream = await store.start(thread_id, frames(1))
+            assert stream.first_id == 19
+            await stream.task
+        finally:
+            async with pool.connection() as conn:
+                await conn.execute(
+                    "DELETE FROM sse_replay_frames WHERE thread_id LIKE %s",
+                    (f"{thread_id}%",),
+                )
+            await pool.close()
+
+    asyncio.run(main())
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from service.streaming import PartialJSONStringStreamer, StructuredOutputStreamer
+
+
+def stream(document: str, paths, size: int) -> dict[tuple, str]:
+    """Feed ``document`` in chunks of ``size`` and join the fragments per path."""
+    streamer = PartialJSONStringStreamer(paths)
+    values: dict[tuple, str] = {}
+    for start in range(0, len(document), size):
+        for path, fragment in streamer.feed(document[start : start + size]):
+            values[path] = values.get(path, "") + fragment
+    return values
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 64])
+def test_escapes_split_across_chunks(size):
+    text = 'Line "one"\nTab\there \\ back/slash é \U0001f600 end'
+    document = json.dumps({"response": text}, ensure_ascii=True)
+    assert stream(document, [("response",)], size) == {("response",): text}
+
+
+def test_surrogate_pair_split_between_escapes():
+    streamer = PartialJSONStringStreamer([("response",)])
+    assert streamer.feed('{"response": "a\\ud8') == [(("response",), "a")]
+    assert streamer.feed("3d\\u") == []
+    assert streamer.feed("de00b") == [(("response",), "\U0001f600b")]
+
+
+def test_only_requested_paths_are_emitted():
+    document = json.dumps(
+        {
+            "reasoning": "not streamed",
+            "questions": ['first "q"', "second"],
+            "nested": {"questions": ["other"]},
+        }
+    )
+    assert stream(document, [("questions", 0)], 4) == {("questions", 0): 'first "q"'}
+
+
+def test_keys_with_escapes_are_decoded():
+    document = '{"a\\"b": "x", "response": "y"}'
+    assert stream(document, [('a"b',), ("response",)], 1) == {
+        ('a"b',): "x",
+        ("response",): "y",
+    }
+
+
+def test_non_string_value_at_path_emits_nothing():
+    document = json.dumps({"response": {"score": 3, "comment": "text"}})
+    assert stream(document, [("response",)], 3) == {}
+
+
+def test_structured_output_streamer_routes_by_call():
+    streamer = StructuredOutputStreamer()
+    chunks = [
+        {"index": 0, "name": "ExperienceInterviewQuestion", "args": '{"respo'},
+        {"index": 1, "name": "Unknown", "args": '{"response": "hidden"}'},
+    ]
+    assert streamer.feed("run", chunks) == []
+    tokens = streamer.feed("run", [{"index": 0, "args": 'nse": "Hi\\'}])
+    tokens += streamer.feed("run", [{"index": 0, "args": 'n there"}'}])
+    assert "".join(tokens) == "Hi\n there"